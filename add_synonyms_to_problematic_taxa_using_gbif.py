@@ -1,35 +1,44 @@
 import argparse
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import pandas as pd
 from pygbif import species as gbif_species
 
+from gbif_cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MAX_ENTRIES,
+    DEFAULT_TTL_DAYS,
+    GbifNameBackboneCache,
+)
+from gbif_client import (
+    DEFAULT_MAX_REQUESTS_PER_SECOND,
+    DEFAULT_MAX_RETRIES,
+    GBIF_API_URL,
+    GbifClient,
+)
+from gbif_offline import DEFAULT_BACKBONE_DB_PATH, OfflineGbifBackbone
+from taxon_table import TaxonTable
+
+DEFAULT_WORKERS = 8
+GBIF_MODES = ["online", "cached", "offline"]
+
 ALL_DATASETS_DIR = Path("data-sources")
 TARGET_DIR = Path("inat-common-name-adder")
 
 
 def get_scientific_name(taxon):
-    match taxon["rank"]:
-        case "species":
-            return taxon["species_scientific"]
-        case "genus":
-            return taxon["genus_scientific"]
-        case "subfamily":
-            return taxon["subfamily_scientific"]
-        case "family":
-            return taxon["family_scientific"]
-        case "superfamily":
-            return taxon["superfamily_scientific"]
-        case "order":
-            return taxon["order_scientific"]
-        case "infraorder":
-            return taxon["infraorder_scientific"]
+    scientific_name_column = f"{taxon['rank']}_scientific"
+    if scientific_name_column in taxon:
+        return taxon[scientific_name_column]
 
     print(f"Unsupported rank: {taxon['rank']}")
     return None
 
 
-def fetch_synonym_from_gbif(taxon):
-    gbif_results = gbif_species.name_backbone(
+def get_gbif_query(taxon):
+    return dict(
         name=get_scientific_name(taxon),
         rank=taxon["rank"],
         clazz="Insecta",
@@ -37,6 +46,10 @@ def fetch_synonym_from_gbif(taxon):
         verbose=True,
     )
 
+
+def fetch_synonym_from_gbif(taxon, name_backbone=gbif_species.name_backbone):
+    gbif_results = name_backbone(**get_gbif_query(taxon))
+
     if gbif_results["matchType"] == "NONE" and "alternatives" not in gbif_results:
         print("no match found in GBIF")
         return None
@@ -128,10 +141,100 @@ def get_name_by_rank_from_gbif_results(gbif_results):
         return None
 
 
-def main(dataset_directory_name):
+def get_query_key(query):
+    return tuple(query.values())
+
+
+def prefetch_gbif_results(taxa, name_backbone_many):
+    """
+    Queries GBIF for all the taxa at once using `name_backbone_many` and returns
+    a `name_backbone`-like function that answers from the prefetched results.
+    """
+    queries = {}
+    for taxon in taxa:
+        query = get_gbif_query(taxon)
+        queries[get_query_key(query)] = query
+
+    results = dict(zip(queries.keys(), name_backbone_many(list(queries.values()))))
+
+    return lambda **query: results[get_query_key(query)]
+
+
+def submit_gbif_queries(taxa, name_backbone, executor):
+    """
+    Submits the GBIF queries for all the taxa to the executor and returns a `name_backbone`-like
+    function that waits for the corresponding query to complete.
+    """
+    futures = {}
+    for taxon in taxa:
+        query = get_gbif_query(taxon)
+        if get_query_key(query) not in futures:
+            futures[get_query_key(query)] = executor.submit(name_backbone, **query)
+
+    return lambda **query: futures[get_query_key(query)].result()
+
+
+def get_checkpoint_header(gbif_mode, gbif_source, input_paths):
+    """
+    What the checkpointed taxa were processed with: the GBIF mode and source, and the data source's
+    taxa (problematic_taxa.csv is left out, the checkpoint is keyed by the scientific names in it).
+    """
+    input_hash = hashlib.sha256()
+    for path in input_paths:
+        input_hash.update(Path(path).read_bytes())
+    return {
+        "gbifMode": gbif_mode,
+        "gbifSource": str(gbif_source),
+        "inputHash": input_hash.hexdigest(),
+    }
+
+
+def load_checkpoint(checkpoint_path, header):
+    """
+    Reads the taxa (by their scientific name) that were already processed in earlier runs. The
+    checkpoint is discarded if those runs used a different GBIF mode or source, or other taxa.
+    """
+    processed_taxa = {}
+    if not checkpoint_path.exists():
+        return processed_taxa
+    with open(checkpoint_path) as f:
+        try:
+            checkpoint_header = json.loads(f.readline()).get("header")
+        except json.JSONDecodeError:
+            checkpoint_header = None
+        if checkpoint_header != header:
+            print(
+                f"Discarding {checkpoint_path}, it was written with a different GBIF mode or source, or another taxa.csv."
+            )
+            return processed_taxa
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # the last line might be incomplete if the previous run got killed while writing it
+                continue
+            processed_taxa[record["scientificName"]] = record["taxon"]
+    return processed_taxa
+
+
+def main(
+    dataset_directory_name,
+    gbif_mode="cached",
+    gbif_backbone_db_path=DEFAULT_BACKBONE_DB_PATH,
+    cache_path=DEFAULT_CACHE_PATH,
+    cache_ttl_days=DEFAULT_TTL_DAYS,
+    cache_max_entries=DEFAULT_MAX_ENTRIES,
+    gbif_backbone_version=None,
+    clear_cache=False,
+    workers=DEFAULT_WORKERS,
+    max_requests_per_second=DEFAULT_MAX_REQUESTS_PER_SECOND,
+    max_retries=DEFAULT_MAX_RETRIES,
+    gbif_api_url=GBIF_API_URL,
+    restart=False,
+):
     dataset_dir = ALL_DATASETS_DIR / dataset_directory_name
 
-    df_all_taxa = pd.read_csv(dataset_dir / "taxa.csv")
+    all_taxa = TaxonTable.from_csv(dataset_dir / "taxa.csv")
 
     if not (dataset_dir / "problematic_taxa.csv").exists():
         print(
@@ -143,29 +246,102 @@ def main(dataset_directory_name):
         "scientificName"
     ].values
 
-    taxa_synonym_enhanced = []
+    checkpoint_path = dataset_dir / "problematic_taxa_with_synonyms.checkpoint.jsonl"
+    if restart:
+        checkpoint_path.unlink(missing_ok=True)
+    checkpoint_header = get_checkpoint_header(
+        gbif_mode,
+        gbif_backbone_db_path if gbif_mode == "offline" else gbif_api_url,
+        [dataset_dir / "taxa.csv"],
+    )
+    processed_taxa = load_checkpoint(checkpoint_path, checkpoint_header)
+    # names dropped from problematic_taxa.csv since the earlier runs are left out
+    listed_names = set(problematic_taxon_names)
+    processed_taxa = {
+        name: taxon for name, taxon in processed_taxa.items() if name in listed_names
+    }
+    if not processed_taxa:
+        checkpoint_path.write_text(json.dumps({"header": checkpoint_header}) + "\n")
+    else:
+        print(
+            f"Re-using {len(processed_taxa)} taxa processed in earlier runs (see {checkpoint_path}, run with --restart to process them again)."
+        )
 
+    problematic_taxa = {}
     for problematic_taxon_sci_name in problematic_taxon_names:
-        print(f"=== Processing {problematic_taxon_sci_name} ===")
-
-        taxa = df_all_taxa[
-            df_all_taxa.apply(
-                lambda taxon: get_scientific_name(taxon)
-                == problematic_taxon_sci_name.lower(),
-                axis=1,
-            )
-        ]
+        if problematic_taxon_sci_name in processed_taxa:
+            continue
+        taxa = all_taxa.find_by_scientific_name(problematic_taxon_sci_name)
         if len(taxa):
-            full_problematic_taxon = taxa.iloc[0].to_dict()
-            full_problematic_taxon["synonyms"] = fetch_synonym_from_gbif(
-                full_problematic_taxon
-            )
-            taxa_synonym_enhanced.append(full_problematic_taxon)
+            problematic_taxa[problematic_taxon_sci_name] = all_taxa.to_records(taxa)[0]
         else:
             print(
                 f"the scientific name '{problematic_taxon_sci_name}' can't be found in the list of all taxa from your data source. did you mis-type the scientific name?"
             )
 
+    if gbif_mode == "offline":
+        offline_backbone = OfflineGbifBackbone(gbif_backbone_db_path)
+        name_backbone = prefetch_gbif_results(
+            problematic_taxa.values(), offline_backbone.name_backbone_many
+        )
+    else:
+        gbif_client = GbifClient(
+            gbif_api_url,
+            max_requests_per_second=max_requests_per_second,
+            max_retries=max_retries,
+        )
+        name_backbone = gbif_client.name_backbone
+    if gbif_mode == "cached":
+        gbif_cache = GbifNameBackboneCache(
+            cache_path,
+            ttl_days=cache_ttl_days,
+            max_entries=cache_max_entries,
+            backbone_version=gbif_backbone_version,
+            fetch=gbif_client.name_backbone,
+            api_url=gbif_api_url,
+        )
+        if clear_cache:
+            gbif_cache.invalidate()
+        name_backbone = gbif_cache.name_backbone
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    if gbif_mode != "offline" and workers > 1:
+        name_backbone = submit_gbif_queries(
+            problematic_taxa.values(), name_backbone, executor
+        )
+
+    try:
+        with open(checkpoint_path, "a") as checkpoint_file:
+            for problematic_taxon_sci_name, taxon in problematic_taxa.items():
+                print(f"=== Processing {problematic_taxon_sci_name} ===")
+                taxon["synonyms"] = fetch_synonym_from_gbif(taxon, name_backbone)
+                processed_taxa[problematic_taxon_sci_name] = taxon
+                checkpoint_file.write(
+                    json.dumps(
+                        {"scientificName": problematic_taxon_sci_name, "taxon": taxon}
+                    )
+                    + "\n"
+                )
+                checkpoint_file.flush()
+    except KeyboardInterrupt:
+        print(
+            f"Interrupted. The {len(processed_taxa)} taxa processed so far are saved in {checkpoint_path}, re-run this script to continue."
+        )
+        return
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if gbif_mode == "cached":
+            print(
+                f"GBIF cache: {gbif_cache.hits} hit(s), {gbif_cache.misses} name(s) fetched from GBIF."
+            )
+            gbif_cache.close()
+
+    taxa_synonym_enhanced = [
+        processed_taxa[problematic_taxon_sci_name]
+        for problematic_taxon_sci_name in problematic_taxon_names
+        if problematic_taxon_sci_name in processed_taxa
+    ]
+
     pd.DataFrame(taxa_synonym_enhanced).to_json(
         dataset_dir / "problematic_taxa_with_synonyms.json", orient="records"
     )
@@ -174,6 +350,79 @@ def main(dataset_directory_name):
 if __name__ == "__main__":
     arg_parser = argparse.ArgumentParser()
     arg_parser.add_argument("data_source")
+    arg_parser.add_argument(
+        "--gbif-mode",
+        choices=GBIF_MODES,
+        default="cached",
+        help="'online' always queries the GBIF API, 'cached' re-uses API responses from earlier runs, "
+        "'offline' uses a local copy of the GBIF backbone (see gbif_offline.py)",
+    )
+    arg_parser.add_argument(
+        "--gbif-backbone-db-path", type=Path, default=DEFAULT_BACKBONE_DB_PATH
+    )
+    arg_parser.add_argument("--cache-path", type=Path, default=DEFAULT_CACHE_PATH)
+    arg_parser.add_argument(
+        "--cache-ttl-days",
+        type=float,
+        default=DEFAULT_TTL_DAYS,
+        help="cached GBIF responses older than this are fetched again",
+    )
+    arg_parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help="the least recently used cached responses are evicted beyond this number",
+    )
+    arg_parser.add_argument(
+        "--gbif-backbone-version",
+        help="e.g. the date of the GBIF backbone release; the cache is cleared whenever this changes",
+    )
+    arg_parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="drop all cached GBIF responses before running",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="number of concurrent requests to GBIF (1 = one taxon at a time)",
+    )
+    arg_parser.add_argument(
+        "--max-requests-per-second",
+        type=float,
+        default=DEFAULT_MAX_REQUESTS_PER_SECOND,
+    )
+    arg_parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help="how many times to retry a request after HTTP 429/5xx or a connection error",
+    )
+    arg_parser.add_argument(
+        "--gbif-api-url",
+        default=GBIF_API_URL,
+        help="e.g. a local stand-in for the GBIF API",
+    )
+    arg_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="process all taxa again instead of re-using the results of earlier runs",
+    )
     args = arg_parser.parse_args()
 
-    main(args.data_source)
+    main(
+        args.data_source,
+        gbif_mode=args.gbif_mode,
+        gbif_backbone_db_path=args.gbif_backbone_db_path,
+        cache_path=args.cache_path,
+        cache_ttl_days=args.cache_ttl_days,
+        cache_max_entries=args.cache_max_entries,
+        gbif_backbone_version=args.gbif_backbone_version,
+        clear_cache=args.clear_cache,
+        workers=args.workers,
+        max_requests_per_second=args.max_requests_per_second,
+        max_retries=args.max_retries,
+        gbif_api_url=args.gbif_api_url,
+        restart=args.restart,
+    )
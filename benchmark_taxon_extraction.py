@@ -0,0 +1,153 @@
+import argparse
+import importlib.util
+import time
+from pathlib import Path
+
+import pandas as pd
+from pydantic import create_model
+
+from spreadsheet_cache import read_excel_sheets
+from taxon_extraction import TaxonTableBuilder
+
+ALL_DATASETS_DIR = Path("data-sources")
+
+
+def load_extractor(data_source_name):
+    """Imports the data source's `extract_taxa.py` (the data sources aren't packages)."""
+    path = ALL_DATASETS_DIR / data_source_name / "extract_taxa.py"
+    spec = importlib.util.spec_from_file_location(
+        f"{data_source_name.replace('-', '_')}_extract_taxa", path
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def extract_text_checklist(data_source_name):
+    extractor = load_extractor(data_source_name)
+    text = (ALL_DATASETS_DIR / data_source_name / "raw_text.txt").read_text()
+    start_time = time.perf_counter()
+    taxon_df = extractor.extract_taxon_data(text)
+    return extractor, taxon_df, time.perf_counter() - start_time
+
+
+def extract_sbm(data_source_name):
+    extractor = load_extractor(data_source_name)
+    raw_data = read_excel_sheets(
+        ALL_DATASETS_DIR / data_source_name / "sbm-november-2025.xlsx",
+        ["druhy", "čeľade"],
+    )
+    start_time = time.perf_counter()
+    taxa = TaxonTableBuilder(extractor.TAXON_SCHEMA, defaults=extractor.TAXON_DEFAULTS)
+    extractor.extract_species(raw_data["druhy"], taxa)
+    extractor.extract_families(raw_data["čeľade"], taxa)
+    taxon_df = taxa.build()
+    return extractor, taxon_df, time.perf_counter() - start_time
+
+
+def extract_birds(data_source_name):
+    extractor = load_extractor(data_source_name)
+    species_raw_data = read_excel_sheets(
+        ALL_DATASETS_DIR / data_source_name / "SMVS_13_aug_2020.xlsx",
+        [extractor.SHEET_NAME],
+    )[extractor.SHEET_NAME]
+    start_time = time.perf_counter()
+    taxon_df = extractor.extract_species(species_raw_data)
+    return extractor, taxon_df, time.perf_counter() - start_time
+
+
+EXTRACTIONS = {
+    "checklist-of-lepidoptera-recorded-in-Slovakia-2022": extract_text_checklist,
+    "slovenske-mena-hmyzu-1975": extract_text_checklist,
+    "slovenske-botanicke-menoslovie-2024": extract_sbm,
+    "slovenske-mena-vtakov-sveta-2020": extract_birds,
+}
+
+
+def get_pydantic_model(schema, required):
+    """The per-row pydantic model the extractors used to validate each taxon with."""
+    fields = {
+        column: (
+            (column_type, ...)
+            if column in required
+            else (
+                (column_type | None, None)
+                if column_type is str
+                else (column_type, column_type())
+            )
+        )
+        for column, column_type in schema.items()
+    }
+    return create_model("Taxon", **fields)
+
+
+def time_record_building(extractor, taxon_df, repeat):
+    """
+    Builds the same table of taxa both ways: one pydantic model per taxon dumped into a DataFrame,
+    and appending to the columnar builder (validated once at the end).
+    """
+    required = getattr(extractor, "REQUIRED_COLUMNS", ["rank"])
+    Taxon = get_pydantic_model(extractor.TAXON_SCHEMA, required)
+    records = [
+        {column: value for column, value in record.items() if value is not None}
+        for record in taxon_df.astype(object)
+        .where(taxon_df.notna(), None)
+        .to_dict("records")
+    ]
+
+    pydantic_times, builder_times = [], []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        pydantic_df = pd.DataFrame([Taxon(**record).model_dump() for record in records])
+        pydantic_times.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        taxa = TaxonTableBuilder(
+            extractor.TAXON_SCHEMA,
+            required,
+            getattr(extractor, "TAXON_DEFAULTS", None),
+        )
+        for record in records:
+            taxa.append(**record)
+        builder_df = taxa.build()
+        builder_times.append(time.perf_counter() - start_time)
+
+    # missing values are None in one and NaN in the other, what gets saved has to be the same
+    if pydantic_df.to_csv(index=False) != builder_df.to_csv(index=False):
+        raise ValueError("The two ways of building the taxa don't agree")
+    return min(pydantic_times), min(builder_times)
+
+
+def main(data_source_names, repeat=3):
+    results = []
+    for data_source_name in data_source_names:
+        extractor, taxon_df, extraction_time = EXTRACTIONS[data_source_name](
+            data_source_name
+        )
+        pydantic_time, builder_time = time_record_building(extractor, taxon_df, repeat)
+        results.append(
+            {
+                "dataSource": data_source_name,
+                "taxa": len(taxon_df),
+                "extraction (s)": extraction_time,
+                "pydantic records (s)": pydantic_time,
+                "columnar builder (s)": builder_time,
+                "speedup": pydantic_time / builder_time,
+            }
+        )
+    print(pd.DataFrame(results).to_string(index=False, float_format="{:.3f}".format))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "data_sources",
+        nargs="*",
+        help=f"defaults to all of {', '.join(EXTRACTIONS)}",
+    )
+    arg_parser.add_argument(
+        "--repeat", type=int, default=3, help="the best of how many runs to report"
+    )
+    args = arg_parser.parse_args()
+
+    main(args.data_sources or list(EXTRACTIONS), args.repeat)
@@ -1,137 +1,86 @@
-import re
-
-import pandas as pd
-from pydantic import BaseModel
-
-
-class Taxon(BaseModel):
-    rank: str
-    superfamily_scientific: str | None = None
-    family_scientific: str | None = None
-    family_common: str | None = None
-    subfamily_scientific: str | None = None
-    genus_scientific: str | None = None
-    species_scientific: str | None = None
-    species_common: str | None = None
-
-
-def extract_taxon_data(text):
-    taxa = []
-
-    current_superfamily = None
-    current_family = None
-    current_subfamily = None
-    current_genus = None
-
-    for line in text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-
-        # Match superfamily:
-        # Nadčeľaď: NEPTICULOIDEA
-        superfamily_match = re.match(r"Nadčeľaď:\s*([A-ZÀ-Ž]+IDEA)", line)
-        if superfamily_match:
-            current_superfamily = superfamily_match.group(1).lower()
-            taxa.append(
-                Taxon(rank="superfamily", superfamily_scientific=current_superfamily)
-            )
-            current_family = current_subfamily = current_genus = None
-            continue
-
-        # Match family:
-        # Čeľaď: NEPTICULIDAE – DROBNÍKOVITÉ
-        family_match = re.match(r"Čeľaď:\s*([A-ZÀ-Ž]+IDAE)( – ([A-ZÀ-Ž]+))?", line)
-        if family_match:
-            current_family = family_match.group(1).lower()
-            current_family_common = (
-                family_match.group(3).strip().lower()
-                if family_match.group(3) is not None
-                else None
-            )
-            taxa.append(
-                Taxon(
-                    rank="family",
-                    superfamily_scientific=current_superfamily,
-                    family_scientific=current_family,
-                    family_common=current_family_common,
-                )
-            )
-            current_subfamily = current_genus = None
-            continue
-
-        # Match subfamily:
-        # Podčeľaď: NEPTICULINAE
-        subfamily_match = re.match(r"Podčeľaď:\s*([A-ZÀ-Ž]+INAE)", line)
-        if subfamily_match:
-            current_subfamily = subfamily_match.group(1).lower()
-            taxa.append(
-                Taxon(
-                    rank="subfamily",
-                    superfamily_scientific=current_superfamily,
-                    family_scientific=current_family,
-                    family_common=current_family_common,
-                    subfamily_scientific=current_subfamily,
-                )
-            )
-            current_genus = None
-            continue
-
-        if re.match(f"Kmeň:.*", line) or re.match(f"Podkmeň:.*", line):
-            continue
-
-        # Match genus:
-        # Enteucha Meyrick, 1915
-        genus_match = re.match(
-            r"^([A-Z][a-z]+).*",
-            line,
-        )
-        if genus_match:
-            current_genus = genus_match.group(1).lower()
-            taxa.append(
-                Taxon(
-                    rank="genus",
-                    superfamily_scientific=current_superfamily,
-                    family_scientific=current_family,
-                    family_common=current_family_common,
-                    subfamily_scientific=current_subfamily,
-                    genus_scientific=current_genus,
-                )
-            )
-            continue
-
-        # Match species:
-        # acetosae (Stainton, 1854) – drobník štiavový
-        # v-flava (Haworth, 1828) – moľa sudová
-        species_match = re.match(r"([a-zà-ž-]+).* – (.*)", line)
-        if species_match and current_genus:
-            species = species_match.group(1).strip()
-            species_common = species_match.group(2).strip()
-            species_scientific = f"{current_genus} {species}"
-            taxa.append(
-                Taxon(
-                    rank="species",
-                    superfamily_scientific=current_superfamily,
-                    family_scientific=current_family,
-                    family_common=current_family_common,
-                    subfamily_scientific=current_subfamily,
-                    genus_scientific=current_genus,
-                    species_scientific=species_scientific,
-                    species_common=species_common,
-                )
-            )
-            continue
-
-    return taxa
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from taxon_extraction import LineParser, LineRule, TaxonHierarchyBuilder
+
+RANKS = ["superfamily", "family", "subfamily", "genus", "species"]
+TAXON_SCHEMA = {
+    "rank": str,
+    "superfamily_scientific": str,
+    "family_scientific": str,
+    "family_common": str,
+    "subfamily_scientific": str,
+    "genus_scientific": str,
+    "species_scientific": str,
+    "species_common": str,
+}
+
+
+def extract_species(groups, taxa):
+    current_genus = taxa.current.get("genus_scientific")
+    if not current_genus:
+        return None
+    return {
+        "species_scientific": f"{current_genus} {groups[0].strip()}",
+        "species_common": groups[1].strip(),
+    }
+
+
+RULES = [
+    LineRule("page number", r"\d+$"),
+    # Nadčeľaď: NEPTICULOIDEA
+    LineRule(
+        "superfamily",
+        r"Nadčeľaď:\s*([A-ZÀ-Ž]+IDEA)",
+        "superfamily",
+        lambda groups, taxa: {"superfamily_scientific": groups[0].lower()},
+    ),
+    # Čeľaď: NEPTICULIDAE – DROBNÍKOVITÉ
+    LineRule(
+        "family",
+        r"Čeľaď:\s*([A-ZÀ-Ž]+IDAE)( – ([A-ZÀ-Ž]+))?",
+        "family",
+        lambda groups, taxa: {
+            "family_scientific": groups[0].lower(),
+            "family_common": (
+                groups[2].strip().lower() if groups[2] is not None else None
+            ),
+        },
+    ),
+    # Podčeľaď: NEPTICULINAE
+    LineRule(
+        "subfamily",
+        r"Podčeľaď:\s*([A-ZÀ-Ž]+INAE)",
+        "subfamily",
+        lambda groups, taxa: {"subfamily_scientific": groups[0].lower()},
+    ),
+    LineRule("tribe", r"Kmeň:.*|Podkmeň:.*"),
+    # Enteucha Meyrick, 1915
+    LineRule(
+        "genus",
+        r"^([A-Z][a-z]+).*",
+        "genus",
+        lambda groups, taxa: {"genus_scientific": groups[0].lower()},
+    ),
+    # acetosae (Stainton, 1854) – drobník štiavový
+    # v-flava (Haworth, 1828) – moľa sudová
+    LineRule("species", r"([a-zà-ž-]+).* – (.*)", "species", extract_species),
+]
+
+
+def extract_taxon_data(text, parser=None):
+    parser = parser or LineParser(RULES)
+    return parser.parse(text, TaxonHierarchyBuilder(TAXON_SCHEMA, RANKS)).build()
 
 
 if __name__ == "__main__":
     with open("raw_text.txt", "r") as f:
-        data = f.readlines()
-
-    taxon_list = extract_taxon_data("\n".join(data))
+        text = f.read()
 
-    taxon_df = pd.DataFrame([taxon.model_dump() for taxon in taxon_list])
+    parser = LineParser(RULES)
+    taxon_df = extract_taxon_data(text, parser)
+    print(parser.get_report())
 
     taxon_df.to_csv("taxa.csv", index=False)
 
@@ -1,42 +1,83 @@
-import pandas as pd
+import sys
+import time
 from datetime import datetime
+from pathlib import Path
 
-date_lower_bound = datetime.strptime("2025-11-22", '%Y-%m-%d').date()
+import numpy as np
+import pandas as pd
+import pyarrow as pa
 
-df_names_added_all = pd.read_csv("VernacularNames-slovak-dec.csv", parse_dates=["created"])
-df_names_added_all["created"] = pd.to_datetime(df_names_added_all["created"]).dt.date
-df_names_added = df_names_added_all[(df_names_added_all["contributor"] == "Samo Sučík") & (df_names_added_all["created"] >= date_lower_bound)]
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from inat_taxonomy import load_inat_taxa
+from taxon_table import TaxonTable, normalize_scientific_names
+from vernacular_names import VernacularNameStore, normalize_names
+
+STATUS_MATCHED = "matched"
+STATUS_AMBIGUOUS = "ambiguous"
+STATUS_SBM_MISSING = "SBM missing"
+STATUS_INAT_MISSING = "iNat missing"
+STATUS_SCI_NAME_MISMATCH = "sciName mismatch"
+
+date_lower_bound = datetime.strptime("2025-11-22", '%Y-%m-%d').date()
+report_path = Path("data-sources/slovenske-botanicke-menoslovie-2024/auto_added_names_reconciliation.csv")
 
-df_sbm_taxa = pd.read_csv("data-sources/slovenske-botanicke-menoslovie-2024/taxa.csv")
-df_sbm_taxa["commonName"] = df_sbm_taxa.apply(lambda row: row[f"{row["rank"]}_common"], axis=1)
-common_name_cols = [col for col in df_sbm_taxa.columns if col.endswith("_common")]
-def get_sbm_sci_name_by_common_name(common_name):
-    matching_rows = df_sbm_taxa[df_sbm_taxa["commonName"] == common_name]
-    if len(matching_rows) > 1 and len(common_name.split()) > 1:
-        print(f"Found {len(matching_rows)} taxa with commonName={common_name} but expected exactly 1.")
-        return ""
-    elif len(matching_rows) == 0:
-        print(f"No SBM scientific names found for '{common_name}'")
-        return ""
-    else:
-        return matching_rows["commonName"].values.tolist()[0]
 
-df_names_added["sciNameSBM"] = df_names_added["vernacularName"].apply(get_sbm_sci_name_by_common_name)
-exit()
+def reconcile_added_names(df_names_added, sbm_taxa, inat_taxa):
+    """
+    Gives each added name (`id`, `vernacularName` and `nameKey` columns) a status by joining it
+    to the SBM taxa (a TaxonTable's df) on the normalized common name and to the iNat taxa on the ID.
+    """
+    df_names_added = df_names_added.reset_index(drop=True)
 
-# print(df_names_added)
+    # (1) the added names -> (2) SBM taxa by their (normalized) common name
+    sbm_taxa = sbm_taxa.assign(nameKey=normalize_names(sbm_taxa["commonName"]))[["nameKey", "scientificName"]]
+    sbm_matches = df_names_added[["nameKey"]].reset_index(names="row").merge(sbm_taxa.dropna(), on="nameKey")
+    num_sbm_matches = sbm_matches.groupby("row").size().reindex(df_names_added.index, fill_value=0)
+    # several SBM taxa sharing a one-word name (e.g. a genus and its only species) are fine, the first one wins
+    df_names_added["numSbmMatches"] = num_sbm_matches
+    df_names_added["sciNameSBM"] = sbm_matches.groupby("row")["scientificName"].first()
+    df_names_added["sbmCandidates"] = df_names_added["sciNameSBM"]
+    multiple_sbm_matches = sbm_matches[sbm_matches["row"].map(num_sbm_matches) > 1]
+    df_names_added.loc[num_sbm_matches > 1, "sbmCandidates"] = multiple_sbm_matches.groupby("row")["scientificName"].agg(" | ".join)
+    is_ambiguous = (num_sbm_matches > 1) & (df_names_added["vernacularName"].str.split().str.len() > 1)
 
-df_all_inat_taxa = pd.read_csv("all_inat_taxa.csv")
-def get_inat_sci_name_by_id(id):
-    matching_rows = df_all_inat_taxa[df_all_inat_taxa["id"] == id]
-    if len(matching_rows) != 1:
-        print(f"Found {len(matching_rows)} taxa with ID={id} but expected exactly 1.")
-        return ""
-    return matching_rows["scientificName"].values.tolist()[0]
+    # (3) iNat taxa by ID
+    inat_taxa = inat_taxa[inat_taxa["id"].isin(df_names_added["id"])]
+    df_names_added = df_names_added.merge(
+        inat_taxa.rename(columns={"scientificName": "sciNameInat"}).astype({"sciNameInat": object}), on="id", how="left"
+    )
 
+    sci_names_match = normalize_scientific_names(
+        df_names_added["sciNameSBM"].astype(pd.ArrowDtype(pa.string()))
+    ) == normalize_scientific_names(df_names_added["sciNameInat"].astype(pd.ArrowDtype(pa.string())))
+    df_names_added["status"] = np.select(
+        [
+            num_sbm_matches.to_numpy() == 0,
+            is_ambiguous.to_numpy(),
+            df_names_added["sciNameInat"].isna(),
+            ~sci_names_match.fillna(False).to_numpy(dtype=bool),
+        ],
+        [STATUS_SBM_MISSING, STATUS_AMBIGUOUS, STATUS_INAT_MISSING, STATUS_SCI_NAME_MISMATCH],
+        STATUS_MATCHED,
+    )
+    df_names_added.loc[df_names_added["status"] == STATUS_AMBIGUOUS, "sciNameSBM"] = None
+    return df_names_added
 
-# id,taxonID,identifier,parentNameUsageID,kingdom,phylum,class,order,family,genus,specificEpithet,infraspecificEpithet,modified,scientificName,taxonRank,references
 
-df_names_added["sciNameInat"] = df_names_added["id"].apply(get_inat_sci_name_by_id)
+if __name__ == "__main__":
+    start_time = time.time()
+    inat_names = VernacularNameStore.from_csv("VernacularNames-slovak-dec.csv")
+    df_names_added = inat_names.find_created_between(start=date_lower_bound, contributor="Samo Sučík")
+    df_names_added = reconcile_added_names(
+        df_names_added[["id", "vernacularName", "created", "nameKey"]],
+        TaxonTable.from_data_source("slovenske-botanicke-menoslovie-2024").df,
+        load_inat_taxa(["id", "scientificName"]),
+    )
 
-print(df_names_added)
+    # the same format as in the export (formatting the timestamps with pandas takes a while)
+    df_names_added["created"] = np.char.add(
+        np.datetime_as_string(df_names_added["created"].to_numpy(dtype="datetime64[s]"), unit="s"), "Z"
+    )
+    df_names_added.drop(columns="nameKey").to_csv(report_path, index=False)
+    print(df_names_added["status"].value_counts().to_string())
+    print(f"Saved the report on {len(df_names_added)} names to {report_path} in {time.time() - start_time:.2f}s.")
@@ -1,44 +1,41 @@
-import pandas as pd
+import sys
 import datetime
+from pathlib import Path
+
+import pandas as pd
 
-df_all_inat_names = pd.read_csv("VernacularNames-slovak-dec.csv", parse_dates=["created"])
-df_all_inat_names["vernacularNameLowerCase"] = df_all_inat_names["vernacularName"].str.lower()
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from diff_vernacular_name_exports import CHANGE_ADDED, diff_exports
+from vernacular_names import VernacularNameStore
+
+inat_names = VernacularNameStore.from_csv("VernacularNames-slovak-dec.csv")
+names_diff = diff_exports("VernacularNames-slovak-nov.csv", "VernacularNames-slovak-dec.csv")
+names_added_since_nov = names_diff[names_diff["change"] == CHANGE_ADDED]
+names_added_since_nov = set(zip(names_added_since_nov["id"], names_added_since_nov["vernacularName"]))
 df_existing_names = pd.read_csv("data-sources/slovenske-botanicke-menoslovie-2024/existing_names_not_covered.csv")
 
-attributions = {}
-
-for _, taxon_with_existing_name in df_existing_names.iterrows():
-    # sciName,commonNameSBM,commonNameINat,differenceCategory
-    new_name = taxon_with_existing_name["commonNameSBM"]
-    previous_name = taxon_with_existing_name["commonNameINat"]
-    previous_name_context = df_all_inat_names[df_all_inat_names["vernacularNameLowerCase"] == previous_name.lower()]
-    if len(previous_name_context) == 0:
-        print(f"oh no – no records found for this previous name being added: '{previous_name}'")
-        continue
-    elif len(previous_name_context) > 1:
-        print(f"Wow, multiple records found for the name '{previous_name}' being added previously (we wanted to add '{new_name}'):")
-        [print(f"- '{row['vernacularName']}' added by '{row['contributor']}' on {row['created'].strftime('%d/%m/%Y')} (https://www.inaturalist.org/taxa/{row['id']})") for _, row in previous_name_context.iterrows()]
-        continue
-    else:
-        previous_name_context = previous_name_context.iloc[0]
-    
-    contributor = previous_name_context['contributor']
-    if contributor not in attributions:
-        attributions[contributor] = []
-    attributions[contributor].append({
-        "sciName": taxon_with_existing_name["sciName"],
-        "id": previous_name_context["id"],
-        "date": previous_name_context["created"],
-        "new_name": new_name,
-        "previous_name": previous_name_context["vernacularName"]
-    })
-
-for contributor, items in attributions.items():
+# sciName,commonNameSBM,commonNameINat,differenceCategory
+previous_name_contexts = inat_names.match_names(df_existing_names["commonNameINat"])
+num_records = previous_name_contexts["queryIndex"].value_counts().reindex(df_existing_names.index, fill_value=0)
+
+for previous_name in df_existing_names.loc[num_records == 0, "commonNameINat"]:
+    print(f"oh no – no records found for this previous name being added: '{previous_name}'")
+
+for query_index, records in previous_name_contexts[previous_name_contexts["queryIndex"].map(num_records) > 1].groupby("queryIndex"):
+    previous_name = df_existing_names.loc[query_index, "commonNameINat"]
+    new_name = df_existing_names.loc[query_index, "commonNameSBM"]
+    print(f"Wow, multiple records found for the name '{previous_name}' being added previously (we wanted to add '{new_name}'):")
+    [print(f"- '{row['vernacularName']}' added by '{row['contributor']}' on {row['created'].strftime('%d/%m/%Y')} (https://www.inaturalist.org/taxa/{row['id']})") for _, row in records.iterrows()]
+
+attributions = previous_name_contexts[previous_name_contexts["queryIndex"].map(num_records) == 1].join(
+    df_existing_names[["sciName", "commonNameSBM"]], on="queryIndex"
+)
+
+for contributor, items in attributions.sort_values("queryIndex").groupby("contributor", sort=False, dropna=False):
     print(f"Contributor '{contributor}'")
     name_mapping = dict()
-    for item in sorted(items, key=lambda x: x['date']):
-        print(f" - added '{item['previous_name']}' on {item['date'].strftime('%d/%m/%Y')}, should change to '{item['new_name']}' at https://www.inaturalist.org/taxa/{item['id']}")
-        if item['date'].replace(tzinfo=None) < datetime.datetime(2025, 11, 24):
-            name_mapping[item['previous_name']] = {"sciName": item["sciName"], "newCommonName": item['new_name']}
+    for _, item in items.sort_values("created", kind="stable").iterrows():
+        print(f" - added '{item['vernacularName']}' on {item['created'].strftime('%d/%m/%Y')}, should change to '{item['commonNameSBM']}' at https://www.inaturalist.org/taxa/{item['id']}{' (added since the November export)' if (item['id'], item['vernacularName']) in names_added_since_nov else ''}")
+        if item['created'].replace(tzinfo=None) < datetime.datetime(2025, 11, 24):
+            name_mapping[item['vernacularName']] = {"sciName": item["sciName"], "newCommonName": item['commonNameSBM']}
     print(name_mapping)
-
@@ -1,15 +1,24 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 
-df_all = pd.read_csv("VernacularNames-slovak-dec.csv")
-newly_affected_ids = df_all.iloc[13235:][df_all.iloc[13235:]["contributor"] == "Samo Sučík"]["id"]
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from diff_vernacular_name_exports import CHANGE_ADDED, diff_exports
+
+# the names added between the November and the December exports
+names_diff = diff_exports("VernacularNames-slovak-nov.csv", "VernacularNames-slovak-dec.csv")
+newly_added = names_diff[names_diff["change"] == CHANGE_ADDED]
+newly_affected_ids = newly_added[newly_added["contributor"] == "Samo Sučík"]["id"]
+names_added_by_id = newly_added.groupby("id")["vernacularName"].agg(list)
 
 
 print("DUPLICATES AMONG NEWLY ADDED NAMES")
 duplicates_among_newly_affected_ids = [(id, count) for id, count in newly_affected_ids.value_counts().to_dict().items() if count > 1]
 for (id, count) in duplicates_among_newly_affected_ids:
-    names_added = df_all.iloc[13235:][df_all.iloc[13235:]["id"] == id]["vernacularName"].values.tolist()
+    names_added = names_added_by_id[id]
     print(f"https://www.inaturalist.org/taxa/{id} ({count} names added: {names_added})")
 
-previously_affected_ids = df_all.iloc[:13235]["id"]
+previously_affected_ids = pd.read_csv("VernacularNames-slovak-nov.csv", usecols=["id"])["id"]
 overlapping_ids = set(newly_affected_ids.values.tolist()).intersection(previously_affected_ids.values.tolist())
 print(f"There are {len(overlapping_ids)} IDs for which someone added a common name previously and we also added a common name recently.")
@@ -1,43 +1,40 @@
 import re
+import sys
+from pathlib import Path
 
 import pandas as pd
-from pydantic import BaseModel
-
-
-class Taxon(BaseModel):
-    rank: str
-    family_scientific: str | None = None
-    family_common: str | None = None
-    genus_scientific: str | None = None
-    genus_common: str | None = None
-    genushybrid_scientific: str | None = None
-    genushybrid_common: str | None = None
-    section_scientific: str | None = None
-    section_common: str | None = None
-    species_scientific: str | None = None
-    species_common: str | None = None
-    hybrid_scientific: str | None = None
-    hybrid_common: str | None = None
-    subspecies_hybrid_scientific: str | None = None
-    subspecies_hybrid_common: str | None = None
-    subspecies_scientific: str | None = None
-    subspecies_common: str | None = None
-    group_scientific: str | None = None
-    group_common: str | None = None
-    variety_scientific: str | None = None
-    variety_common: str | None = None
-    form_scientific: str | None = None
-    form_common: str | None = None
-
-    scientific_synonyms_sbm: list[str] = []
-    slovak_synonyms_sbm: list[str] = []
-    is_taxon_questionable: bool = False
-
-    def add_slovak_synonym(self, syn):
-        self.slovak_synonyms_sbm.append(syn)
-
-    def add_scientific_synonym(self, syn):
-        self.scientific_synonyms_sbm.append(syn)
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from spreadsheet_cache import read_excel_sheets
+from taxon_extraction import TaxonTableBuilder, rank_columns
+
+RANKS = [
+    "family",
+    "genus",
+    "genushybrid",
+    "section",
+    "species",
+    "hybrid",
+    "subspecies_hybrid",
+    "subspecies",
+    "group",
+    "variety",
+    "form",
+]
+TAXON_SCHEMA = (
+    {"rank": str}
+    | {column: str for column in rank_columns(RANKS)}
+    | {
+        "scientific_synonyms_sbm": list,
+        "slovak_synonyms_sbm": list,
+        "is_taxon_questionable": bool,
+    }
+)
+TAXON_DEFAULTS = {
+    "scientific_synonyms_sbm": list,
+    "slovak_synonyms_sbm": list,
+    "is_taxon_questionable": bool,
+}
 
 
 def is_legit_inat_rank(rank):
@@ -80,21 +77,20 @@ def is_legit_inat_rank(rank):
     }
 
 
-def extract_species(df):
+def extract_species(df, taxa):
     sci_name_family_col = "vedecké meno čeľade"
     sci_name_col = "vedecké meno taxónu"
     sk_name_col = "platné slovenské meno taxónu"
     name_type_col = "Taxonomický status"
 
     current_genus_sk_name = None
-    taxa = []
     for _, row in df.iterrows():
 
         if pd.notna(row[name_type_col]) and "s" in row[name_type_col].lower():
             if pd.notna(row[sci_name_col]):
-                taxa[-1].add_scientific_synonym(row[sci_name_col])
+                taxa.last("scientific_synonyms_sbm").append(row[sci_name_col])
             if pd.notna(row[sk_name_col]) and row[sk_name_col].strip() != "–":
-                taxa[-1].add_slovak_synonym(row[sk_name_col])
+                taxa.last("slovak_synonyms_sbm").append(row[sk_name_col])
             continue
         elif pd.notna(row[name_type_col]) and row[name_type_col].lower() == "d?" and pd.notna(row[sk_name_col]) and row[sk_name_col].strip() != "–":
             print(f"---> UNCERTAIN TAXON {row[sk_name_col]} ({row[sci_name_col]})")
@@ -193,40 +189,31 @@ def extract_species(df):
             "is_taxon_questionable": pd.notna(row[name_type_col]) and "?" in row[name_type_col]
         }
 
-        taxa.append(Taxon(**taxon_attrs))
-
-    return taxa
+        taxa.append(**taxon_attrs)
 
 
-def extract_families(df):
+def extract_families(df, taxa):
     sci_name_col = "vedecké meno"
     sk_name_col = "slovenské meno"
 
-    taxa = []
-
     for _, row in df.iterrows():
         if pd.isna(row[sci_name_col]) or pd.isna(row[sk_name_col]):
             continue
         taxa.append(
-            Taxon(
-                rank="family",
-                family_scientific=row[sci_name_col],
-                family_common=row[sk_name_col],
-            )
+            rank="family",
+            family_scientific=row[sci_name_col],
+            family_common=row[sk_name_col],
         )
-    return taxa
 
 
 if __name__ == "__main__":
-    species_raw_data = pd.read_excel("sbm-november-2025.xlsx", sheet_name="druhy")
-    species_list = extract_species(species_raw_data)
+    taxa = TaxonTableBuilder(TAXON_SCHEMA, defaults=TAXON_DEFAULTS)
 
-    family_raw_data = pd.read_excel("sbm-november-2025.xlsx", sheet_name="čeľade")
-    family_list = extract_families(family_raw_data)
+    raw_data = read_excel_sheets("sbm-november-2025.xlsx", ["druhy", "čeľade"])
+    extract_species(raw_data["druhy"], taxa)
+    extract_families(raw_data["čeľade"], taxa)
 
-    taxon_df = pd.DataFrame(
-        [taxon.model_dump() for taxon in (species_list + family_list)]
-    )
+    taxon_df = taxa.build()
 
     taxon_df.to_csv("taxa.csv", index=False)
 
@@ -1,25 +1,28 @@
 import ast
+import sys
+from pathlib import Path
+
 import pandas as pd
 from tqdm import tqdm
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from taxon_table import TaxonTable
+
 take_inat_sci_name_from_file = True
 
 select_by_file_name = "taxa_manually_checked_synonyms"
 
-all_sbm_taxa = pd.read_csv("taxa.csv")
+all_sbm_taxa = TaxonTable.from_csv("taxa.csv")
 taxa_to_select = pd.read_csv(f"{select_by_file_name}.csv")
 
-def does_row_match(row, sci_name):
-    return sci_name == row[f"{row['rank']}_scientific"]
-
 def select_sbm_taxa(all_taxa, taxa_to_select):
     selected_rows = []
     for _, taxon_to_select in tqdm(taxa_to_select.iterrows(), total=len(taxa_to_select)):
-        rows = all_taxa[all_taxa.apply(lambda row: does_row_match(row, taxon_to_select["sciName"]), axis=1)]
+        rows = all_taxa.find_by_scientific_name(taxon_to_select["sciName"])
         if len(rows) != 1:
             print(f"Found {len(rows)} for {taxon_to_select["sciName"]}")
         else:
-            row_to_select = rows.iloc[0].to_dict()
+            row_to_select = all_taxa.to_records(rows)[0]
             if take_inat_sci_name_from_file:
                 row_to_select["synonyms"] = [taxon_to_select["iNatSciName"]]
             selected_rows.append(row_to_select)
@@ -1,25 +1,17 @@
-from copy import deepcopy
+import sys
 from enum import Enum
-import re
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from pydantic import BaseModel
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from spreadsheet_cache import read_excel_sheets
+from taxon_extraction import fill_hierarchy, rank_columns, validate_taxa
 
-class Taxon(BaseModel):
-    rank: str
-    order_scientific: str | None = None
-    order_common: str | None = None
-    family_scientific: str | None = None
-    family_common: str | None = None
-    subfamily_scientific: str | None = None
-    subfamily_common: str | None = None
-    genus_scientific: str | None = None
-    genus_common: str | None = None
-    species_scientific: str | None = None
-    species_common: str | None = None
-    # subspecies_scientific: str | None = None
-    # subspecies_common: str | None = None
+RANKS = ["order", "family", "subfamily", "genus", "species"]
+TAXON_SCHEMA = {"rank": str} | {column: str for column in rank_columns(RANKS)}
+SHEET_NAME = "Slovenské mená vtákov sveta"
 
 class Rank(Enum):
     ORDER = "ord."
@@ -54,114 +46,41 @@ def extract_species(df):
         "species": "Druh (Species)",
         "subspecies": "Poddruh (Subspecies)",
     }
-    
-    sk_name_col = "Slovenské meno (Slovak name)"
-
-    taxa = []
-
-    taxon = Taxon(rank="unknown")
-
-    for i, row in df.iterrows():
-        # if i > 10000:
-        #     break
-        rank = row[taxon_rank_col].strip()
-
-        if rank in [Rank.POTENTIAL_SPECIES.value, Rank.SUBSPECIES.value, Rank.SUBSPECIES_OTHER.value]:
-            continue
-        
-        rank_standardised = rank_map[rank]
-        taxon = deepcopy(taxon)
-        taxon.rank = rank_standardised
-        sci_name = row[sci_name_cols[rank_standardised]]
-        if pd.isna(sci_name):
-            print(f"missing sci. name for #{row[sequence_col]}")
-            continue
-        else:
-            sci_name = sci_name.strip()
-        sk_name = row[sk_name_col]
-        if rank == Rank.ORDER.value:
-            sk_name = sk_name.lower()
-            sci_name = sci_name.title()
-        # print(f"{sk_name} – {sci_name}")
-        
-        if rank in [Rank.ORDER.value, Rank.FAMILY.value, Rank.SUBFAMILY.value, Rank.GENUS.value]:
-            taxon.species_common = None
-            taxon.species_scientific = None
-        if rank in [Rank.ORDER.value, Rank.FAMILY.value, Rank.SUBFAMILY.value]:
-            taxon.genus_common = None
-            taxon.genus_scientific = None
-        if rank in [Rank.ORDER.value, Rank.FAMILY.value]:
-            taxon.subfamily_common = None
-            taxon.subfamily_scientific = None
-        if rank in [Rank.ORDER.value]:
-            taxon.family_common = None
-            taxon.family_scientific = None
-
-        setattr(taxon, f"{rank_standardised}_common", sk_name)
-        setattr(taxon, f"{rank_standardised}_scientific", sci_name)
-
-        taxa.append(taxon.model_dump())
-
-        continue
-        taxon_rank = "species"
-        sci_name = row[sci_name_col].strip()
-
-        if len(sci_name.split()) == 1:
-            taxon_rank = "genus"
 
-        if "sect." in sci_name:
-            taxon_rank = "section"
-
-        if "×" in sci_name:
-            taxon_rank = "hybrid" # TODO check all rank names
-
-        if "nothosubsp." in sci_name:
-            sci_name = re.sub(r"\s*nothosubsp\.\s*", " ", sci_name)
-            taxon_rank = "subspecies hybrid"
-        
-        if "subsp." in sci_name:
-            sci_name = re.sub(r"\s*subsp\.\s*", " ", sci_name)
-            taxon_rank = "subspecies"
-
-        if "var." in sci_name:
-            sci_name = re.sub(r"\s*var\.\s*", " ", sci_name)
-            taxon_rank = "variety"
-        
-        if "f." in sci_name:
-            sci_name = re.sub(r"\s*f\.\s*", " ", sci_name)
-            taxon_rank = "form"
-
-        sk_name = row[sk_name_col].strip()
-
-        # remove pronunciation information (anything in square brackets)
-        if "[" in sk_name or "]" in sk_name:
-            # remove anything even in cases where the opening or closing bracket is of the opposite type
-            sk_name_edited = re.sub(r"[ ]?[\[\]].*[\[\]][ ]?", " ", sk_name).strip()
-            # print(f"Slovak name contains pronunciation marker: '{sk_name}'. Removing it: '{sk_name_edited}'")
-            sk_name = sk_name_edited
-        
-        # remove alternative names (anything in parentheses)
-        if "(" in sk_name:
-            sk_name_edited = re.sub(r"[ ]?\([^(]+\)[ ]?", " ", sk_name).strip()
-            print(f"Slovak name contains alternative name(s): '{sk_name}'. Removing it: '{sk_name_edited}'")
-            sk_name = sk_name_edited
+    sk_name_col = "Slovenské meno (Slovak name)"
 
-        taxa.append(
-            Taxon(
-                rank=taxon_rank,
-                family_scientific=row[sci_name_family_col].strip() if pd.notna(row[sci_name_family_col]) else None,
-                species_scientific=sci_name,
-                species_common=sk_name,
-            )
-        )
+    codes = df[taxon_rank_col].str.strip()
+    df = df[~codes.isin([Rank.POTENTIAL_SPECIES.value, Rank.SUBSPECIES.value, Rank.SUBSPECIES_OTHER.value])]
+    ranks = codes[df.index].map(rank_map)
+    if ranks.isna().any():
+        raise KeyError(f"Unknown rank codes: {', '.join(codes[df.index][ranks.isna()].unique())}")
 
+    # each taxon's name is in the column of its rank
+    sci_names = pd.Series(
+        np.select([ranks == rank for rank in RANKS], [df[sci_name_cols[rank]] for rank in RANKS], None),
+        index=df.index,
+    )
+    is_missing = sci_names.isna()
+    for sequence in df.loc[is_missing, sequence_col]:
+        print(f"missing sci. name for #{sequence}")
+    df, ranks, sci_names = df[~is_missing], ranks[~is_missing], sci_names[~is_missing].str.strip()
+
+    sk_names = df[sk_name_col]
+    is_order = ranks == "order"
+    sk_names = sk_names.where(~is_order, sk_names.str.lower())
+    sci_names = sci_names.where(~is_order, sci_names.str.title())
+
+    taxa = pd.DataFrame({"rank": ranks}, columns=list(TAXON_SCHEMA))
+    for rank in RANKS:
+        taxa[f"{rank}_scientific"] = sci_names.where(ranks == rank)
+        taxa[f"{rank}_common"] = sk_names.where(ranks == rank)
+    taxa = fill_hierarchy(taxa, RANKS)
+    validate_taxa(taxa, TAXON_SCHEMA)
     return taxa
 
 if __name__ == "__main__":
-    species_raw_data = pd.read_excel("SMVS_13_aug_2020.xlsx", sheet_name="Slovenské mená vtákov sveta")
-    species_list = extract_species(species_raw_data)
-
-    taxon_df = pd.DataFrame(species_list)
+    species_raw_data = read_excel_sheets("SMVS_13_aug_2020.xlsx", [SHEET_NAME])[SHEET_NAME]
+    taxon_df = extract_species(species_raw_data)
 
     taxon_df.to_csv("taxa.csv", index=False)
 
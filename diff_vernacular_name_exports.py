@@ -0,0 +1,163 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from inat_taxonomy import DEFAULT_CHUNK_SIZE, DwcaArchive
+
+CHANGE_ADDED = "added"
+CHANGE_REMOVED = "removed"
+CHANGE_RECASED = "re-cased"
+CHANGE_CONTRIBUTOR = "contributor changed"
+
+COLUMNS = ["id", "vernacularName", "contributor", "created"]
+
+
+def read_export_chunks(path, language="slovak", chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Streams the common names of a monthly export: either a `VernacularNames-<language>.csv` copied
+    out of it or the (zipped or extracted) DwC-A itself.
+    """
+    path = Path(path)
+    if path.suffix == ".csv":
+        yield from pd.read_csv(path, usecols=COLUMNS, chunksize=chunksize)
+        return
+    archive = DwcaArchive(path)
+    try:
+        yield from archive.read_csv_chunks(
+            f"VernacularNames-{language}.csv", chunksize, usecols=COLUMNS
+        )
+    finally:
+        # also when the consumer stops early (or raises), i.e. the generator gets closed
+        archive.close()
+
+
+def hash_names(chunk):
+    """
+    Hashes each name's key (taxon ID and case-folded name), the exact name and the contributor
+    into 64-bit integers, so that whole exports can be compared without keeping their strings around.
+    """
+    names = chunk["vernacularName"].fillna("").astype(str)
+    return (
+        pd.util.hash_pandas_object(
+            pd.DataFrame({"id": chunk["id"], "key": names.str.casefold()}),
+            index=False,
+        ).to_numpy(),
+        pd.util.hash_pandas_object(names, index=False).to_numpy(),
+        pd.util.hash_pandas_object(
+            chunk["contributor"].fillna("").astype(str), index=False
+        ).to_numpy(),
+    )
+
+
+def diff_exports(old_path, new_path, language="slovak", chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Compares two exports keyed on (taxon ID, case-insensitive common name), returning one row per
+    added, removed or re-cased name and per name whose contributor changed.
+
+    Both exports are streamed in chunks. Only the hashes of the old export are kept in memory,
+    and it's read a second time to fetch the previous values of the changed names.
+    """
+    old_hashes = [
+        hash_names(chunk) for chunk in read_export_chunks(old_path, language, chunksize)
+    ]
+    old_keys, old_names, old_contributors = (
+        np.concatenate([hashes[i] for hashes in old_hashes]) for i in range(3)
+    )
+    # sorted for binary search, the first of the names sharing a key (if any) standing for all of them
+    old_keys, first_rows = np.unique(old_keys, return_index=True)
+    old_names, old_contributors = old_names[first_rows], old_contributors[first_rows]
+    old_matched = np.zeros(len(old_keys), dtype=bool)
+
+    changes = []
+    for chunk in read_export_chunks(new_path, language, chunksize):
+        keys, names, contributors = hash_names(chunk)
+        positions = np.minimum(old_keys.searchsorted(keys), max(len(old_keys) - 1, 0))
+        found = (
+            old_keys[positions] == keys if len(old_keys) else np.zeros(len(keys), bool)
+        )
+        old_matched[positions[found]] = True
+        change = np.select(
+            [
+                ~found,
+                names != old_names[positions],
+                contributors != old_contributors[positions],
+            ],
+            [CHANGE_ADDED, CHANGE_RECASED, CHANGE_CONTRIBUTOR],
+            "",
+        )
+        is_changed = change != ""
+        changes.append(
+            chunk[is_changed].assign(change=change[is_changed], key=keys[is_changed])
+        )
+    changes = pd.concat(changes, ignore_index=True)
+
+    # the second pass over the old export: the removed names and the previous values of the changed ones
+    wanted_keys = np.union1d(
+        old_keys[~old_matched], changes.loc[changes["change"] != CHANGE_ADDED, "key"]
+    )
+    previous = []
+    for chunk in read_export_chunks(old_path, language, chunksize):
+        keys = hash_names(chunk)[0]
+        is_wanted = np.isin(keys, wanted_keys)
+        previous.append(chunk[is_wanted].assign(key=keys[is_wanted]))
+    previous = pd.concat(previous, ignore_index=True).drop_duplicates("key")
+
+    removed = previous[~previous["key"].isin(changes["key"])].assign(
+        change=CHANGE_REMOVED
+    )
+    changes = changes.merge(
+        previous[["key", "vernacularName", "contributor"]].rename(
+            columns={
+                "vernacularName": "previousVernacularName",
+                "contributor": "previousContributor",
+            }
+        ),
+        on="key",
+        how="left",
+    )
+    removed = removed.rename(
+        columns={
+            "vernacularName": "previousVernacularName",
+            "contributor": "previousContributor",
+        }
+    )
+    return pd.concat([changes, removed], ignore_index=True)[
+        [
+            "change",
+            "id",
+            "vernacularName",
+            "previousVernacularName",
+            "contributor",
+            "previousContributor",
+            "created",
+        ]
+    ]
+
+
+def main(old_path, new_path, language="slovak", output_path=None):
+    diff_df = diff_exports(old_path, new_path, language)
+    print(diff_df["change"].value_counts().to_string())
+    if output_path:
+        diff_df.to_csv(output_path, index=False)
+        print(f"Saved the differences to {output_path}")
+    return diff_df
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "old",
+        help="the older export, a VernacularNames-<language>.csv or the DwC-A (zipped or extracted)",
+    )
+    arg_parser.add_argument("new", help="the newer export")
+    arg_parser.add_argument(
+        "--language",
+        default="slovak",
+        help="the language to compare when given the DwC-A exports",
+    )
+    arg_parser.add_argument("--output", help="save the differences as a CSV")
+    args = arg_parser.parse_args()
+
+    main(args.old, args.new, args.language, args.output)
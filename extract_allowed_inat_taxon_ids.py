@@ -1,43 +1,133 @@
 from pathlib import Path
+import json
 import pandas as pd
 import argparse
+import sys
 
-# add a function here to support another data source
-filter_functions = {
-    "slovenske-mena-hmyzu-1975": lambda taxon: taxon["class"] == "Entognatha"
-    or taxon["class"] == "Insecta",
-    "checklist-of-lepidoptera-recorded-in-Slovakia-2022": lambda taxon: taxon["order"]
-    == "Lepidoptera",
-    "slovenske-botanicke-menoslovie-2024": lambda taxon: taxon["phylum"] == "Tracheophyta",
-    "slovenske-mena-vtakov-sveta-2020": lambda taxon: taxon["class"] == "Aves"
+from inat_taxonomy import load_inat_taxa
+from taxon_tree import TaxonTree
+
+DESCENDANTS_OF = "descendantsOf"
+
+# add a filter here to support another data source. a filter is either
+# - a dict mapping columns of all_inat_taxa.csv to the allowed value (or list of values), where the
+#   special key "descendantsOf" allows the given iNat taxon ID(s) and everything below them in the tree
+#   (e.g. {"descendantsOf": 47604} for a family that has no column of its own), or
+# - a function taking a taxon (a row of all_inat_taxa.csv) and returning True/False (much slower)
+taxon_filters = {
+    "slovenske-mena-hmyzu-1975": {"class": ["Entognatha", "Insecta"]},
+    "checklist-of-lepidoptera-recorded-in-Slovakia-2022": {"order": "Lepidoptera"},
+    "slovenske-botanicke-menoslovie-2024": {"phylum": "Tracheophyta"},
+    "slovenske-mena-vtakov-sveta-2020": {"class": "Aves"},
 }
 
 
-def main(data_source_name):
-    if data_source_name not in filter_functions:
+def get_filter_columns(taxon_filter):
+    """Returns the columns of all_inat_taxa.csv the filter needs (None meaning all of them)."""
+    if callable(taxon_filter):
+        return None
+    columns = ["id"]
+    for column in taxon_filter:
+        columns += ["parentNameUsageID"] if column == DESCENDANTS_OF else [column]
+    return columns
+
+
+def get_filter_mask(df, taxon_filter, tree=None):
+    """
+    Evaluates the filter over all taxa at once, returning a boolean mask. A `TaxonTree` of `df`
+    can be passed in when evaluating several filters so that it's only built once.
+    """
+    if callable(taxon_filter):
+        return df.apply(taxon_filter, axis=1)
+
+    mask = pd.Series(True, index=df.index)
+    for column, allowed_values in taxon_filter.items():
+        if not isinstance(allowed_values, list):
+            allowed_values = [allowed_values]
+        if column == DESCENDANTS_OF:
+            tree = tree or TaxonTree.from_taxa(df)
+            mask &= tree.descendant_mask(df["id"], allowed_values)
+        else:
+            mask &= df[column].isin(allowed_values)
+    return mask
+
+
+def get_all_filter_columns(filters):
+    """Returns the union of the columns the filters need (None meaning all of them)."""
+    columns = []
+    for taxon_filter in filters:
+        filter_columns = get_filter_columns(taxon_filter)
+        if filter_columns is None:
+            return None
+        columns += [column for column in filter_columns if column not in columns]
+    return columns
+
+
+def load_allowed_ids(data_source_name):
+    """Returns the allowed iNat taxon IDs extracted for the data source, or None if it doesn't have any."""
+    data_source_dir = Path("data-sources") / data_source_name
+    if (data_source_dir / "allowed_inat_taxon_ids.csv").exists():
+        return pd.read_csv(data_source_dir / "allowed_inat_taxon_ids.csv")["id"].tolist()
+    if (data_source_dir / "allowed_inat_taxon_ids.json").exists():
+        return json.loads((data_source_dir / "allowed_inat_taxon_ids.json").read_text())
+    return None
+
+
+def main(data_source_names, inat_taxonomy_path=None, all_data_sources=False):
+    """
+    Writes the allowed iNat taxon IDs of each of the given data sources (or of all of those with a
+    filter). The taxonomy is loaded just once, no matter how many data sources there are.
+    """
+    if all_data_sources:
+        data_source_names = list(taxon_filters)
+    # nothing gets written unless all the data sources have a filter
+    unknown_names = [name for name in data_source_names if name not in taxon_filters]
+    if unknown_names:
         print(
-            f"Looks like you haven't defined a filter function for the data source '{data_source_name}'. "
+            f"Looks like you haven't defined a filter for the data source(s) {', '.join(unknown_names)}. "
             f"Define it right in this script, then run the script."
         )
-        return
-    filter_func = filter_functions[data_source_name]
+        sys.exit(1)
+    filters = [taxon_filters[name] for name in data_source_names]
 
-    df_all = pd.read_csv("all_inat_taxa.csv")
+    df_all = load_inat_taxa(get_all_filter_columns(filters), inat_taxonomy_path)
+    tree = None
+    if any(not callable(f) and DESCENDANTS_OF in f for f in filters):
+        tree = TaxonTree.from_taxa(df_all)
 
-    allowed_ids_df = df_all[df_all.apply(filter_func, axis=1)][["id"]]
-    allowed_ids_df.to_csv(
-        Path("data-sources") / data_source_name / "allowed_inat_taxon_ids.csv",
-        index=False,
-    )
-    allowed_ids_df["id"].to_json(
-        Path("data-sources") / data_source_name / "allowed_inat_taxon_ids.json",
-        orient='values'
-    )
+    for data_source_name, taxon_filter in zip(data_source_names, filters):
+        allowed_ids_df = df_all[get_filter_mask(df_all, taxon_filter, tree)][["id"]]
+        allowed_ids_df.to_csv(
+            Path("data-sources") / data_source_name / "allowed_inat_taxon_ids.csv",
+            index=False,
+        )
+        allowed_ids_df["id"].to_json(
+            Path("data-sources") / data_source_name / "allowed_inat_taxon_ids.json",
+            orient='values'
+        )
+        print(f"{data_source_name}: {len(allowed_ids_df)} allowed taxa")
+        if allowed_ids_df.empty:
+            print(
+                f"Warning: the filter of {data_source_name} doesn't match any taxon, "
+                f"prepare_dataset_for_chrome_extension.py won't accept an empty list of allowed taxa."
+            )
 
 
 if __name__ == "__main__":
     arg_parser = argparse.ArgumentParser()
-    arg_parser.add_argument("data_source")
+    arg_parser.add_argument("data_sources", nargs="*")
+    arg_parser.add_argument(
+        "--all",
+        action="store_true",
+        help="extract the allowed taxa of all the data sources with a filter defined in taxon_filters",
+    )
+    arg_parser.add_argument(
+        "--inat-taxonomy",
+        help="all_inat_taxa.csv or the iNat taxonomy export (inaturalist-taxonomy.dwca.zip, zipped or extracted), "
+        "defaults to all_inat_taxa.csv if it exists, the export otherwise",
+    )
     args = arg_parser.parse_args()
+    if not args.all and not args.data_sources:
+        arg_parser.error("pass the data source(s) or --all")
 
-    main(args.data_source)
+    main(args.data_sources, args.inat_taxonomy, args.all)
@@ -1,34 +1,236 @@
+import argparse
+import re
+import time
+
 import pandas as pd
-from extract_allowed_inat_taxon_ids import filter_functions
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from extract_allowed_inat_taxon_ids import (
+    get_filter_columns,
+    get_filter_mask,
+    taxon_filters,
+)
+from inat_taxonomy import DwcaArchive, INAT_DWCA_PATH, load_inat_taxa
+
+VERNACULAR_NAMES_PATTERN = re.compile(r"VernacularNames-(.+)\.csv")
+
+# languages whose common names are written in lower case (except for proper nouns)
+LOWER_CASE_LANGUAGES = ["slovak", "czech"]
+# the lower-case letters of the languages we know the alphabet of
+LANGUAGE_ALPHABETS = {
+    "slovak": "a-záäčďéíĺľňóôŕšťúýž",
+    "czech": "a-záčďéěíňóřšťúůýž",
+}
+BRACKETS = "()[]{}"
+QUOTES = "\"'„“”‚‘’«»`´"
+# the patterns are RE2 patterns (see contains_pattern), whose \w, \b and \s only know ASCII, hence the
+# word boundaries spelled out using \pL (any letter), e.g. the č of "vinič" mustn't end a word
+# suffixes of family-group names and orders (e.g. Ranunculaceae, Apidae, Rosales aren't vernacular),
+# not the -ini of tribes or the -ptera of insect orders, which plenty of vernacular names end in too
+LATIN_PATTERN = (
+    r"(?i)(?:^|[^\pL])\pL+(?:aceae|idae|inae|oideae|ales)(?:[^\pL]|$)"
+    r"|(?:^|[^\pL])spp?\.(?:\s|$)"
+)
+WHITESPACE_PATTERN = r"\s{2,}|^\s|\s$|[\t\x{a0}\x{2009}\x{202f}]"
+COMBINING_DIACRITICS_PATTERN = r"[\x{300}-\x{36f}]"
+
+# a rule gets the common names (a string Series) along with the language they are in and returns
+# a boolean mask of the problematic ones. add a rule by decorating a function with @lint_rule("name")
+LINT_RULES = {}
+
+
+def lint_rule(name):
+    def register(rule):
+        LINT_RULES[name] = rule
+        return rule
+
+    return register
+
+
+def no_problems(names):
+    return pd.Series(False, index=names.index)
+
+
+def contains_pattern(names, pattern):
+    """Matches the RE2 pattern against the (Arrow-backed) names, without a round trip through Python strings."""
+    return pd.Series(
+        pc.match_substring_regex(pa.array(names), pattern).to_numpy(
+            zero_copy_only=False
+        ),
+        index=names.index,
+    )
+
+
+@lint_rule("capitalization")
+def starts_with_upper_case(names, language):
+    if language not in LOWER_CASE_LANGUAGES:
+        return no_problems(names)
+    return names.str.slice(0, 1).str.isupper()
+
+
+@lint_rule("brackets")
+def contains_brackets(names, language):
+    return contains_pattern(names, f"[{re.escape(BRACKETS)}]")
 
-def is_common_name_problematic(common_name):
-    return common_name[0].isupper() or "(" in common_name or ")" in common_name
 
-def main():
-    all_inat_common_names_df = pd.read_csv("VernacularNames-slovak.csv")
-    all_inat_taxa_df = pd.read_csv("all_inat_taxa.csv")
+@lint_rule("whitespace")
+def contains_extra_whitespace(names, language):
+    return contains_pattern(names, WHITESPACE_PATTERN)
 
-    data_source_name = "slovenske-botanicke-menoslovie-2024"
-    filter_func = filter_functions[data_source_name]
-    relevant_inat_ids = all_inat_taxa_df[all_inat_taxa_df.apply(filter_func, axis=1)][["id"]].values
 
-    problematic_taxa_by_contributor = {}
+@lint_rule("quotes")
+def contains_quotes(names, language):
+    return contains_pattern(names, f"[{re.escape(QUOTES)}]")
 
-    for _, row in all_inat_common_names_df.iterrows():
-        if is_common_name_problematic(row["vernacularName"]): # and row["id"] in relevant_inat_ids:
-            contributor = row["contributor"]
-            if contributor not in problematic_taxa_by_contributor:
-                problematic_taxa_by_contributor[contributor] = []
-            problematic_taxa_by_contributor[contributor].append({
-                "name": row["vernacularName"],
-                "url": f"https://www.inaturalist.org/taxon_names/{row['id']}/edit"
-            })
-    
-    for contributor, problematic_taxa in problematic_taxa_by_contributor.items():
-        print(f"\n{contributor}:")
-        [print(f" - [{taxon['name']}]({taxon["url"]})") for taxon in problematic_taxa]
 
+@lint_rule("latin")
+def looks_latin(names, language):
+    return contains_pattern(names, LATIN_PATTERN)
+
+
+@lint_rule("diacritics")
+def has_diacritic_anomalies(names, language):
+    """
+    Flags combining diacritical marks (a letter and its accent stored separately) and letters
+    that aren't part of the language's alphabet, e.g. the Czech ř in a Slovak name.
+    """
+    problematic = contains_pattern(names, COMBINING_DIACRITICS_PATTERN)
+    if language in LANGUAGE_ALPHABETS:
+        # a letter (\pL) that isn't in the alphabet
+        foreign_letter = rf"[^{LANGUAGE_ALPHABETS[language]}\PL]"
+        problematic |= contains_pattern(names.str.lower(), foreign_letter)
+    return problematic
+
+
+def get_languages(inat_taxonomy_export):
+    return [
+        match.group(1)
+        for member in inat_taxonomy_export.members
+        if (match := VERNACULAR_NAMES_PATTERN.fullmatch(member))
+    ]
+
+
+def load_relevant_ids(data_source_name, inat_taxonomy_path):
+    """The iNat taxon IDs matching the data source's filter (see extract_allowed_inat_taxon_ids.py)."""
+    taxon_filter = taxon_filters[data_source_name]
+    all_inat_taxa_df = load_inat_taxa(
+        get_filter_columns(taxon_filter), inat_taxonomy_path
+    )
+    return all_inat_taxa_df.loc[get_filter_mask(all_inat_taxa_df, taxon_filter), ["id"]]
+
+
+def lint_common_names(common_names_df, language, rules):
+    """
+    Runs the rules over all the common names at once, returning the problematic names with the
+    (comma-separated) names of the rules they break.
+    """
+    names = common_names_df["vernacularName"].astype(pd.ArrowDtype(pa.string()))
+    flags = pd.DataFrame(
+        {rule_name: LINT_RULES[rule_name](names, language) for rule_name in rules}
+    ).fillna(False)
+    is_problematic = flags.any(axis=1)
+    problematic_df = common_names_df[is_problematic].copy()
+    problematic_df["language"] = language
+    problematic_df["rules"] = (
+        flags[is_problematic].astype(bool).dot(pd.Index(rules) + ", ").str[:-2]
+    )
+    return problematic_df
+
+
+def main(
+    inat_taxonomy_path=INAT_DWCA_PATH,
+    languages=("slovak",),
+    rules=None,
+    data_source_name=None,
+):
+    rules = rules or list(LINT_RULES)
+    start_time = time.time()
+    inat_taxonomy_export = DwcaArchive(inat_taxonomy_path)
+    if not languages:
+        languages = get_languages(inat_taxonomy_export)
+
+    problematic_dfs = []
+    for language in languages:
+        common_names_df = inat_taxonomy_export.read_csv(
+            f"VernacularNames-{language}.csv",
+            usecols=["id", "vernacularName", "contributor"],
+            dtype={"vernacularName": str, "contributor": str},
+        )
+        problematic_dfs.append(
+            lint_common_names(
+                common_names_df[common_names_df["vernacularName"].notna()],
+                language,
+                rules,
+            )
+        )
+    inat_taxonomy_export.close()
+    problematic_df = pd.concat(problematic_dfs, ignore_index=True)
+
+    if data_source_name:
+        # only the taxa relevant to the data source, the taxonomy is only loaded for this
+        relevant_ids = load_relevant_ids(data_source_name, inat_taxonomy_path)
+        problematic_df = problematic_df.merge(relevant_ids, on="id")
+
+    problematic_df["contributor"] = problematic_df["contributor"].fillna("(unknown)")
+    problematic_df["line"] = (
+        " - ["
+        + problematic_df["vernacularName"]
+        + "](https://www.inaturalist.org/taxon_names/"
+        + problematic_df["id"].astype(str)
+        + "/edit) "
+        + problematic_df["rules"]
+    )
+    for (language, contributor), lines in problematic_df.groupby(
+        ["language", "contributor"]
+    )["line"]:
+        print(f"\n{contributor} ({language}):")
+        print("\n".join(lines))
+
+    print("\nProblematic common names by rule:")
+    print(
+        problematic_df.assign(rule=problematic_df["rules"].str.split(", "))
+        .explode("rule")
+        .groupby(["language", "rule"])
+        .size()
+        .unstack(fill_value=0)
+        .to_string()
+    )
+    print(f"Done in {time.time() - start_time:.1f}s.")
 
 
 if __name__ == "__main__":
-    main()
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "inat_taxonomy",
+        nargs="?",
+        default=INAT_DWCA_PATH,
+        help="the iNat taxonomy export (inaturalist-taxonomy.dwca.zip), zipped or extracted",
+    )
+    arg_parser.add_argument(
+        "--languages",
+        nargs="+",
+        default=["slovak"],
+        help="the languages of the VernacularNames-<language>.csv files to lint",
+    )
+    arg_parser.add_argument(
+        "--all-languages",
+        action="store_true",
+        help="lint the common names in all the languages of the export",
+    )
+    arg_parser.add_argument(
+        "--rules", nargs="+", choices=list(LINT_RULES), help="defaults to all rules"
+    )
+    arg_parser.add_argument(
+        "--data-source",
+        choices=list(taxon_filters),
+        help="only report the taxa relevant to the data source",
+    )
+    args = arg_parser.parse_args()
+
+    main(
+        args.inat_taxonomy,
+        None if args.all_languages else args.languages,
+        args.rules,
+        args.data_source,
+    )
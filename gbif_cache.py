@@ -0,0 +1,194 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from pygbif import species as gbif_species
+
+from gbif_client import GBIF_API_URL
+
+DEFAULT_CACHE_PATH = Path(".cache") / "gbif_name_backbone.sqlite"
+DEFAULT_TTL_DAYS = 180
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+class GbifNameBackboneCache:
+    """
+    A persistent (SQLite) cache of GBIF `name_backbone` responses.
+
+    Entries are keyed by the arguments of the `name_backbone` call along with the `api_url` of the
+    GBIF API the responses come from, so that the responses of e.g. a local stand-in of the API
+    never get mixed up with those of GBIF itself. They expire after
+    `ttl_days` and the least recently used ones get evicted once there are more than
+    `max_entries` of them. Passing a `backbone_version` different from the one the cache
+    was filled with (e.g. after GBIF publishes a new backbone) empties the cache.
+    Cache misses are fetched using `fetch`, which defaults to `pygbif.species.name_backbone`.
+    """
+
+    def __init__(
+        self,
+        path=DEFAULT_CACHE_PATH,
+        ttl_days=DEFAULT_TTL_DAYS,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        backbone_version=None,
+        fetch=gbif_species.name_backbone,
+        api_url=GBIF_API_URL,
+    ):
+        self.path = Path(path)
+        self.fetch = fetch
+        self.api_url = api_url if api_url.endswith("/") else f"{api_url}/"
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._drop_outdated_table()
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS name_backbone (
+                api_url TEXT NOT NULL,
+                name TEXT NOT NULL,
+                rank TEXT NOT NULL,
+                clazz TEXT NOT NULL,
+                strict INTEGER NOT NULL,
+                verbose INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                PRIMARY KEY (api_url, name, rank, clazz, strict, verbose)
+            );
+            CREATE INDEX IF NOT EXISTS name_backbone_last_accessed
+                ON name_backbone (last_accessed);
+            CREATE TABLE IF NOT EXISTS metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            """)
+
+        if backbone_version is not None:
+            cached_version = self._get_metadata("backbone_version")
+            if cached_version != backbone_version:
+                if cached_version is not None:
+                    print(
+                        f"GBIF backbone version changed ({cached_version} -> {backbone_version}), clearing the cache in {self.path}."
+                    )
+                self.invalidate()
+                self._set_metadata("backbone_version", backbone_version)
+
+        self._delete_expired()
+
+    def _drop_outdated_table(self):
+        """Caches filled before the responses were keyed by the API URL can't tell where they come from."""
+        columns = [
+            row[1]
+            for row in self._connection.execute("PRAGMA table_info(name_backbone)")
+        ]
+        if columns and "api_url" not in columns:
+            print(
+                f"The cache in {self.path} doesn't record which GBIF API its responses come from, clearing it."
+            )
+            with self._connection:
+                self._connection.execute("DROP TABLE name_backbone")
+
+    def _get_metadata(self, key):
+        row = self._connection.execute(
+            "SELECT value FROM metadata WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_metadata(self, key, value):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+
+    def _delete_expired(self):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM name_backbone WHERE created < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+
+    def _evict_least_recently_used(self):
+        (num_entries,) = self._connection.execute(
+            "SELECT COUNT(*) FROM name_backbone"
+        ).fetchone()
+        if num_entries <= self.max_entries:
+            return
+        self._connection.execute(
+            """
+            DELETE FROM name_backbone WHERE rowid IN (
+                SELECT rowid FROM name_backbone ORDER BY last_accessed LIMIT ?
+            )
+            """,
+            (num_entries - self.max_entries,),
+        )
+
+    def _make_key(self, name, rank, clazz, strict, verbose):
+        return (
+            self.api_url,
+            name,
+            rank or "",
+            clazz or "",
+            int(bool(strict)),
+            int(bool(verbose)),
+        )
+
+    def get(self, name, rank=None, clazz=None, strict=False, verbose=False):
+        key = self._make_key(name, rank, clazz, strict, verbose)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                """
+                SELECT response, created FROM name_backbone
+                WHERE api_url = ? AND name = ? AND rank = ? AND clazz = ? AND strict = ? AND verbose = ?
+                """,
+                key,
+            ).fetchone()
+            if row is None or row[1] < now - self.ttl_seconds:
+                return None
+            self._connection.execute(
+                """
+                UPDATE name_backbone SET last_accessed = ?
+                WHERE api_url = ? AND name = ? AND rank = ? AND clazz = ? AND strict = ? AND verbose = ?
+                """,
+                (now, *key),
+            )
+        return json.loads(row[0])
+
+    def put(self, response, name, rank=None, clazz=None, strict=False, verbose=False):
+        key = self._make_key(name, rank, clazz, strict, verbose)
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO name_backbone VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, json.dumps(response), now, now),
+            )
+            self._evict_least_recently_used()
+
+    def name_backbone(self, name, rank=None, clazz=None, strict=False, verbose=False):
+        """A drop-in replacement for `pygbif.species.name_backbone` that uses the cache."""
+        response = self.get(name, rank, clazz, strict, verbose)
+        if response is not None:
+            with self._lock:
+                self.hits += 1
+            return response
+
+        with self._lock:
+            self.misses += 1
+        response = self.fetch(
+            name=name, rank=rank, clazz=clazz, strict=strict, verbose=verbose
+        )
+        self.put(response, name, rank, clazz, strict, verbose)
+        return response
+
+    def invalidate(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM name_backbone")
+
+    def close(self):
+        self._connection.close()
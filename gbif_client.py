@@ -0,0 +1,108 @@
+import threading
+import time
+
+import requests
+
+GBIF_API_URL = "https://api.gbif.org/v1/"
+DEFAULT_MAX_REQUESTS_PER_SECOND = 10
+DEFAULT_MAX_RETRIES = 5
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Lets through at most `rate` calls per second on average, with bursts of up to `capacity` calls."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last_refill) * self.rate
+                )
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class GbifClient:
+    """
+    A thread-safe, rate-limited client for the GBIF species API that retries with
+    exponential backoff on HTTP 429/5xx responses and connection errors.
+
+    `name_backbone` mirrors `pygbif.species.name_backbone`, so the two can be used interchangeably.
+    """
+
+    def __init__(
+        self,
+        base_url=GBIF_API_URL,
+        max_requests_per_second=DEFAULT_MAX_REQUESTS_PER_SECOND,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_seconds=1.0,
+        timeout_seconds=30,
+    ):
+        self.base_url = base_url if base_url.endswith("/") else f"{base_url}/"
+        self.rate_limiter = TokenBucket(max_requests_per_second)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self._session = requests.Session()
+
+    def _get(self, path, params):
+        url = self.base_url + path
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = self._session.get(
+                    url, params=params, timeout=self.timeout_seconds
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * 2**attempt
+                print(f"GBIF request failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if (
+                response.status_code in RETRYABLE_STATUS_CODES
+                and attempt < self.max_retries
+            ):
+                retry_after = response.headers.get("Retry-After")
+                delay = (
+                    float(retry_after)
+                    if retry_after and retry_after.isdigit()
+                    else self.backoff_seconds * 2**attempt
+                )
+                print(
+                    f"GBIF responded with HTTP {response.status_code}, retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            return response.json()
+
+    def name_backbone(
+        self, name, rank=None, clazz=None, strict=False, verbose=False, limit=100
+    ):
+        return self._get(
+            "species/match",
+            {
+                "name": name,
+                "rank": rank,
+                "class": clazz,
+                "strict": str(bool(strict)).lower(),
+                "verbose": str(bool(verbose)).lower(),
+                "limit": limit,
+            },
+        )
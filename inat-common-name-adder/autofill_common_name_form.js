@@ -2,7 +2,10 @@ function sleep(ms) {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
 
-const DATA_KEY = "inat-common-name-data";
+// the data of each taxon are stored under a key of their own, so that several forms can be open at once
+const DATA_KEY = `inat-common-name-data-${
+  window.location.pathname.match(/\/taxa\/(\d+)/)?.[1]
+}`;
 
 function createNote(scientificName) {
   var note = null;
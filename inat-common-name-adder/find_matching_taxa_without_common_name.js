@@ -1,7 +1,156 @@
+// how many common-name-adding forms can be open (waiting to be saved and closed) at the same time
+const MAX_OPEN_FORM_TABS = 3;
+// a ceiling on the searches and form openings we send iNat's way, so that we stay polite
+const MAX_REQUESTS_PER_MINUTE = 40;
+const SEARCH_RESULTS_TIMEOUT_MS = 3000;
+const CLEAR_SEARCH_TIMEOUT_MS = 500;
+const PAGE_READY_TIMEOUT_MS = 10000;
+const FORM_TAB_CHECK_INTERVAL_MS = 1000;
+const LOG_TIMINGS_EVERY_N_TAXA = 50;
+
+const DATA_KEY_PREFIX = "inat-common-name-data";
+// extension storage keys of the current run and of the results of its taxa
+const RUN_KEY = "run";
+const RESULT_KEY_PREFIX = "result|";
+const RESULTS_FILE_NAME = "inat-common-name-adder-results.jsonl";
+const TAXA_BUNDLE_FILE_NAME = "taxa.bundle";
+
 function sleep(ms) {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
 
+// resolves with the first truthy value returned by `condition` (re-checked whenever the page changes),
+// or with null once the timeout passes
+function waitFor(condition, timeoutMs) {
+  return new Promise((resolve) => {
+    const value = condition();
+    if (value) {
+      resolve(value);
+      return;
+    }
+    const observer = new MutationObserver(() => {
+      const value = condition();
+      if (value) {
+        finish(value);
+      }
+    });
+    const timeout = setTimeout(() => finish(null), timeoutMs);
+    function finish(value) {
+      observer.disconnect();
+      clearTimeout(timeout);
+      resolve(value);
+    }
+    observer.observe(document.body, {
+      childList: true,
+      subtree: true,
+      attributes: true,
+      attributeFilter: ["class"],
+    });
+  });
+}
+
+// keeps the number of requests within any 60-second window under the limit
+class RequestRateLimiter {
+  constructor(maxRequestsPerMinute) {
+    this.maxRequestsPerMinute = maxRequestsPerMinute;
+    this.requestTimes = [];
+  }
+
+  async acquire() {
+    while (true) {
+      const now = Date.now();
+      this.requestTimes = this.requestTimes.filter((time) => now - time < 60000);
+      if (this.requestTimes.length < this.maxRequestsPerMinute) {
+        this.requestTimes.push(now);
+        return;
+      }
+      await sleep(60000 - (now - this.requestTimes[0]));
+    }
+  }
+}
+
+// the common-name-adding forms opened in other tabs. a tab counts as done once it's closed or once it
+// has removed its data from the local storage (the form scripts do that right before closing the tab)
+class FormTabPool {
+  constructor(size) {
+    this.size = size;
+    this.openTabs = new Map(); // data key -> tab
+  }
+
+  removeDoneTabs() {
+    for (const [dataKey, tab] of this.openTabs) {
+      if (!tab || tab.closed || localStorage.getItem(dataKey) === null) {
+        localStorage.removeItem(dataKey);
+        this.openTabs.delete(dataKey);
+      }
+    }
+  }
+
+  // resolves on the next local storage change made by another tab, or after the timeout
+  waitForStorageChange(timeoutMs) {
+    return new Promise((resolve) => {
+      const timeout = setTimeout(finish, timeoutMs);
+      window.addEventListener("storage", finish);
+      function finish() {
+        window.removeEventListener("storage", finish);
+        clearTimeout(timeout);
+        resolve();
+      }
+    });
+  }
+
+  async waitForFreeSlot() {
+    this.removeDoneTabs();
+    while (this.openTabs.size >= this.size) {
+      await this.waitForStorageChange(FORM_TAB_CHECK_INTERVAL_MS);
+      this.removeDoneTabs();
+    }
+  }
+
+  open(url, dataKey, data) {
+    // the form scripts pick the data up in the new tab
+    localStorage.setItem(dataKey, JSON.stringify(data));
+    this.openTabs.set(dataKey, window.open(url, "_blank"));
+  }
+}
+
+const rateLimiter = new RequestRateLimiter(MAX_REQUESTS_PER_MINUTE);
+const formTabPool = new FormTabPool(MAX_OPEN_FORM_TABS);
+
+// where the time goes: milliseconds spent per phase ("search", "rateLimit", "formTabs") for each taxon
+const taxonTimings = [];
+let currentTaxonTiming = null;
+
+async function measure(phase, promise) {
+  const start = performance.now();
+  try {
+    return await promise;
+  } finally {
+    if (currentTaxonTiming) {
+      currentTaxonTiming[phase] =
+        (currentTaxonTiming[phase] ?? 0) + performance.now() - start;
+    }
+  }
+}
+
+function logTimingSummary() {
+  const phases = ["total", "search", "rateLimit", "formTabs"];
+  const summary = Object.fromEntries(
+    phases.map((phase) => {
+      const times = taxonTimings.map((timing) => timing[phase] ?? 0);
+      return [
+        phase,
+        {
+          "avg ms": Math.round(times.reduce((a, b) => a + b, 0) / times.length),
+          "max ms": Math.round(Math.max(...times)),
+        },
+      ];
+    })
+  );
+  console.log(`⏱ Timings over ${taxonTimings.length} taxa:`);
+  console.table(summary);
+}
+
 // given a search term that is a scientific name:
 // when SK name exists, .subtitle contains the primary scientific name.
 // the .title element contains the SK name if it exists and the primary scientific name otherwise. in both case, it also contains the scientific name we searched for if it's a synonym.
@@ -125,12 +274,18 @@ const SearchResultNoTaxaFound = "noTaxaFound";
 const SearchResultMultipleTaxaFound = "multipleTaxaFound";
 const SearchResultOneTaxonFound = "oneTaxonFound";
 
+// outcomes of processing a taxon, as saved in the results
+const OutcomeCommonNameAlreadyExists = "commonNameAlreadyExists";
+const OutcomeMultipleTaxaFound = "multipleTaxaFound";
+const OutcomeNotFound = "notFound";
+const OutcomeFormOpened = "formOpened";
+
 const REPORT_EXISTING_DIFFERENT_COMMON_NAMES = true;
 
-const filterByAllowedTaxonIds = (searchResultElements, allowedTaxaIdsList) => {
-  if (allowedTaxaIdsList) {
+const filterByAllowedTaxonIds = (searchResultElements, allowedTaxaIds) => {
+  if (allowedTaxaIds) {
     return searchResultElements.filter((elem) =>
-      allowedTaxaIdsList.includes(parseInt(dropdownItemToTaxonId(elem)))
+      allowedTaxaIds.has(parseInt(dropdownItemToTaxonId(elem)))
     );
   } else {
     return searchResultElements;
@@ -151,10 +306,10 @@ function findMatchingDropdownTaxonElement(
   scientificName,
   commonName,
   taxonRank,
-  allowedTaxaIdsList
+  allowedTaxaIds
 ) {
   // filter based on list of allowed taxon IDs
-  var filteredElements = filterByAllowedTaxonIds(elements, allowedTaxaIdsList);
+  var filteredElements = filterByAllowedTaxonIds(elements, allowedTaxaIds);
   if (!filteredElements.length) {
     console.log(
       `Nothing found for '${scientificName}' (${taxonRank}) (filtering based on allowed IDs list)`
@@ -213,7 +368,7 @@ function findMatchingDropdownTaxonElement(
       iNatCommonName &&
       iNatCommonName.toLowerCase() != commonName.toLowerCase()
     ) {
-      console.warn(
+      warn(
         `A common name exists for ${scientificName} and differs from the provided common name: iNat '${iNatCommonName}' vs provided '${commonName}'.`
       );
     }
@@ -225,12 +380,15 @@ function findMatchingDropdownTaxonElement(
     );
     return { result: SearchResultCommonNameAlreadyExists, elems: [] };
   } else if (filteredElements.length > 1) {
-    console.warn(
+    warn(
       `More than one match found for '${scientificName}' (${taxonRank}): ${filteredElements.map(
         (el) => el.innerText
       )}`
     );
-    return { result: SearchResultMultipleTaxaFound, elems: [] };
+    return {
+      result: SearchResultMultipleTaxaFound,
+      elems: stringifyListOfSearchResultElems(filteredElements),
+    };
   } else {
     return {
       result: SearchResultOneTaxonFound,
@@ -240,7 +398,7 @@ function findMatchingDropdownTaxonElement(
 }
 
 function getScientificName(taxon) {
-  return taxon[`${taxon.rank}_scientific`];
+  return taxon.scientificName;
 }
 
 function getScientificSynonym(taxon) {
@@ -252,7 +410,7 @@ function getScientificSynonym(taxon) {
 }
 
 function getCommonName(taxon) {
-  return taxon[`${taxon.rank}_common`];
+  return taxon.commonName;
 }
 
 function startsWithSpecificTaxonRankName(str, taxonRankEn) {
@@ -292,7 +450,14 @@ function dropdownItemToTaxonId(item) {
 async function clearSearchInputBox(inputBoxElem) {
   inputBoxElem.value = "";
   inputBoxElem.dispatchEvent(new Event("input", { bubbles: true }));
-  await sleep(500);
+  // wait for the results of the previous search to go away
+  await measure(
+    "search",
+    waitFor(
+      () => !document.querySelector(".ac-menu.open"),
+      CLEAR_SEARCH_TIMEOUT_MS
+    )
+  );
 }
 
 function fillSearchInputBox(inputBoxElem, inputStr) {
@@ -302,54 +467,66 @@ function fillSearchInputBox(inputBoxElem, inputStr) {
 }
 
 async function getInputBoxResultsContainer() {
-  let resultsContainer;
-  let attemptCounter = 0;
-  while (
-    (!resultsContainer ||
-      Array.from(resultsContainer.querySelectorAll("li")).length == 0) &&
-    attemptCounter < 7
-  ) {
-    await sleep(300); // Wait for results to appear
-    resultsContainer = document.querySelector(".ac-menu.open");
-    attemptCounter = attemptCounter + 1;
-    if (resultsContainer) {
-      break;
-    }
-  }
-  return resultsContainer;
+  return await measure(
+    "search",
+    waitFor(
+      () => document.querySelector(".ac-menu.open"),
+      SEARCH_RESULTS_TIMEOUT_MS
+    )
+  );
 }
 
-async function loadListOfTaxa() {
-  const taxaListPath = chrome.runtime.getURL("taxa.json");
-  return await (await fetch(taxaListPath)).json();
+async function search(inputBoxElem, searchStr) {
+  await clearSearchInputBox(inputBoxElem);
+  await measure("rateLimit", rateLimiter.acquire());
+  fillSearchInputBox(inputBoxElem, searchStr);
+  return await getInputBoxResultsContainer();
 }
 
-async function loadAllowedInatIdsList() {
-  const allowedIdListPath = chrome.runtime.getURL(
-    "allowed_inat_taxon_ids.json"
+// the taxa to process, pruned and filtered by prepare_dataset_for_chrome_extension.py:
+// JSON, possibly gzip-compressed (which is what the 0x1f 0x8b magic bytes tell)
+async function loadListOfTaxaText() {
+  const taxaListPath = chrome.runtime.getURL(TAXA_BUNDLE_FILE_NAME);
+  const bytes = new Uint8Array(
+    await (await fetch(taxaListPath)).arrayBuffer()
   );
-  return await (await fetch(allowedIdListPath)).json();
+  if (bytes[0] == 0x1f && bytes[1] == 0x8b) {
+    const decompressedStream = new Blob([bytes])
+      .stream()
+      .pipeThrough(new DecompressionStream("gzip"));
+    return await new Response(decompressedStream).text();
+  }
+  return new TextDecoder().decode(bytes);
 }
 
-async function loadTaxaNotInInat() {
-  const taxaListPath = chrome.runtime.getURL("taxa_not_in_inat.json");
-  return (await (await fetch(taxaListPath)).json()).map(
-    (record) => record.scientificName
-  );
+// the IDs are sorted, each stored as its difference from the previous ID, encoded as
+// an unsigned LEB128 varint (see encode_ids in prepare_dataset_for_chrome_extension.py)
+function decodeIds(bytes) {
+  const ids = new Set();
+  let previousId = 0;
+  let delta = 0;
+  let shift = 0;
+  for (const byte of bytes) {
+    delta += (byte & 0x7f) * 2 ** shift;
+    if (byte & 0x80) {
+      shift += 7;
+    } else {
+      previousId += delta;
+      ids.add(previousId);
+      delta = 0;
+      shift = 0;
+    }
+  }
+  return ids;
 }
 
-async function loadTaxaAlreadyHavingACommonName() {
-  const taxaListPath = chrome.runtime.getURL(
-    "taxa_already_assigned_common_name_in_inat.json"
+async function loadAllowedInatIds() {
+  const allowedIdsPath = chrome.runtime.getURL("allowed_inat_taxon_ids.bin");
+  const bytes = new Uint8Array(
+    await (await fetch(allowedIdsPath)).arrayBuffer()
   );
-  return (await (await fetch(taxaListPath)).json()).map(
-    (record) => record.scientificName
-  );
-}
-
-async function loadIncorrectScientificNameSynonyms() {
-  const taxaListPath = chrome.runtime.getURL("incorrect_synonym_matches.json");
-  return await (await fetch(taxaListPath)).json();
+  // an empty file means there's no list of allowed IDs, i.e. all taxa are allowed
+  return bytes.length ? decodeIds(bytes) : null;
 }
 
 function getSearchInputElem() {
@@ -385,9 +562,7 @@ async function providedCommonNameAlreadyExists(
   taxonRank,
   relevantTaxaIds
 ) {
-  await clearSearchInputBox(inputBoxElem);
-  fillSearchInputBox(inputBoxElem, commonName);
-  const resultsContainer = await getInputBoxResultsContainer();
+  const resultsContainer = await search(inputBoxElem, commonName);
 
   if (!resultsContainer || !resultsContainer.querySelectorAll("li").length) {
     return false;
@@ -398,7 +573,7 @@ async function providedCommonNameAlreadyExists(
   ).filter((el) => {
     if (
       relevantTaxaIds &&
-      !relevantTaxaIds.includes(parseInt(dropdownItemToTaxonId(el)))
+      !relevantTaxaIds.has(parseInt(dropdownItemToTaxonId(el)))
     ) {
       return false;
     }
@@ -421,7 +596,7 @@ async function providedCommonNameAlreadyExists(
       removeDiacritics(iNatCommonName.toLowerCase()) ==
       removeDiacritics(commonName.toLowerCase())
     ) {
-      console.warn(
+      warn(
         `The common name for ${scientificName} already exists but differs in terms of diacritics: ${commonName} vs ${iNatCommonName}. ${
           ranksMatch
             ? "Ranks match."
@@ -442,10 +617,7 @@ async function fetchSearchResults(
   scientificNameLogStr,
   taxonRank
 ) {
-  await clearSearchInputBox(inputBoxElem);
-  fillSearchInputBox(inputBoxElem, scientificName);
-
-  const resultsContainer = await getInputBoxResultsContainer();
+  const resultsContainer = await search(inputBoxElem, scientificName);
   if (!resultsContainer) {
     console.log(
       `❌ No search results container for ${scientificNameLogStr} (${taxonRank})`
@@ -464,176 +636,288 @@ async function fetchSearchResults(
   return items;
 }
 
-async function findTaxaWithoutCommonName() {
-  const taxaList = await loadListOfTaxa();
+async function openCommonNameForm(
+  taxonId,
+  commonName,
+  originalScientificName,
+  scientificNameLogStr
+) {
+  await measure("formTabs", formTabPool.waitForFreeSlot());
+  await measure("rateLimit", rateLimiter.acquire());
 
-  // these are all the IDs that are relevant to our current effort,
-  // e.g. all insect taxon IDs if we're adding common names of insects.
-  // used for filtering out irrelevant taxa that might otherwise match
-  // the scientific (or even common) name we're after because names
-  // aren't unique across different classes (example: Triodia, Stigmella).
-  const allowedIdsList = await loadAllowedInatIdsList();
+  const addNameUrl = `https://www.inaturalist.org/taxa/${taxonId}/taxon_names/new`;
+  console.log(
+    `📝 Opening common-name-adding form for ${scientificNameLogStr} (${commonName})`
+  );
+  // save common name so another script can pick it up and use on the common-name-adding page
+  formTabPool.open(addNameUrl, `${DATA_KEY_PREFIX}-${taxonId}`, {
+    sk: commonName,
+    sci: originalScientificName,
+  });
+}
 
-  const taxaNotInInat = await loadTaxaNotInInat();
-  const taxaAlreadyHavingACommonName = await loadTaxaAlreadyHavingACommonName();
-  const incorrectScientificNameSynonyms =
-    await loadIncorrectScientificNameSynonyms();
+// a key identifying the taxon across runs (and in ingest_extension_results.py)
+function getTaxonKey(taxon) {
+  return `${taxon.rank}|${getScientificName(taxon)}`;
+}
 
-  // give the website enough time to finish initialising everything
-  await sleep(2000);
-
-  const inputBoxElem = getSearchInputElem();
-
-  for (const taxon of taxaList) {
-    // a taxon looks like this:
-    //   {
-    //     "rank": "superfamily",
-    //     "superfamily_scientific": "micropterigoidea",
-    //     "family_scientific": null,
-    //     "family_common": null,
-    //     "subfamily_scientific": null,
-    //     "genus_scientific": null,
-    //     "species_scientific": null,
-    //     "species_common": null
-    //     "synonyms": null | ['Scientificnamesynonym1', 'Scientificnamesynonym2', ...]
-    //   }
-    const originalScientificName = getScientificName(taxon);
-    const commonName = getCommonName(taxon);
-    if (!originalScientificName) {
-      console.warn(
-        `No scientific name provided for this taxon (${JSON.stringify(
-          taxon
-        )}), skipping it.`
-      );
-      continue;
+async function hashText(text) {
+  const digest = await crypto.subtle.digest(
+    "SHA-256",
+    new TextEncoder().encode(text)
+  );
+  return Array.from(new Uint8Array(digest))
+    .map((byte) => byte.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+// the results of the current run (one record per processed taxon) live in the extension's storage,
+// so that a run interrupted by closing or reloading the page resumes where it stopped.
+// a different taxa bundle starts a new run.
+async function loadStoredResults(taxaListHash) {
+  const stored = await chrome.storage.local.get(null);
+  if (stored[RUN_KEY] != taxaListHash) {
+    await chrome.storage.local.clear();
+    await chrome.storage.local.set({ [RUN_KEY]: taxaListHash });
+    return new Map();
+  }
+  return new Map(
+    Object.entries(stored)
+      .filter(([key]) => key.startsWith(RESULT_KEY_PREFIX))
+      .map(([key, record]) => [key.slice(RESULT_KEY_PREFIX.length), record])
+  );
+}
+
+async function storeResult(record) {
+  await chrome.storage.local.set({
+    [`${RESULT_KEY_PREFIX}${record.taxonKey}`]: record,
+  });
+}
+
+async function downloadResults() {
+  const records = Object.entries(await chrome.storage.local.get(null))
+    .filter(([key]) => key.startsWith(RESULT_KEY_PREFIX))
+    .map(([, record]) => record)
+    .sort((a, b) => a.index - b.index);
+  const jsonl = records.map((record) => JSON.stringify(record)).join("\n");
+  const link = document.createElement("a");
+  link.href = URL.createObjectURL(
+    new Blob([jsonl + "\n"], { type: "application/x-ndjson" })
+  );
+  link.download = RESULTS_FILE_NAME;
+  link.click();
+  URL.revokeObjectURL(link.href);
+}
+
+function addResultsButtons() {
+  const container = document.createElement("div");
+  container.style.cssText =
+    "position: fixed; bottom: 10px; right: 10px; z-index: 10000; display: flex; gap: 5px;";
+  const downloadButton = document.createElement("button");
+  downloadButton.innerText = "⬇️ Download results";
+  downloadButton.onclick = downloadResults;
+  const resetButton = document.createElement("button");
+  resetButton.innerText = "🔄 Start over";
+  resetButton.onclick = async () => {
+    if (confirm("Forget the results of this run and start over?")) {
+      await chrome.storage.local.clear();
+      window.location.reload();
     }
-    if (!commonName) {
-      console.log(
-        `No common name provided for ${originalScientificName} (${taxon.rank}), skipping it.`
-      );
+  };
+  container.append(downloadButton, resetButton);
+  document.body.appendChild(container);
+}
+
+// warnings are also saved as part of the taxon's result
+let currentTaxonWarnings = [];
+
+function warn(message) {
+  console.warn(message);
+  currentTaxonWarnings.push(message);
+}
+
+// returns the outcome of processing the taxon along with the iNat taxon ID it got matched to
+// and the search results that came close (if any)
+async function processTaxon(taxon, context) {
+  const { inputBoxElem, allowedIds } = context;
+
+  // a taxon looks like this (the taxa listed in taxa_not_in_inat.csv or
+  // taxa_already_assigned_common_name_in_inat.csv, those lacking either name and
+  // the incorrect synonyms have been left out by prepare_dataset_for_chrome_extension.py):
+  //   {
+  //     "rank": "superfamily",
+  //     "scientificName": "micropterigoidea",
+  //     "commonName": "...",
+  //     "synonyms": ['Scientificnamesynonym1', 'Scientificnamesynonym2', ...] (optional)
+  //     "inatTaxonId": 12345 (optional, only for taxa matched by match_taxa_offline.py)
+  //   }
+  const originalScientificName = getScientificName(taxon);
+  const commonName = getCommonName(taxon);
+
+  if (taxon.inatTaxonId) {
+    // the taxon has been matched offline (match_taxa_offline.py), no need to search for it
+    await openCommonNameForm(
+      taxon.inatTaxonId,
+      commonName,
+      originalScientificName,
+      originalScientificName
+    );
+    return { outcome: OutcomeFormOpened, matchedId: taxon.inatTaxonId };
+  }
+
+  if (
+    await providedCommonNameAlreadyExists(
+      inputBoxElem,
+      commonName,
+      originalScientificName,
+      taxon.rank,
+      allowedIds
+    )
+  )
+    return { outcome: OutcomeCommonNameAlreadyExists };
+
+  var scientificNameCandidates = [
+    originalScientificName,
+    ...(taxon.synonyms ?? []),
+  ];
+  var closeSearchResults = [];
+  var multipleMatches = [];
+  for (const scientificName of scientificNameCandidates) {
+    const scientificNameLogStr = `${scientificName} (${originalScientificName})`;
+
+    const allSearchResults = await fetchSearchResults(
+      inputBoxElem,
+      scientificName,
+      scientificNameLogStr,
+      taxon.rank
+    );
+    if (allSearchResults.length == 0) {
       continue;
     }
 
-    if (taxaNotInInat.includes(originalScientificName)) {
-      console.log(
-        `Skipping ${originalScientificName} as it has been marked as not found in iNat.`
+    const filteredSearchResults = findMatchingDropdownTaxonElement(
+      allSearchResults,
+      scientificName,
+      commonName,
+      taxon.rank,
+      allowedIds
+    );
+    if (filteredSearchResults["result"] == SearchResultNoTaxaFound) {
+      closeSearchResults = closeSearchResults.concat(
+        filteredSearchResults["elems"]
       );
       continue;
-    } else if (taxaAlreadyHavingACommonName.includes(originalScientificName)) {
-      console.log(
-        `Skipping ${originalScientificName} as it has been marked as already having a common name assigned in iNat.`
-      );
+    } else if (
+      filteredSearchResults["result"] == SearchResultMultipleTaxaFound
+    ) {
+      multipleMatches = multipleMatches.concat(filteredSearchResults["elems"]);
       continue;
+    } else if (
+      filteredSearchResults["result"] == SearchResultCommonNameAlreadyExists
+    ) {
+      return { outcome: OutcomeCommonNameAlreadyExists };
     }
 
-    var taxonFound = false;
-
-    if (
-      await providedCommonNameAlreadyExists(
-        inputBoxElem,
-        commonName,
-        originalScientificName,
-        taxon.rank,
-        allowedIdsList
-      )
-    )
+    const taxonId = dropdownItemToTaxonId(filteredSearchResults["elems"][0]);
+    if (taxonId == null) {
+      warn("Could not extract taxon ID.");
       continue;
+    }
 
-    var scientificNameCandidates =
-      taxon["synonyms"] != undefined
-        ? [...new Set([originalScientificName, ...taxon["synonyms"]])]
-        : [originalScientificName];
-    var closeSearchResults = [];
-    for (const scientificName of scientificNameCandidates) {
-      if (
-        [
-          incorrectScientificNameSynonyms
-            .filter((record) => record.scientificName == originalScientificName)
-            .map((record) => record.incorrectSynonym),
-        ].includes(scientificName)
-      ) {
-        console.log(
-          `Not processing ${scientificName} as a synonym of ${originalScientificName} because it has been marked as an incorrect synonym.`
-        );
-        continue;
-      }
+    await openCommonNameForm(
+      taxonId,
+      commonName,
+      originalScientificName,
+      scientificNameLogStr
+    );
+    return { outcome: OutcomeFormOpened, matchedId: parseInt(taxonId) };
+  }
 
-      const scientificNameLogStr = `${scientificName} (${originalScientificName})`;
+  warn(
+    `We couldn't find a matching taxon for ${originalScientificName} (${
+      taxon.rank
+    }), skipping it.${
+      closeSearchResults.length
+        ? ` The closest search results were: ${closeSearchResults}`
+        : ""
+    }`
+  );
+  if (multipleMatches.length) {
+    return { outcome: OutcomeMultipleTaxaFound, candidates: multipleMatches };
+  }
+  return { outcome: OutcomeNotFound, candidates: closeSearchResults };
+}
 
-      const allSearchResults = await fetchSearchResults(
-        inputBoxElem,
-        scientificName,
-        scientificNameLogStr,
-        taxon.rank
-      );
-      if (allSearchResults.length == 0) {
-        continue;
-      }
+async function findTaxaWithoutCommonName() {
+  const taxaListText = await loadListOfTaxaText();
+  const taxaList = JSON.parse(taxaListText);
+  const storedResults = await loadStoredResults(await hashText(taxaListText));
 
-      const filteredSearchResults = findMatchingDropdownTaxonElement(
-        allSearchResults,
-        scientificName,
-        commonName,
-        taxon.rank,
-        allowedIdsList
-      );
-      if (filteredSearchResults["result"] == SearchResultNoTaxaFound) {
-        closeSearchResults = closeSearchResults.concat(
-          filteredSearchResults["elems"]
-        );
-        continue;
-      } else if (
-        filteredSearchResults["result"] == SearchResultMultipleTaxaFound
-      ) {
-        continue;
-      } else if (
-        filteredSearchResults["result"] == SearchResultCommonNameAlreadyExists
-      ) {
-        taxonFound = true;
-        break;
-      }
+  // these are all the IDs that are relevant to our current effort,
+  // e.g. all insect taxon IDs if we're adding common names of insects.
+  // used for filtering out irrelevant taxa that might otherwise match
+  // the scientific (or even common) name we're after because names
+  // aren't unique across different classes (example: Triodia, Stigmella).
+  const allowedIds = await loadAllowedInatIds();
 
-      const taxonId = dropdownItemToTaxonId(filteredSearchResults["elems"][0]);
-      if (taxonId == null) {
-        console.warn("Could not extract taxon ID.");
-        continue;
-      }
+  const context = { allowedIds };
 
-      await sleep(3000);
+  // give the website enough time to finish initialising everything
+  await waitFor(() => document.querySelector("#q"), PAGE_READY_TIMEOUT_MS);
+  addResultsButtons();
 
-      // save common name so another script can pick it up and use on the common-name-adding page
-      localStorage.setItem(
-        "inat-common-name-data",
-        JSON.stringify({ sk: commonName, sci: originalScientificName })
-      );
+  context.inputBoxElem = getSearchInputElem();
 
-      const addNameUrl = `https://www.inaturalist.org/taxa/${taxonId}/taxon_names/new`;
-      console.log(
-        `📝 Opening common-name-adding form for ${scientificNameLogStr} (${commonName})`
-      );
-      window.open(addNameUrl, "_blank");
+  if (storedResults.size) {
+    console.log(
+      `▶️ Resuming the run, skipping the ${storedResults.size} taxa processed already.`
+    );
+  }
 
-      await sleep(2000); // Wait before moving to next taxon
-      taxonFound = true;
-      break;
+  for (const [index, taxon] of taxaList.entries()) {
+    const taxonKey = getTaxonKey(taxon);
+    if (storedResults.has(taxonKey)) {
+      continue;
     }
 
-    if (taxonFound) {
-      continue;
-    } else {
-      console.warn(
-        `We couldn't find a matching taxon for ${originalScientificName} (${
-          taxon.rank
-        }), skipping it.${
-          closeSearchResults.length
-            ? ` The closest search results were: ${closeSearchResults}`
-            : ""
-        }`
-      );
+    currentTaxonTiming = {
+      start: performance.now(),
+      scientificName: getScientificName(taxon),
+    };
+    currentTaxonWarnings = [];
+
+    const result = await processTaxon(taxon, context);
+
+    currentTaxonTiming.total = performance.now() - currentTaxonTiming.start;
+    taxonTimings.push(currentTaxonTiming);
+    if (taxonTimings.length % LOG_TIMINGS_EVERY_N_TAXA == 0) {
+      logTimingSummary();
     }
+
+    const record = {
+      index,
+      taxonKey,
+      scientificName: getScientificName(taxon),
+      rank: taxon.rank,
+      commonName: getCommonName(taxon),
+      outcome: result.outcome,
+      matchedId: result.matchedId ?? null,
+      candidates: result.candidates ?? [],
+      warnings: currentTaxonWarnings,
+      timeMs: Math.round(currentTaxonTiming.total),
+      processedAt: new Date().toISOString(),
+    };
+    storedResults.set(taxonKey, record);
+    await storeResult(record);
   }
 
-  console.log("✅ All taxa processed.");
+  console.log(
+    "✅ All taxa processed. Use the Download results button to save the results."
+  );
+  if (taxonTimings.length) {
+    logTimingSummary();
+    console.log("⏱ Per-taxon timings (ms):", taxonTimings);
+  }
 }
 
 findTaxaWithoutCommonName();
@@ -0,0 +1,259 @@
+import codecs
+import hashlib
+import io
+import json
+import mmap
+import os
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+INAT_TAXA_PATH = Path("all_inat_taxa.csv")
+INAT_DWCA_PATH = Path("inaturalist-taxonomy.dwca.zip")
+# in the repository's root, no matter which directory the scripts run in
+CACHE_DIR = Path(__file__).resolve().parent / ".cache" / "inat-taxonomy"
+FILE_HASHES_PATH = CACHE_DIR / "file_hashes.json"
+DICTIONARY_ENCODED_COLUMNS = ["taxonRank", "kingdom", "phylum", "class", "order"]
+DWC_TEXT_NAMESPACE = {"dwc": "http://rs.tdwg.org/dwc/text/"}
+DEFAULT_CHUNK_SIZE = 200_000
+DEFAULT_BLOCK_SIZE = 1 << 24
+
+
+class DwcaArchive:
+    """
+    A Darwin Core Archive, such as the monthly iNat taxonomy export (`inaturalist-taxonomy.dwca.zip`),
+    either still zipped or already extracted into a directory.
+
+    Members (`taxa.csv`, `VernacularNames-<language>.csv`, ...) are read directly from the zip
+    according to the archive's `meta.xml`, i.e. nothing gets extracted to disk.
+    """
+
+    def __init__(self, path=INAT_DWCA_PATH):
+        self.path = Path(path)
+        self._zip_file = None if self.path.is_dir() else zipfile.ZipFile(self.path)
+        self.files = self._parse_meta()
+
+    def _parse_meta(self):
+        files = {}
+        with self._open_binary("meta.xml") as f:
+            meta = ET.parse(f).getroot()
+        for element in meta:
+            location = element.find("dwc:files/dwc:location", DWC_TEXT_NAMESPACE)
+            if location is None:
+                continue
+            files[location.text.strip()] = {
+                "rowType": element.get("rowType"),
+                "encoding": element.get("encoding", "UTF-8"),
+                "sep": codecs.decode(
+                    element.get("fieldsTerminatedBy", ","), "unicode_escape"
+                ),
+                "quotechar": element.get("fieldsEnclosedBy") or None,
+                "header": (
+                    0 if int(element.get("ignoreHeaderLines", "0")) > 0 else None
+                ),
+            }
+        return files
+
+    def _open_binary(self, member):
+        if self._zip_file is None:
+            return open(self.path / member, "rb")
+        return self._zip_file.open(member)
+
+    @property
+    def members(self):
+        return list(self.files)
+
+    def open(self, member):
+        """Opens the member as a text stream."""
+        encoding = self.files.get(member, {}).get("encoding", "UTF-8")
+        return io.TextIOWrapper(
+            self._open_binary(member), encoding=encoding, newline=""
+        )
+
+    def _read_csv_options(self, member):
+        if member not in self.files:
+            raise KeyError(
+                f"'{member}' isn't listed in {self.path}/meta.xml, available files: {', '.join(self.members)}"
+            )
+        options = dict(self.files[member])
+        del options["rowType"], options["encoding"]
+        if options["quotechar"] is None:
+            del options["quotechar"]
+        return options
+
+    def read_csv(self, member, **kwargs):
+        """Reads the whole member into a data frame (`kwargs` go to `pd.read_csv`)."""
+        with self.open(member) as f:
+            return pd.read_csv(f, **self._read_csv_options(member), **kwargs)
+
+    def read_csv_chunks(self, member, chunksize=DEFAULT_CHUNK_SIZE, **kwargs):
+        """Streams the member as data frames of at most `chunksize` rows, keeping memory usage bounded."""
+        with self.open(member) as f:
+            yield from pd.read_csv(
+                f, chunksize=chunksize, **self._read_csv_options(member), **kwargs
+            )
+
+    def iter_blocks(self, member, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        Yields the raw bytes of the member in blocks of `block_size`: memory-mapped slices of the file
+        when the archive is extracted, decompressed blocks when it's still zipped.
+        """
+        if self._zip_file is not None:
+            with self._zip_file.open(member) as f:
+                while block := f.read(block_size):
+                    yield block
+            return
+        with open(self.path / member, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, len(mapped), block_size):
+                    yield mapped[start : start + block_size]
+
+    @property
+    def created(self):
+        """When the export was put together, i.e. the time of its `meta.xml`."""
+        if self._zip_file is None:
+            return datetime.fromtimestamp((self.path / "meta.xml").stat().st_mtime)
+        return datetime(*self._zip_file.getinfo("meta.xml").date_time)
+
+    def close(self):
+        if self._zip_file is not None:
+            self._zip_file.close()
+
+
+def get_default_taxonomy_path():
+    """The taxonomy `taxa.csv` copied out of the DwC-A export if it's there, the export archive itself otherwise."""
+    return INAT_TAXA_PATH if INAT_TAXA_PATH.exists() else INAT_DWCA_PATH
+
+
+def write_atomically(path, write):
+    """
+    Writes the file by calling `write` with the path of a uniquely named temporary file next to it,
+    then moving that into place. Several processes can write the same file at once, and none of them
+    ever sees a partially written one.
+    """
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+    ) as f:
+        tmp_path = Path(f.name)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def read_known_hashes(hashes_path):
+    try:
+        return json.loads(hashes_path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def hash_file(path, hashes_path=FILE_HASHES_PATH):
+    """
+    Returns the SHA-256 of the file's content. The hash is remembered in `hashes_path` (along with
+    the file's size and modification time) so that it's only re-computed when the file changes.
+    """
+    path = Path(path)
+    hashes_path = Path(hashes_path)
+    stat = path.stat()
+    key = str(path.resolve())
+    known_hash = read_known_hashes(hashes_path).get(key)
+    if (
+        known_hash
+        and known_hash["size"] == stat.st_size
+        and known_hash["mtime"] == stat.st_mtime
+    ):
+        return known_hash["sha256"]
+
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 24):
+            sha256.update(chunk)
+
+    hashes_path.parent.mkdir(parents=True, exist_ok=True)
+    # re-read right before writing, another process might have added hashes in the meantime
+    known_hashes = read_known_hashes(hashes_path)
+    known_hashes[key] = {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": sha256.hexdigest(),
+    }
+    write_atomically(
+        hashes_path,
+        lambda tmp_path: tmp_path.write_text(json.dumps(known_hashes, indent=2)),
+    )
+    return sha256.hexdigest()
+
+
+def build_cache(source_path, cache_path):
+    """Converts the taxonomy CSV (or `taxa.csv` in a DwC-A) to an (uncompressed, hence memory-mappable) Arrow file."""
+    print(
+        f"Caching {source_path} as {cache_path}, this only happens once per taxonomy export..."
+    )
+    start_time = time.time()
+    dtype = {column: "category" for column in DICTIONARY_ENCODED_COLUMNS}
+    if source_path.suffix == ".zip" or source_path.is_dir():
+        archive = DwcaArchive(source_path)
+        df = archive.read_csv("taxa.csv", dtype=dtype)
+        archive.close()
+    else:
+        df = pd.read_csv(source_path, dtype=dtype)
+    write_atomically(
+        cache_path,
+        lambda tmp_path: feather.write_feather(
+            df, tmp_path, compression="uncompressed"
+        ),
+    )
+
+    for stale_cache_path in cache_path.parent.glob(f"{source_path.stem}-*.arrow"):
+        if stale_cache_path != cache_path:
+            # another process might be removing it at the same time
+            stale_cache_path.unlink(missing_ok=True)
+    print(f"Done in {time.time() - start_time:.0f}s.")
+
+
+def get_cache_path(source_path):
+    source_path = Path(source_path)
+    if source_path.is_dir():
+        source_hash = hash_file(source_path / "taxa.csv", FILE_HASHES_PATH)
+    else:
+        source_hash = hash_file(source_path, FILE_HASHES_PATH)
+    cache_path = CACHE_DIR / f"{source_path.stem}-{source_hash[:16]}.arrow"
+    if not cache_path.exists():
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        build_cache(source_path, cache_path)
+    return cache_path
+
+
+def _arrow_backed_strings(arrow_type):
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def load_inat_taxa(columns=None, source_path=None):
+    """
+    Loads the iNat taxonomy (`taxa.csv` from the monthly DwC-A export), or just the given columns of it.
+    `source_path` can be the CSV itself or the (zipped or extracted) DwC-A export.
+
+    The first load of each export converts it to a columnar cache. Later loads memory-map the cache,
+    keeping strings Arrow-backed and rank/kingdom/phylum/class/order as categoricals.
+    """
+    if source_path is None:
+        source_path = get_default_taxonomy_path()
+    table = feather.read_table(
+        get_cache_path(source_path), columns=columns, memory_map=True
+    )
+    return table.to_pandas(types_mapper=_arrow_backed_strings)
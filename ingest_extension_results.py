@@ -0,0 +1,112 @@
+import argparse
+import json
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from taxon_table import RANK_MAPPING, TaxonTable, get_taxa_to_process_mask
+
+ALL_DATASETS_DIR = Path("data-sources")
+DEFAULT_RESULTS_PATH = Path("inat-common-name-adder-results.jsonl")
+
+# outcomes saved by the extension (see find_matching_taxa_without_common_name.js)
+OUTCOME_NOT_FOUND = "notFound"
+OUTCOME_MULTIPLE_TAXA_FOUND = "multipleTaxaFound"
+OUTCOME_COMMON_NAME_ALREADY_EXISTS = "commonNameAlreadyExists"
+UNRESOLVED_OUTCOMES = [OUTCOME_NOT_FOUND, OUTCOME_MULTIPLE_TAXA_FOUND]
+
+
+def load_results(results_path):
+    """Loads the results downloaded from the extension, keeping the latest result of each taxon."""
+    with open(results_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return pd.DataFrame(records).drop_duplicates("taxonKey", keep="last")
+
+
+def get_taxon_keys(taxa):
+    """The same keys the extension uses for the taxa: `<iNat rank>|<scientific name>`."""
+    return taxa.df["rank"].replace(RANK_MAPPING) + "|" + taxa.df["scientificName"]
+
+
+def get_next_tough_taxa_path(dataset_dir):
+    numbers = [
+        int(match.group(1))
+        for path in dataset_dir.glob("tough_taxa_*.csv")
+        if (match := re.fullmatch(r"tough_taxa_(\d+)\.csv", path.name))
+    ]
+    return dataset_dir / f"tough_taxa_{max(numbers, default=0) + 1}.csv"
+
+
+def main(data_source_name, results_path=DEFAULT_RESULTS_PATH, taxa_file="taxa.json"):
+    dataset_dir = ALL_DATASETS_DIR / data_source_name
+    results = load_results(results_path)
+    print(results["outcome"].value_counts().to_string())
+
+    # the taxa to look up synonyms for, see add_synonyms_to_problematic_taxa_using_gbif.py
+    problematic_taxa = results[results["outcome"].isin(UNRESOLVED_OUTCOMES)]
+    problematic_taxa[["scientificName"]].to_csv(
+        dataset_dir / "problematic_taxa.csv", index=False
+    )
+
+    already_named_path = dataset_dir / "taxa_already_assigned_common_name_in_inat.csv"
+    already_named = results[results["outcome"] == OUTCOME_COMMON_NAME_ALREADY_EXISTS][
+        ["scientificName", "rank"]
+    ]
+    if already_named_path.exists():
+        # keep the taxa noted down by hand, only adding the new ones
+        listed_already_named = pd.read_csv(already_named_path)
+        already_named = pd.concat(
+            [
+                listed_already_named,
+                already_named[
+                    ~already_named["scientificName"].isin(
+                        listed_already_named["scientificName"]
+                    )
+                ],
+            ]
+        )
+    already_named.to_csv(already_named_path, index=False)
+
+    # the warnings, one per line, just like when copying them from the DevTools Console
+    warnings = [warning for warnings in results["warnings"] for warning in warnings]
+    if warnings:
+        tough_taxa_path = get_next_tough_taxa_path(dataset_dir)
+        tough_taxa_path.write_text("\n".join(warnings) + "\n", encoding="utf-8")
+        print(f"Saved {len(warnings)} warnings to {tough_taxa_path}")
+
+    # what's left for the next run: the unresolved taxa and those the extension hasn't got to yet
+    taxa = TaxonTable(pd.read_json(dataset_dir / taxa_file, orient="records"))
+    taxon_keys = get_taxon_keys(taxa)
+    resolved_keys = results.loc[
+        ~results["outcome"].isin(UNRESOLVED_OUTCOMES), "taxonKey"
+    ]
+    unresolved_taxa = taxa.df[
+        get_taxa_to_process_mask(taxa, dataset_dir) & ~taxon_keys.isin(resolved_keys)
+    ]
+    unresolved_taxa[taxa.source_columns].to_json(
+        dataset_dir / "taxa_unresolved.json", orient="records"
+    )
+    print(
+        f"{len(unresolved_taxa)} out of {len(taxa)} taxa are left for the next run (taxa_unresolved.json)."
+    )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("data_source")
+    arg_parser.add_argument(
+        "results",
+        nargs="?",
+        type=Path,
+        default=DEFAULT_RESULTS_PATH,
+        help="the results downloaded from the extension",
+    )
+    arg_parser.add_argument(
+        "--taxa-file",
+        default="taxa.json",
+        help="the file in the data source directory the extension was run with",
+    )
+    args = arg_parser.parse_args()
+
+    main(args.data_source, args.results, args.taxa_file)
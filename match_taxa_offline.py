@@ -0,0 +1,202 @@
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from extract_allowed_inat_taxon_ids import load_allowed_ids
+from inat_taxonomy import INAT_DWCA_PATH, DwcaArchive, load_inat_taxa
+from taxon_table import (
+    RANK_MAPPING,
+    TaxonTable,
+    normalize_scientific_names,
+    read_scientific_names,
+)
+
+ALL_DATASETS_DIR = Path("data-sources")
+
+STATUS_RESOLVED = "resolved"
+STATUS_ALREADY_NAMED = "already named"
+STATUS_AMBIGUOUS = "ambiguous"
+STATUS_NOT_FOUND = "not found"
+
+def load_synonyms(dataset_dir):
+    """Returns the scientific synonyms fetched from GBIF (`problematic_taxa_with_synonyms.json`) by scientific name."""
+    path = dataset_dir / "problematic_taxa_with_synonyms.json"
+    if not path.exists():
+        return {}
+    taxa = TaxonTable(pd.DataFrame(json.loads(path.read_text())))
+    return {
+        scientific_name: synonyms
+        for scientific_name, synonyms in zip(
+            taxa.df["scientificName"], taxa.df["synonyms"]
+        )
+        if isinstance(synonyms, list)
+    }
+
+
+def get_candidate_names(df, synonyms, incorrect_synonyms):
+    """
+    Lists the names each taxon (row of `df`) can be found by in iNat: its own scientific name and
+    its known synonyms, minus those marked as incorrect in `incorrect_synonym_matches.csv`.
+    """
+    candidates = df[["scientificName", "rank"]].reset_index(names="row")
+    candidates["name"] = candidates["scientificName"]
+    candidates["isSynonym"] = False
+
+    synonym_candidates = candidates.assign(
+        name=candidates["scientificName"].map(synonyms), isSynonym=True
+    ).explode("name")
+    synonym_candidates = synonym_candidates[synonym_candidates["name"].notna()]
+    if not incorrect_synonyms.empty:
+        synonym_candidates = synonym_candidates.merge(
+            incorrect_synonyms.rename(columns={"incorrectSynonym": "name"}),
+            on=["scientificName", "name"],
+            how="left",
+            indicator=True,
+        )
+        synonym_candidates = synonym_candidates[
+            synonym_candidates["_merge"] == "left_only"
+        ].drop(columns="_merge")
+
+    candidates = pd.concat([candidates, synonym_candidates], ignore_index=True)
+    candidates["nameKey"] = normalize_scientific_names(candidates["name"].astype(str))
+    candidates["rank"] = candidates["rank"].replace(RANK_MAPPING)
+    return candidates[["row", "nameKey", "rank", "isSynonym"]]
+
+
+def main(data_source_name, inat_export_path=INAT_DWCA_PATH, language="slovak"):
+    dataset_dir = ALL_DATASETS_DIR / data_source_name
+    taxa = TaxonTable.from_data_source(data_source_name)
+    # just like the extension, skip the taxa we've got no names for
+    df = taxa.df[taxa.df["scientificName"].notna() & taxa.df["commonName"].notna()]
+
+    incorrect_synonyms_path = dataset_dir / "incorrect_synonym_matches.csv"
+    incorrect_synonyms = (
+        pd.read_csv(incorrect_synonyms_path)[["scientificName", "incorrectSynonym"]]
+        if incorrect_synonyms_path.exists()
+        else pd.DataFrame()
+    )
+    synonyms = load_synonyms(dataset_dir)
+    candidates = get_candidate_names(df, synonyms, incorrect_synonyms)
+
+    inat_taxa = load_inat_taxa(["id", "scientificName", "taxonRank"], inat_export_path)
+    allowed_ids = load_allowed_ids(data_source_name)
+    if allowed_ids is not None:
+        inat_taxa = inat_taxa[inat_taxa["id"].isin(allowed_ids)]
+    inat_taxa = inat_taxa[inat_taxa["taxonRank"].isin(candidates["rank"].unique())]
+    inat_taxa = pd.DataFrame(
+        {
+            "id": inat_taxa["id"],
+            "nameKey": normalize_scientific_names(inat_taxa["scientificName"]),
+            "rank": inat_taxa["taxonRank"].astype(str),
+        }
+    )
+
+    matching_inat_taxa = inat_taxa[inat_taxa["nameKey"].isin(candidates["nameKey"])]
+    matches = candidates.merge(
+        matching_inat_taxa.astype({"nameKey": object}), on=["nameKey", "rank"]
+    )
+    # a match of the taxon's own name beats matches of its synonyms
+    matches = matches[
+        matches["isSynonym"] <= matches.groupby("row")["isSynonym"].transform("min")
+    ]
+    matched_ids = matches.groupby("row")["id"].unique()
+
+    inat_export = DwcaArchive(inat_export_path)
+    vernacular_names = inat_export.read_csv(
+        f"VernacularNames-{language}.csv", usecols=["id", "vernacularName"]
+    )
+    inat_export.close()
+    vernacular_names = vernacular_names[vernacular_names["id"].isin(inat_taxa["id"])]
+    existing_name_by_id = vernacular_names.groupby("id")["vernacularName"].first()
+    # the extension also skips a taxon when its common name is already used by another taxon of the same rank
+    existing_names = vernacular_names.merge(inat_taxa[["id", "rank"]], on="id")
+    existing_name_keys = pd.MultiIndex.from_arrays(
+        [existing_names["vernacularName"].str.lower(), existing_names["rank"]]
+    )
+
+    not_in_inat = read_scientific_names(dataset_dir / "taxa_not_in_inat.csv")
+    already_named = read_scientific_names(
+        dataset_dir / "taxa_already_assigned_common_name_in_inat.csv"
+    )
+
+    matched_ids = matched_ids.reindex(df.index)
+    num_matches = matched_ids.str.len().fillna(0)
+    matched_id = matched_ids.where(num_matches == 1).str[0].astype("Int64")
+    existing_name = matched_id.map(existing_name_by_id)
+    common_name_used = pd.Series(
+        pd.MultiIndex.from_arrays(
+            [df["commonName"].str.lower(), df["rank"].replace(RANK_MAPPING)]
+        ).isin(existing_name_keys),
+        index=df.index,
+    )
+    # (condition, status, reason) triples, the first one that holds decides the taxon's status
+    outcomes = [
+        (
+            df["scientificName"].isin(not_in_inat),
+            STATUS_NOT_FOUND,
+            "taxa_not_in_inat.csv",
+        ),
+        (
+            df["scientificName"].isin(already_named),
+            STATUS_ALREADY_NAMED,
+            "taxa_already_assigned_common_name_in_inat.csv",
+        ),
+        (common_name_used, STATUS_ALREADY_NAMED, "the common name is used in iNat"),
+        (num_matches == 0, STATUS_NOT_FOUND, None),
+        (
+            num_matches > 1,
+            STATUS_AMBIGUOUS,
+            "candidate iNat taxa: "
+            + matched_ids.map(
+                lambda ids: ", ".join(map(str, sorted(ids))), na_action="ignore"
+            ),
+        ),
+        (existing_name.notna(), STATUS_ALREADY_NAMED, "iNat name: " + existing_name),
+    ]
+    conditions = [condition.to_numpy(dtype=bool) for condition, _, _ in outcomes]
+    statuses = [status for _, status, _ in outcomes]
+    reasons = [
+        reason.to_numpy(dtype=object) if isinstance(reason, pd.Series) else reason
+        for _, _, reason in outcomes
+    ]
+    report_df = pd.DataFrame(
+        {
+            "scientificName": df["scientificName"],
+            "rank": df["rank"],
+            "commonName": df["commonName"],
+            "status": np.select(conditions, statuses, STATUS_RESOLVED),
+            "iNatTaxonId": matched_id.where(~conditions[0]),
+            "reason": np.select(conditions, reasons, None),
+        }
+    )
+    report_df.to_csv(dataset_dir / "offline_matches.csv", index=False)
+    print(report_df["status"].value_counts().to_string())
+
+    # what's left for the extension to do, resolved taxa come with their iNat taxon ID
+    to_process = (report_df["status"] != STATUS_ALREADY_NAMED) & ~df[
+        "scientificName"
+    ].isin(not_in_inat)
+    taxa_to_process = df.loc[to_process, taxa.source_columns].copy()
+    taxa_to_process["synonyms"] = df.loc[to_process, "scientificName"].map(synonyms)
+    taxa_to_process["inatTaxonId"] = report_df.loc[to_process, "iNatTaxonId"].where(
+        report_df.loc[to_process, "status"] == STATUS_RESOLVED
+    )
+    taxa_to_process.to_json(dataset_dir / "taxa_matched_offline.json", orient="records")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("data_source")
+    arg_parser.add_argument(
+        "--inat-export",
+        type=Path,
+        default=INAT_DWCA_PATH,
+        help="the iNat taxonomy export (inaturalist-taxonomy.dwca.zip), zipped or extracted",
+    )
+    arg_parser.add_argument("--language", default="slovak")
+    args = arg_parser.parse_args()
+
+    main(args.data_source, args.inat_export, args.language)
@@ -0,0 +1,328 @@
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from extract_allowed_inat_taxon_ids import taxon_filters
+from gbif_offline import DEFAULT_BACKBONE_DB_PATH
+from inat_taxonomy import get_default_taxonomy_path, hash_file
+
+ALL_DATASETS_DIR = Path("data-sources")
+TARGET_DIR = Path("inat-common-name-adder")
+STATE_DIR = Path(".cache") / "pipeline"
+STATE_PATH = STATE_DIR / "state.json"
+FILE_HASHES_PATH = STATE_DIR / "file_hashes.json"
+ALLOWED_IDS_STEP_NAME = "extract_allowed_inat_taxon_ids"
+
+STATUS_RAN = "ran"
+STATUS_SKIPPED = "skipped (inputs unchanged)"
+STATUS_FAILED = "failed"
+STATUS_BLOCKED = "not run (a step it depends on failed)"
+
+# the files each step reads besides those in the data source directory
+EXTRACTION_MODULES = [Path("taxon_extraction.py"), Path("spreadsheet_cache.py")]
+TAXON_TABLE_MODULES = [Path("taxon_table.py")]
+GBIF_MODULES = [Path("gbif_cache.py"), Path("gbif_client.py"), Path("gbif_offline.py")]
+EXCLUSION_FILES = [
+    "taxa_not_in_inat.csv",
+    "taxa_already_assigned_common_name_in_inat.csv",
+    "incorrect_synonym_matches.csv",
+]
+
+
+class Step:
+    """
+    A command of the pipeline along with the files it reads (`inputs`) and writes (`outputs`).
+    The step only runs again once the content of its inputs (or its command) changes, or some
+    of its outputs are missing. `depends_on` lists the names of the steps producing its inputs.
+    """
+
+    def __init__(self, name, command, inputs, outputs, cwd=None, depends_on=()):
+        self.name = name
+        self.command = [str(part) for part in command]
+        self.inputs = [Path(path) for path in inputs]
+        self.outputs = [Path(path) for path in outputs]
+        self.cwd = cwd
+        self.depends_on = list(depends_on)
+
+
+def get_allowed_ids_step(data_source_names, inat_taxonomy_path):
+    """
+    Extracts the allowed iNat taxon IDs of all the data sources with a filter in a single step, i.e.
+    loading the taxonomy just once (and never building its cache in several processes at once).
+    """
+    data_source_names = [name for name in data_source_names if name in taxon_filters]
+    if not data_source_names:
+        return None
+    command = [sys.executable, "extract_allowed_inat_taxon_ids.py", *data_source_names]
+    if inat_taxonomy_path:
+        command += ["--inat-taxonomy", inat_taxonomy_path]
+    return Step(
+        ALLOWED_IDS_STEP_NAME,
+        command,
+        [
+            Path("extract_allowed_inat_taxon_ids.py"),
+            Path("taxon_tree.py"),
+            Path("inat_taxonomy.py"),
+            Path(inat_taxonomy_path or get_default_taxonomy_path()),
+        ],
+        [
+            ALL_DATASETS_DIR / name / file_name
+            for name in data_source_names
+            for file_name in [
+                "allowed_inat_taxon_ids.csv",
+                "allowed_inat_taxon_ids.json",
+            ]
+        ],
+    )
+
+
+def get_data_source_steps(data_source_name, gbif_mode, extension_data_source=None):
+    """
+    The steps of refreshing a data source, from extracting its taxa to handing them to the extension
+    (its allowed iNat taxon IDs being extracted along with those of the other data sources).
+    """
+    dataset_dir = ALL_DATASETS_DIR / data_source_name
+    steps = []
+    extract_steps = []
+    if (dataset_dir / "extract_taxa.py").exists():
+        raw_files = [
+            path
+            for path in sorted(dataset_dir.iterdir())
+            if path.name == "raw_text.txt" or path.suffix == ".xlsx"
+        ]
+        steps.append(
+            Step(
+                f"{data_source_name}/extract_taxa",
+                [sys.executable, "extract_taxa.py"],
+                [dataset_dir / "extract_taxa.py", *raw_files, *EXTRACTION_MODULES],
+                [dataset_dir / "taxa.csv", dataset_dir / "taxa.json"],
+                cwd=dataset_dir,
+            )
+        )
+        extract_steps = [steps[-1].name]
+
+    allowed_ids_steps = (
+        [ALLOWED_IDS_STEP_NAME] if data_source_name in taxon_filters else []
+    )
+
+    if (dataset_dir / "problematic_taxa.csv").exists():
+        steps.append(
+            Step(
+                f"{data_source_name}/add_synonyms_to_problematic_taxa_using_gbif",
+                [
+                    sys.executable,
+                    "add_synonyms_to_problematic_taxa_using_gbif.py",
+                    data_source_name,
+                    "--gbif-mode",
+                    gbif_mode,
+                ],
+                [
+                    Path("add_synonyms_to_problematic_taxa_using_gbif.py"),
+                    *GBIF_MODULES,
+                    *TAXON_TABLE_MODULES,
+                    # the local copy of the GBIF backbone is only read in offline mode
+                    *([DEFAULT_BACKBONE_DB_PATH] if gbif_mode == "offline" else []),
+                    dataset_dir / "taxa.csv",
+                    dataset_dir / "problematic_taxa.csv",
+                ],
+                [dataset_dir / "problematic_taxa_with_synonyms.json"],
+                depends_on=extract_steps,
+            )
+        )
+
+    # the extension can only hold one data source at a time
+    if data_source_name == extension_data_source:
+        steps.append(
+            Step(
+                f"{data_source_name}/prepare_dataset_for_chrome_extension",
+                [
+                    sys.executable,
+                    "prepare_dataset_for_chrome_extension.py",
+                    data_source_name,
+                ],
+                [
+                    Path("prepare_dataset_for_chrome_extension.py"),
+                    Path("extract_allowed_inat_taxon_ids.py"),
+                    *TAXON_TABLE_MODULES,
+                    dataset_dir / "taxa.json",
+                    dataset_dir / "allowed_inat_taxon_ids.csv",
+                    dataset_dir / "allowed_inat_taxon_ids.json",
+                    *[dataset_dir / file_name for file_name in EXCLUSION_FILES],
+                ],
+                [TARGET_DIR / "taxa.bundle", TARGET_DIR / "allowed_inat_taxon_ids.bin"],
+                depends_on=extract_steps + allowed_ids_steps,
+            )
+        )
+    return steps
+
+
+class Pipeline:
+    """
+    Runs the steps in the order of their dependencies, any steps not depending on each other (e.g. those
+    of different data sources) in parallel. Each step runs in a process of its own.
+    """
+
+    def __init__(self, steps, state_path=STATE_PATH, force=False):
+        self.steps = {step.name: step for step in steps}
+        self.state_path = state_path
+        self.state = (
+            json.loads(state_path.read_text())
+            if state_path.exists() and not force
+            else {}
+        )
+        self.results = {}
+        # hash_file keeps its hashes in a single file, only one thread at a time should update it
+        self._lock = threading.Lock()
+
+    def hash_inputs(self, step):
+        digest = hashlib.sha256(json.dumps(step.command).encode())
+        with self._lock:
+            for path in step.inputs:
+                file_hash = (
+                    hash_file(path, FILE_HASHES_PATH) if path.is_file() else "missing"
+                )
+                digest.update(f"{path}:{file_hash}\n".encode())
+        return digest.hexdigest()
+
+    def run_step(self, step):
+        start_time = time.time()
+        inputs_hash = self.hash_inputs(step)
+        if self.state.get(step.name) == inputs_hash and all(
+            path.exists() for path in step.outputs
+        ):
+            return STATUS_SKIPPED, time.time() - start_time, ""
+        completed = subprocess.run(
+            step.command,
+            cwd=step.cwd,
+            capture_output=True,
+            text=True,
+        )
+        output = completed.stdout + completed.stderr
+        if completed.returncode != 0:
+            return STATUS_FAILED, time.time() - start_time, output
+        with self._lock:
+            self.state[step.name] = inputs_hash
+        return STATUS_RAN, time.time() - start_time, output
+
+    def save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps(self.state, indent=2))
+
+    def run(self, max_workers=None):
+        pending = dict(self.steps)
+        running = {}
+        with ThreadPoolExecutor(max_workers) as executor:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    dependency_results = [
+                        self.results.get(dependency)
+                        for dependency in step.depends_on
+                        if dependency in self.steps
+                    ]
+                    if any(
+                        result is None or result[0] in (STATUS_FAILED, STATUS_BLOCKED)
+                        for result in dependency_results
+                    ):
+                        if any(
+                            result is not None
+                            and result[0] in (STATUS_FAILED, STATUS_BLOCKED)
+                            for result in dependency_results
+                        ):
+                            del pending[name]
+                            self.results[name] = (STATUS_BLOCKED, 0.0)
+                            print(f"{name}: {STATUS_BLOCKED}")
+                        continue
+                    del pending[name]
+                    running[executor.submit(self.run_step, step)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    status, wall_time, output = future.result()
+                    self.results[name] = (status, wall_time)
+                    print(f"{name}: {status} in {wall_time:.1f}s")
+                    if output.strip() and status != STATUS_SKIPPED:
+                        print("    " + output.strip().replace("\n", "\n    "))
+                self.save_state()
+        return self.results
+
+
+def main(
+    data_source_names=None,
+    inat_taxonomy_path=None,
+    gbif_mode="cached",
+    extension_data_source=None,
+    force=False,
+    max_workers=None,
+):
+    start_time = time.time()
+    if not data_source_names:
+        data_source_names = sorted(
+            path.name for path in ALL_DATASETS_DIR.iterdir() if path.is_dir()
+        )
+    if extension_data_source and extension_data_source not in data_source_names:
+        data_source_names = data_source_names + [extension_data_source]
+    allowed_ids_step = get_allowed_ids_step(data_source_names, inat_taxonomy_path)
+    steps = [allowed_ids_step] if allowed_ids_step else []
+    steps += [
+        step
+        for data_source_name in data_source_names
+        for step in get_data_source_steps(
+            data_source_name, gbif_mode, extension_data_source
+        )
+    ]
+    results = Pipeline(steps, force=force).run(max_workers)
+
+    print("\nstep\tstatus\twall time (s)")
+    for name, (status, wall_time) in results.items():
+        print(f"{name}\t{status}\t{wall_time:.1f}")
+    print(f"Done in {time.time() - start_time:.1f}s.")
+    if any(status == STATUS_FAILED for status, _ in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "data_sources", nargs="*", help="defaults to all the data sources"
+    )
+    arg_parser.add_argument(
+        "--inat-taxonomy",
+        help="all_inat_taxa.csv or the iNat taxonomy export (inaturalist-taxonomy.dwca.zip, zipped or extracted), "
+        "defaults to all_inat_taxa.csv if it exists, the export otherwise",
+    )
+    arg_parser.add_argument(
+        "--gbif-mode",
+        choices=["online", "cached", "offline"],
+        default="cached",
+        help="see add_synonyms_to_problematic_taxa_using_gbif.py",
+    )
+    arg_parser.add_argument(
+        "--extension-data-source",
+        help="also prepare this data source for the Chrome extension (it holds one data source at a time)",
+    )
+    arg_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="run all the steps, even those whose inputs haven't changed",
+    )
+    arg_parser.add_argument(
+        "--workers", type=int, help="the number of steps to run at the same time"
+    )
+    args = arg_parser.parse_args()
+
+    main(
+        args.data_sources,
+        args.inat_taxonomy,
+        args.gbif_mode,
+        args.extension_data_source,
+        args.force,
+        args.workers,
+    )
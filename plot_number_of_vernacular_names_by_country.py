@@ -1,9 +1,18 @@
+import argparse
+import urllib.request
 from pathlib import Path
-import pandas as pd
+
 import matplotlib.pyplot as plt
-from tqdm import tqdm
 import geopandas as gpd
 
+from inat_taxonomy import DwcaArchive, INAT_DWCA_PATH
+from vernacular_name_stats import load_stats
+
+BASEMAP_URL = (
+    "https://naciscdn.org/naturalearth/110m/cultural/ne_110m_admin_0_countries.zip"
+)
+BASEMAP_PATH = Path(".cache") / "naturalearth" / "ne_110m_admin_0_countries.zip"
+
 language_to_iso2 = {
     "albanian": "AL",
     "belarusian": "BY",
@@ -39,23 +48,53 @@ language_to_iso2 = {
     "ukrainian": "UA",
 }
 
-inat_taxonomy_export_dir = Path("inaturalist-taxonomy.dwca")
 
-country_to_number_of_names = []
+def load_basemap(basemap_path=BASEMAP_PATH):
+    """The Natural Earth countries, downloaded on the first run only."""
+    if not basemap_path.exists():
+        print(f"Downloading the basemap from {BASEMAP_URL}...")
+        basemap_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_basemap_path = basemap_path.with_suffix(".tmp")
+        urllib.request.urlretrieve(BASEMAP_URL, tmp_basemap_path)
+        tmp_basemap_path.replace(basemap_path)
+    world = gpd.read_file(basemap_path)
+    world.loc[world["NAME"] == "France", "ISO_A2"] = "FR"
+    world.loc[world["NAME"] == "Norway", "ISO_A2"] = "NO"
+    return world
+
+
+def main(inat_taxonomy_path=INAT_DWCA_PATH, output_path=None):
+    # the counts are cached per export, see vernacular_name_stats.py
+    df = load_stats(inat_taxonomy_path, list(language_to_iso2))
+    df["country_code"] = df["language"].map(language_to_iso2)
 
-for language_name, country_code in tqdm(language_to_iso2.items()):
-    names = pd.read_csv(inat_taxonomy_export_dir / f"VernacularNames-{language_name}.csv")
-    country_to_number_of_names.append({"country_code": country_code, "number_of_names": len(names)})
+    gdf = load_basemap().merge(df, left_on="ISO_A2", right_on="country_code")
 
-df = pd.DataFrame(country_to_number_of_names)
+    if output_path is None:
+        inat_taxonomy_export = DwcaArchive(inat_taxonomy_path)
+        export_month = f"{inat_taxonomy_export.created:%b_%Y}".lower()
+        inat_taxonomy_export.close()
+        output_path = f"number_of_vernacular_names_by_country_{export_month}.png"
+    gdf.plot(
+        column="numberOfNames", cmap="viridis", legend=True, figsize=(8, 6), vmax=100000
+    )
+    plt.axis("off")
+    plt.savefig(output_path, dpi=300)
+    print(f"Saved the map to {output_path}")
 
-url = "https://naciscdn.org/naturalearth/110m/cultural/ne_110m_admin_0_countries.zip"
-world = gpd.read_file(url)
-world.loc[world['NAME'] == 'France', 'ISO_A2'] = 'FR'
-world.loc[world['NAME'] == 'Norway', 'ISO_A2'] = 'NO'
 
-gdf = world.merge(df, left_on="ISO_A2", right_on="country_code")
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "inat_taxonomy",
+        nargs="?",
+        default=INAT_DWCA_PATH,
+        help="the iNat taxonomy export (inaturalist-taxonomy.dwca.zip), zipped or extracted",
+    )
+    arg_parser.add_argument(
+        "--output",
+        help="defaults to number_of_vernacular_names_by_country_<export month>.png",
+    )
+    args = arg_parser.parse_args()
 
-gdf.plot(column="number_of_names", cmap="viridis", legend=True, figsize=(8, 6), vmax=100000)
-plt.axis("off")
-plt.savefig("number_of_vernacular_names_by_country_jan_2026.png", dpi=300)
+    main(args.inat_taxonomy, args.output)
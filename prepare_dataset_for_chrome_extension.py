@@ -1,49 +1,150 @@
 import argparse
+import gzip
 import json
 from pathlib import Path
-import shutil
+
+import numpy as np
 import pandas as pd
 
+from extract_allowed_inat_taxon_ids import load_allowed_ids
+from taxon_table import RANK_MAPPING, TaxonTable, get_taxa_to_process_mask
+
 ALL_DATASETS_DIR = Path("data-sources")
 TARGET_DIR = Path("inat-common-name-adder")
+# JSON, gzip-compressed when prepared with --gzip (the extension tells the two apart by the first bytes)
+TAXA_BUNDLE_FILE_NAME = "taxa.bundle"
+
+
+def encode_ids(ids):
+    """
+    Encodes taxon IDs compactly: sorted and de-duplicated, each ID is stored as its difference
+    from the previous one, written as an unsigned LEB128 varint (7 bits per byte, the high bit
+    telling whether another byte follows). Decoded by `decodeIds` in the extension.
+    """
+    encoded = bytearray()
+    previous_id = 0
+    for taxon_id in sorted(set(ids)):
+        delta = taxon_id - previous_id
+        previous_id = taxon_id
+        while delta >= 0x80:
+            encoded.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        encoded.append(delta)
+    return bytes(encoded)
+
+
+def load_incorrect_synonyms(dataset_dir):
+    """Maps each scientific name to the set of its synonyms noted in `incorrect_synonym_matches.csv`."""
+    path = dataset_dir / "incorrect_synonym_matches.csv"
+    if not path.exists():
+        return {}
+    df = pd.read_csv(path)
+    return df.groupby("scientificName")["incorrectSynonym"].agg(set).to_dict()
+
 
+def is_empty(value):
+    if isinstance(value, list):
+        return not value
+    return (
+        value is None
+        or value is pd.NA
+        or (isinstance(value, float) and np.isnan(value))
+    )
 
-def main(dataset_directory_name):
+
+def build_bundle(taxa, dataset_dir):
+    """
+    Returns the taxa the extension should process, reduced to what it needs: the (iNat) rank,
+    the scientific and common name, the synonyms worth searching for and the iNat taxon ID when
+    it's known already. Empty fields are left out.
+    """
+    df = taxa.df[get_taxa_to_process_mask(taxa, dataset_dir)]
+    bundle = pd.DataFrame(
+        {
+            "rank": df["rank"].replace(RANK_MAPPING),
+            "scientificName": df["scientificName"],
+            "commonName": df["commonName"],
+        }
+    )
+    if "synonyms" in df.columns:
+        incorrect_synonyms = load_incorrect_synonyms(dataset_dir)
+        bundle["synonyms"] = [
+            (
+                [
+                    synonym
+                    for synonym in dict.fromkeys(synonyms)
+                    if synonym != scientific_name
+                    and synonym not in incorrect_synonyms.get(scientific_name, ())
+                ]
+                if isinstance(synonyms, list)
+                else None
+            )
+            for scientific_name, synonyms in zip(df["scientificName"], df["synonyms"])
+        ]
+    if "inatTaxonId" in df.columns:
+        bundle["inatTaxonId"] = df["inatTaxonId"].astype("Int64")
+    return [
+        {key: value for key, value in record.items() if not is_empty(value)}
+        for record in bundle.to_dict(orient="records")
+    ]
+
+
+def main(dataset_directory_name, taxa_file="taxa.json", compress=False):
     dataset_dir = ALL_DATASETS_DIR / dataset_directory_name
 
     if not dataset_dir.exists():
         print(f"The data directory {dataset_dir} doesn't exist.")
         return
 
-    if not (dataset_dir / "taxa.json").exists():
+    if not (dataset_dir / taxa_file).exists():
         print(
-            f"The file 'taxa.json' is not found inside {dataset_dir}. Looks like you forgot to generate it."
+            f"The file '{taxa_file}' is not found inside {dataset_dir}. Looks like you forgot to generate it."
         )
         return
 
-    shutil.copyfile(dataset_dir / "taxa.json", TARGET_DIR / "taxa.json")
-
-    for file_name in [
-        "incorrect_synonym_matches",
-        "taxa_not_in_inat",
-        "taxa_already_assigned_common_name_in_inat",
-        "allowed_inat_taxon_ids",
-    ]:
-        file_path = dataset_dir / f"{file_name}.csv"
-        if file_path.exists():
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.DataFrame({"dummy_column": []})
-        if len(df.columns) > 1:
-            df.to_json(TARGET_DIR / f"{file_name}.json", orient="records")
-        else:
-            with open(TARGET_DIR / f"{file_name}.json", "w") as f:
-                json.dump(df[df.columns[0]].values.tolist(), f)
+    allowed_ids = load_allowed_ids(dataset_directory_name)
+    # no allowed IDs at all means all taxa are allowed, an empty list means none of them are
+    if allowed_ids is not None and len(allowed_ids) == 0:
+        raise ValueError(
+            f"The list of allowed iNat taxon IDs of {dataset_directory_name} is empty, i.e. its filter in "
+            f"extract_allowed_inat_taxon_ids.py doesn't match any taxon. Fix the filter and extract the IDs again."
+        )
+
+    taxa = TaxonTable(
+        pd.DataFrame(json.loads((dataset_dir / taxa_file).read_text(encoding="utf-8")))
+    )
+    bundle = build_bundle(taxa, dataset_dir)
+    bundle_bytes = json.dumps(bundle, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+    if compress:
+        bundle_bytes = gzip.compress(bundle_bytes, mtime=0)
+    (TARGET_DIR / TAXA_BUNDLE_FILE_NAME).write_bytes(bundle_bytes)
+    print(
+        f"{len(bundle)} out of {len(taxa)} taxa left to process, "
+        f"{len(bundle_bytes) / 1000:.0f} kB ({TAXA_BUNDLE_FILE_NAME})"
+    )
+
+    # an empty file tells the extension there's no list of allowed IDs
+    (TARGET_DIR / "allowed_inat_taxon_ids.bin").write_bytes(
+        encode_ids(int(taxon_id) for taxon_id in allowed_ids or [])
+    )
 
 
 if __name__ == "__main__":
     arg_parser = argparse.ArgumentParser()
     arg_parser.add_argument("data_source")
+    arg_parser.add_argument(
+        "--taxa-file",
+        default="taxa.json",
+        help="the file in the data source directory with the taxa to process, "
+        "e.g. taxa_matched_offline.json or taxa_unresolved.json",
+    )
+    arg_parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="gzip-compress the taxa bundle, the extension decompresses it on load",
+    )
     args = arg_parser.parse_args()
 
-    main(args.data_source)
+    main(args.data_source, args.taxa_file, args.gzip)
@@ -1,5 +1,6 @@
 import pandas as pd
-from pygbif import species as gbif_species
+
+from gbif_cache import GbifNameBackboneCache
 
 df_all_taxa = pd.read_csv("taxa-slovenske-mena-hmyzu.csv")
 
@@ -27,10 +28,13 @@ def get_scientific_name(taxon):
     return None
 
 
+gbif_cache = GbifNameBackboneCache()
+
+
 def fetch_synonym_from_gbif(taxon):
     print(f"=== Processing {get_scientific_name(taxon)} ({taxon['rank']}) ===")
 
-    gbif_results = gbif_species.name_backbone(
+    gbif_results = gbif_cache.name_backbone(
         name=get_scientific_name(taxon),
         rank=taxon["rank"],
         clazz="Insecta",
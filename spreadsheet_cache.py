@@ -0,0 +1,76 @@
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from inat_taxonomy import hash_file, write_atomically
+
+# in the repository's root, no matter which directory the extractors run in
+CACHE_DIR = Path(__file__).resolve().parent / ".cache" / "spreadsheets"
+FILE_HASHES_PATH = CACHE_DIR / "file_hashes.json"
+
+
+def get_cache_dir(workbook_path):
+    workbook_path = Path(workbook_path)
+    workbook_hash = hash_file(workbook_path, FILE_HASHES_PATH)
+    return CACHE_DIR / f"{workbook_path.stem}-{workbook_hash[:16]}"
+
+
+def cache_sheets(sheets, cache_dir):
+    """Saves the sheets as (uncompressed) Arrow files, skipping those Arrow can't hold (e.g. mixed-type columns)."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for sheet_name, df in sheets.items():
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            print(f"Not caching the sheet {sheet_name}: {e}")
+            continue
+        write_atomically(
+            cache_dir / f"{sheet_name}.arrow",
+            lambda tmp_path: feather.write_feather(
+                table, tmp_path, compression="uncompressed"
+            ),
+        )
+
+
+def read_cached_sheet(cache_path):
+    df = feather.read_table(cache_path).to_pandas()
+    # just like read_excel, i.e. empty cells are NaN rather than None
+    return df.fillna(np.nan)
+
+
+def read_excel_sheets(workbook_path, sheet_names):
+    """
+    Reads the sheets of the workbook into DataFrames (a dict keyed by the sheet names), just like
+    `pd.read_excel(workbook_path, sheet_name=sheet_names)`.
+
+    Each sheet is cached as an Arrow file keyed by the workbook's content hash, so the workbook only
+    gets parsed again once it changes. The sheets that aren't cached yet are all read in one pass
+    over the workbook (which openpyxl opens in read-only mode).
+    """
+    cache_dir = get_cache_dir(workbook_path)
+    sheets = {
+        sheet_name: read_cached_sheet(cache_dir / f"{sheet_name}.arrow")
+        for sheet_name in sheet_names
+        if (cache_dir / f"{sheet_name}.arrow").exists()
+    }
+    missing_sheet_names = [
+        sheet_name for sheet_name in sheet_names if sheet_name not in sheets
+    ]
+    if missing_sheet_names:
+        print(
+            f"Caching {', '.join(missing_sheet_names)} from {workbook_path}, this only happens once per workbook..."
+        )
+        start_time = time.time()
+        parsed_sheets = pd.read_excel(workbook_path, sheet_name=missing_sheet_names)
+        cache_sheets(parsed_sheets, cache_dir)
+        for stale_cache_dir in CACHE_DIR.glob(f"{Path(workbook_path).stem}-*"):
+            if stale_cache_dir != cache_dir:
+                shutil.rmtree(stale_cache_dir, ignore_errors=True)
+        sheets.update(parsed_sheets)
+        print(f"Done in {time.time() - start_time:.0f}s.")
+    return {sheet_name: sheets[sheet_name] for sheet_name in sheet_names}
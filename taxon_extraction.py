@@ -0,0 +1,239 @@
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+# the flags a rule's pattern can have, along with their inline letters
+INLINE_FLAGS = {
+    "a": re.ASCII,
+    "i": re.IGNORECASE,
+    "m": re.MULTILINE,
+    "s": re.DOTALL,
+    "x": re.VERBOSE,
+}
+
+# what pandas infers for a column of the type's values (missing values aside)
+INFERRED_DTYPES = {
+    str: {"string", "empty"},
+    bool: {"boolean", "empty"},
+    list: {"mixed", "empty"},
+}
+
+
+def rank_columns(ranks, kinds=("scientific", "common")):
+    """The `<rank>_<kind>` columns of a `taxa.csv`, e.g. `family_scientific` and `family_common`."""
+    return [f"{rank}_{kind}" for rank in ranks for kind in kinds]
+
+
+def validate_taxa(df, schema, required=("rank",)):
+    """
+    Checks the taxa against the `schema` (see TaxonTableBuilder) at once, instead of validating
+    each taxon on its own.
+    """
+    for column in required:
+        num_missing = df[column].isna().sum()
+        if num_missing:
+            raise ValueError(f"{num_missing} taxa are missing {column}")
+    for column, column_type in schema.items():
+        inferred_dtype = infer_dtype(df[column], skipna=True)
+        if inferred_dtype not in INFERRED_DTYPES[column_type]:
+            raise ValueError(
+                f"{column} should only contain {column_type.__name__} values, found {inferred_dtype}"
+            )
+        if column_type is list and not all(
+            isinstance(value, list) for value in df[column]
+        ):
+            raise ValueError(f"{column} should only contain lists")
+
+
+def fill_hierarchy(taxa, ranks):
+    """
+    The columnar counterpart of TaxonHierarchyBuilder: given the taxa of a checklist (one per row, in
+    the checklist's order) with only their own `<rank>_<kind>` columns filled in, fills in the
+    columns of the higher ranks from the last taxa of those ranks. A taxon of a higher rank ends
+    the lower-ranked taxa before it, i.e. the taxa after it don't inherit their columns.
+    """
+    taxa = taxa.reset_index(drop=True)
+    rank_levels = taxa["rank"].map({rank: level for level, rank in enumerate(ranks)})
+    rank_levels = rank_levels.to_numpy(dtype=float)
+    positions = np.arange(len(taxa))
+    for level, rank in enumerate(ranks):
+        # the position of the last taxon of the rank or of a higher one (-1 if there's none yet)
+        last_positions = np.maximum.accumulate(
+            np.where(rank_levels <= level, positions, -1)
+        )
+        inherits = (last_positions >= 0) & (rank_levels[last_positions] == level)
+        for column in taxa.columns:
+            if column.rsplit("_", 1)[0] == rank:
+                values = taxa[column].to_numpy(dtype=object)[last_positions]
+                taxa[column] = np.where(inherits, values, None)
+    return taxa
+
+
+class TaxonTableBuilder:
+    """
+    Collects the taxa extracted from a data source into the `taxa.csv` table. Each taxon is kept
+    as a plain dict of its values, the columns are only put together when the table is built.
+
+    `schema` maps each column to the type of its values (`str`, `bool` or `list`), missing values
+    being allowed except in the `required` columns. Columns with a `defaults` factory (e.g. `list`
+    for a new empty list) get its value when left out. The schema is validated once for the whole
+    table when it's built, not for every taxon.
+    """
+
+    def __init__(self, schema, required=("rank",), defaults=None):
+        self.schema = schema
+        self.required = list(required)
+        self.defaults = defaults or {}
+        self.rows = []
+
+    def append(self, **values):
+        for column, default in self.defaults.items():
+            if column not in values:
+                values[column] = default()
+        self.rows.append(values)
+
+    def last(self, column):
+        """The value of the column of the last taxon appended."""
+        return self.rows[-1].get(column)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def build(self):
+        unknown_columns = set().union(*self.rows) - self.schema.keys()
+        if unknown_columns:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown_columns))}")
+        df = pd.DataFrame(self.rows, columns=list(self.schema))
+        validate_taxa(df, self.schema, self.required)
+        return df
+
+
+class TaxonHierarchyBuilder(TaxonTableBuilder):
+    """
+    A builder for checklists listing each taxon under its parent taxa (an order, then its families,
+    then their genera, ...), `ranks` being ordered from the highest to the lowest.
+
+    A taxon only gets its own columns, it inherits the values of the higher ranks from the last
+    taxa of those ranks. A new taxon also ends the lower-ranked taxa before it, e.g. a new family
+    means no current subfamily or genus.
+    """
+
+    def __init__(self, schema, ranks, **kwargs):
+        super().__init__(schema, **kwargs)
+        self.ranks = list(ranks)
+        # the columns of each rank along with those of the lower ranks, e.g. a genus and its species
+        self.columns_from_rank = {
+            rank: [
+                column
+                for column in schema
+                if column.rsplit("_", 1)[0] in self.ranks[rank_position:]
+            ]
+            for rank_position, rank in enumerate(self.ranks)
+        }
+        self.current = {}
+
+    def append_taxon(self, rank, **values):
+        for column in self.columns_from_rank[rank]:
+            self.current.pop(column, None)
+        self.current.update(values)
+        self.append(rank=rank, **self.current)
+
+
+class LineRule:
+    """
+    A kind of line in a checklist, e.g. the heading of a family. Lines matching the `pattern` add a
+    taxon of the `rank` with the values returned by `extract` (given the match's groups and the
+    builder of the taxa), the taxa of the lower ranks before it being ended. `extract` can return
+    None to leave the line unmatched after all (e.g. a species outside of any genus). Rules without
+    a rank just skip their lines.
+    """
+
+    def __init__(self, name, pattern, rank=None, extract=None, flags=0):
+        self.name = name
+        self.pattern = re.compile(pattern, flags)
+        self.rank = rank
+        self.extract = extract
+
+
+def get_scoped_pattern(rule):
+    """
+    The rule's pattern with its own flags turned into inline ones, so that they only apply to its
+    part of the combined pattern of LineParser. Flags that can't be set inline raise a ValueError.
+    """
+    flags = rule.pattern.flags & ~re.UNICODE
+    unsupported_flags = flags & ~sum(INLINE_FLAGS.values())
+    if unsupported_flags:
+        raise ValueError(
+            f"The flags {re.RegexFlag(unsupported_flags)!r} of the rule {rule.name} can't be set inline."
+        )
+    inline_flags = "".join(
+        flag for flag, value in INLINE_FLAGS.items() if flags & value
+    )
+    if not inline_flags:
+        return rule.pattern.pattern
+    # a verbose pattern might end with a comment, which would swallow the closing parenthesis
+    end = "\n" if flags & re.VERBOSE else ""
+    return f"(?{inline_flags}:{rule.pattern.pattern}{end})"
+
+
+class LineParser:
+    """
+    Parses a checklist line by line, trying the rules in their order. The rules are combined into
+    a single pattern, i.e. each line is matched just once.
+
+    Keeps the number of lines each rule matched (hits) and was tried on but didn't match (misses),
+    along with the numbers of the lines no rule matched.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        alternatives = []
+        self.rule_group_numbers = {}
+        group_number = 1
+        for rule in self.rules:
+            alternatives.append(f"({get_scoped_pattern(rule)})")
+            self.rule_group_numbers[group_number] = (
+                rule,
+                slice(group_number, group_number + rule.pattern.groups),
+            )
+            group_number += rule.pattern.groups + 1
+        self.pattern = re.compile("|".join(alternatives))
+        self.hits = {rule.name: 0 for rule in self.rules}
+        self.unmatched_line_numbers = []
+
+    def parse(self, text, taxa):
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            match = self.pattern.match(line)
+            if match is None:
+                self.unmatched_line_numbers.append(line_number)
+                continue
+            # the rule's group encloses all of its own groups, i.e. it's the last one to close
+            rule, group_slice = self.rule_group_numbers[match.lastindex]
+            if rule.rank is not None:
+                values = rule.extract(match.groups()[group_slice], taxa)
+                if values is None:
+                    self.unmatched_line_numbers.append(line_number)
+                    continue
+                taxa.append_taxon(rule.rank, **values)
+            self.hits[rule.name] += 1
+        return taxa
+
+    def get_report(self):
+        lines = ["rule\thits\tmisses"]
+        num_lines_left = sum(self.hits.values()) + len(self.unmatched_line_numbers)
+        for rule in self.rules:
+            lines.append(
+                f"{rule.name}\t{self.hits[rule.name]}\t{num_lines_left - self.hits[rule.name]}"
+            )
+            num_lines_left -= self.hits[rule.name]
+        if self.unmatched_line_numbers:
+            lines.append(
+                f"{len(self.unmatched_line_numbers)} lines no rule matched: "
+                + ", ".join(map(str, self.unmatched_line_numbers))
+            )
+        return "\n".join(lines)
@@ -0,0 +1,127 @@
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ALL_DATASETS_DIR = Path("data-sources")
+
+# data source ranks that iNat calls differently
+RANK_MAPPING = {
+    "subspecies_hybrid": "infrahybrid",
+    "group": "complex",
+}
+RANK_MARKERS_PATTERN = r"\b(?:subsp|ssp|var|f|nothosubsp|nothovar)\.\s*|×"
+
+
+def normalize_scientific_names(names):
+    """Lower-cases the names and drops hybrid signs and rank markers (`subsp.`, `var.`, ...) iNat doesn't use."""
+    return (
+        names.str.lower()
+        .str.replace(RANK_MARKERS_PATTERN, " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def read_scientific_names(path):
+    if not path.exists():
+        return set()
+    try:
+        return set(pd.read_csv(path)["scientificName"].dropna())
+    except pd.errors.EmptyDataError:
+        # e.g. a list of taxa that's been created but not filled in yet
+        return set()
+
+
+def resolve_rank_column(df, suffix):
+    """
+    For each taxon (row), picks the value of the `<rank>_<suffix>` column matching the taxon's rank,
+    e.g. `species_scientific` for species and `genus_scientific` for genera.
+    """
+    columns = pd.Index(
+        [column for column in df.columns if column.endswith(f"_{suffix}")]
+    )
+    # taxa of a rank without its own column (or without a rank) get -1, i.e. the trailing column of None
+    column_positions = columns.get_indexer(df["rank"] + f"_{suffix}")
+    candidate_values = np.column_stack(
+        [df[columns].to_numpy(dtype=object), np.full(len(df), None, dtype=object)]
+    )
+    values = candidate_values[np.arange(len(df)), column_positions]
+    return pd.Series(values, index=df.index, dtype=object)
+
+
+class TaxonTable:
+    """
+    The taxa of a data source (its `taxa.csv`) with rank-resolved `scientificName` and `commonName`
+    columns, indexed for constant-time lookups by scientific name, common name and rank (each index
+    being built on its first use).
+
+    Name lookups are case-insensitive.
+    """
+
+    def __init__(self, df):
+        self.source_columns = list(df.columns)
+        self.df = df.reset_index(drop=True)
+        self.df["scientificName"] = resolve_rank_column(self.df, "scientific")
+        self.df["commonName"] = resolve_rank_column(self.df, "common")
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(pd.read_csv(path))
+
+    @classmethod
+    def from_data_source(cls, data_source_name):
+        return cls.from_csv(ALL_DATASETS_DIR / data_source_name / "taxa.csv")
+
+    @staticmethod
+    def _build_index(keys):
+        return keys.groupby(keys).indices
+
+    @cached_property
+    def _by_scientific_name(self):
+        return self._build_index(self.df["scientificName"].str.lower())
+
+    @cached_property
+    def _by_common_name(self):
+        return self._build_index(self.df["commonName"].str.lower())
+
+    @cached_property
+    def _by_rank(self):
+        return self._build_index(self.df["rank"])
+
+    def _rows(self, index, key):
+        return self.df.iloc[index.get(key, [])]
+
+    def find_by_scientific_name(self, scientific_name):
+        return self._rows(self._by_scientific_name, scientific_name.lower())
+
+    def find_by_common_name(self, common_name):
+        return self._rows(self._by_common_name, common_name.lower())
+
+    def find_by_rank(self, rank):
+        return self._rows(self._by_rank, rank)
+
+    def to_records(self, rows):
+        """Turns rows found by the `find_by_*` methods into dicts with just the original `taxa.csv` columns."""
+        return rows[self.source_columns].to_dict(orient="records")
+
+    def __len__(self):
+        return len(self.df)
+
+
+def get_taxa_to_process_mask(taxa, dataset_dir):
+    """
+    Tells which taxa the extension has got something to do with: those with both names that aren't
+    listed in `taxa_not_in_inat.csv` or `taxa_already_assigned_common_name_in_inat.csv`.
+    """
+    listed_taxa = read_scientific_names(
+        dataset_dir / "taxa_not_in_inat.csv"
+    ) | read_scientific_names(
+        dataset_dir / "taxa_already_assigned_common_name_in_inat.csv"
+    )
+    return (
+        taxa.df["scientificName"].notna()
+        & taxa.df["commonName"].notna()
+        & ~taxa.df["scientificName"].isin(listed_taxa)
+    )
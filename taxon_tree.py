@@ -0,0 +1,170 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from inat_taxonomy import load_inat_taxa
+
+MAX_DEPTH = 1000
+
+
+def parse_parent_ids(parent_name_usage_ids):
+    """Turns `parentNameUsageID` URLs (https://www.inaturalist.org/taxa/<id>) into integer taxon IDs (-1 for none)."""
+    parent_ids = parent_name_usage_ids.astype(pd.ArrowDtype(pa.string()))
+    parent_ids = parent_ids.str.replace(r"^.*/", "", regex=True)
+    return parent_ids.astype("int64[pyarrow]").fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _group_offsets(group_keys, sizes):
+    """For rows sorted by `group_keys`, returns the sum of `sizes` of the preceding rows of the same group."""
+    exclusive_cumsum = np.cumsum(sizes) - sizes
+    is_group_start = np.ones(len(group_keys), dtype=bool)
+    is_group_start[1:] = group_keys[1:] != group_keys[:-1]
+    group_starts = np.maximum.accumulate(
+        np.where(is_group_start, np.arange(len(group_keys)), 0)
+    )
+    return exclusive_cumsum - exclusive_cumsum[group_starts]
+
+
+class TaxonTree:
+    """
+    The iNat taxonomy tree (built from `parentNameUsageID`) as nested-set intervals.
+
+    Taxa are numbered in depth-first (pre-order) order, so the subtree of a taxon occupies the
+    contiguous range of positions `left..right` and "is X a descendant of Y" becomes two integer
+    comparisons. Siblings are ordered by their ID, taxa whose parent isn't in the taxonomy are roots.
+    """
+
+    def __init__(self, ids, parent_ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        parent_ids = np.asarray(parent_ids, dtype=np.int64)
+        self.ids = ids
+        self._row_by_id = np.full(ids.max() + 1, -1, dtype=np.int64)
+        self._row_by_id[ids] = np.arange(len(ids))
+
+        known_parent = (parent_ids >= 0) & (parent_ids <= ids.max())
+        self.parent_rows = np.full(len(ids), -1, dtype=np.int64)
+        self.parent_rows[known_parent] = self._row_by_id[parent_ids[known_parent]]
+
+        self.depths = self._compute_depths()
+        sizes = self._compute_subtree_sizes()
+        self.left = self._compute_left(sizes)
+        self.right = self.left + sizes - 1
+        self.preorder_ids = np.empty(len(ids), dtype=np.int64)
+        self.preorder_ids[self.left] = ids
+
+    @classmethod
+    def from_taxa(cls, df):
+        """Builds the tree from taxa with the `id` and `parentNameUsageID` columns of `all_inat_taxa.csv`."""
+        return cls(df["id"].to_numpy(), parse_parent_ids(df["parentNameUsageID"]))
+
+    @classmethod
+    def load(cls, inat_taxonomy_path=None):
+        return cls.from_taxa(
+            load_inat_taxa(["id", "parentNameUsageID"], inat_taxonomy_path)
+        )
+
+    def _compute_depths(self):
+        depths = np.zeros(len(self.ids), dtype=np.int64)
+        ancestor_rows = self.parent_rows.copy()
+        has_ancestor = ancestor_rows >= 0
+        while has_ancestor.any():
+            if depths.max() > MAX_DEPTH:
+                raise ValueError("The taxonomy contains a cycle of parentNameUsageIDs.")
+            depths[has_ancestor] += 1
+            ancestor_rows[has_ancestor] = self.parent_rows[ancestor_rows[has_ancestor]]
+            has_ancestor = ancestor_rows >= 0
+        return depths
+
+    def _rows_by_depth(self):
+        order = np.argsort(self.depths, kind="stable")
+        boundaries = np.searchsorted(
+            self.depths[order], np.arange(self.depths.max() + 2)
+        )
+        return [
+            order[boundaries[depth] : boundaries[depth + 1]]
+            for depth in range(self.depths.max() + 1)
+        ]
+
+    def _compute_subtree_sizes(self):
+        sizes = np.ones(len(self.ids), dtype=np.int64)
+        for rows in reversed(self._rows_by_depth()[1:]):
+            sizes += np.bincount(
+                self.parent_rows[rows], weights=sizes[rows], minlength=len(sizes)
+            ).astype(np.int64)
+        return sizes
+
+    def _compute_left(self, sizes):
+        left = np.empty(len(self.ids), dtype=np.int64)
+        rows_by_depth = self._rows_by_depth()
+
+        roots = rows_by_depth[0][np.argsort(self.ids[rows_by_depth[0]])]
+        left[roots] = np.cumsum(sizes[roots]) - sizes[roots]
+        for rows in rows_by_depth[1:]:
+            rows = rows[np.lexsort((self.ids[rows], self.parent_rows[rows]))]
+            parents = self.parent_rows[rows]
+            left[rows] = left[parents] + 1 + _group_offsets(parents, sizes[rows])
+        return left
+
+    def _rows(self, taxon_ids):
+        taxon_ids = np.asarray(taxon_ids, dtype=np.int64)
+        in_range = (taxon_ids >= 0) & (taxon_ids < len(self._row_by_id))
+        return np.where(
+            in_range, self._row_by_id[np.where(in_range, taxon_ids, -1)], -1
+        )
+
+    def _row(self, taxon_id):
+        row = self._rows([taxon_id])[0]
+        if row < 0:
+            raise KeyError(f"There's no taxon with the ID {taxon_id} in the taxonomy.")
+        return row
+
+    def __contains__(self, taxon_id):
+        return self._rows([taxon_id])[0] >= 0
+
+    def is_descendant(self, taxon_id, ancestor_id, include_self=False):
+        row, ancestor_row = self._row(taxon_id), self._row(ancestor_id)
+        if row == ancestor_row:
+            return include_self
+        return self.left[ancestor_row] < self.left[row] <= self.right[ancestor_row]
+
+    def descendants(self, taxon_id, include_self=False):
+        """Returns the IDs of all the taxa in the subtree of the given taxon, in depth-first order."""
+        row = self._row(taxon_id)
+        start = self.left[row] if include_self else self.left[row] + 1
+        return self.preorder_ids[start : self.right[row] + 1]
+
+    def ancestors(self, taxon_id):
+        """Returns the IDs of the taxon's ancestors, from its parent up to the root."""
+        ancestor_ids = []
+        row = self.parent_rows[self._row(taxon_id)]
+        while row >= 0:
+            ancestor_ids.append(int(self.ids[row]))
+            row = self.parent_rows[row]
+        return ancestor_ids
+
+    def descendant_mask(self, taxon_ids, ancestor_ids, include_self=True):
+        """Returns a boolean mask telling which of `taxon_ids` lie in the subtree of any of `ancestor_ids`."""
+        rows = self._rows(taxon_ids)
+        positions = np.where(rows >= 0, self.left[rows], -1)
+        mask = np.zeros(len(positions), dtype=bool)
+        for ancestor_id in ancestor_ids:
+            ancestor_row = self._row(ancestor_id)
+            start = self.left[ancestor_row] + (0 if include_self else 1)
+            mask |= (positions >= start) & (positions <= self.right[ancestor_row])
+        return mask
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("taxon_ids", nargs="+", type=int)
+    arg_parser.add_argument("--inat-taxonomy")
+    args = arg_parser.parse_args()
+
+    tree = TaxonTree.load(args.inat_taxonomy)
+    for taxon_id in args.taxon_ids:
+        print(
+            f"{taxon_id}: {len(tree.descendants(taxon_id))} descendants, "
+            f"ancestors: {' < '.join(map(str, tree.ancestors(taxon_id)))}"
+        )
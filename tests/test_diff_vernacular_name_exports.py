@@ -0,0 +1,90 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from diff_vernacular_name_exports import (
+    CHANGE_ADDED,
+    CHANGE_CONTRIBUTOR,
+    CHANGE_RECASED,
+    CHANGE_REMOVED,
+    diff_exports,
+    read_export_chunks,
+)
+from inat_taxonomy import DwcaArchive
+
+OLD_EXPORT = """id,vernacularName,language,locality,countryCode,source,lexicon,contributor,created
+1,smrek obyčajný,sk,,,,Slovak,Fero Bednar,2020-01-01T00:00:00Z
+2,jedľa biela,sk,,,,Slovak,Fero Bednar,2020-01-01T00:00:00Z
+3,Borovica lesná,sk,,,,Slovak,,2020-01-01T00:00:00Z
+4,tis obyčajný,sk,,,,Slovak,Fero Bednar,2020-01-01T00:00:00Z
+4,tis,sk,,,,Slovak,Fero Bednar,2020-01-01T00:00:00Z
+"""
+NEW_EXPORT = """id,vernacularName,language,locality,countryCode,source,lexicon,contributor,created
+1,smrek obyčajný,sk,,,,Slovak,Fero Bednar,2020-01-01T00:00:00Z
+2,jedľa biela,sk,,,,Slovak,Jana Kováčová,2020-01-01T00:00:00Z
+3,borovica lesná,sk,,,,Slovak,,2020-01-01T00:00:00Z
+4,tis,sk,,,,Slovak,Fero Bednar,2020-01-01T00:00:00Z
+5,buk lesný,sk,,,,Slovak,Jana Kováčová,2026-01-01T00:00:00Z
+"""
+META_XML = """<archive xmlns="http://rs.tdwg.org/dwc/text/">
+  <extension encoding="UTF-8" fieldsTerminatedBy="," fieldsEnclosedBy="&quot;" ignoreHeaderLines="1" rowType="http://rs.gbif.org/terms/1.0/VernacularName">
+    <files><location>VernacularNames-slovak.csv</location></files>
+  </extension>
+</archive>
+"""
+
+
+class DiffExportsTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.old_path = self.tmp_dir / "old.csv"
+        self.old_path.write_text(OLD_EXPORT)
+        self.new_path = self.tmp_dir / "new.csv"
+        self.new_path.write_text(NEW_EXPORT)
+
+    def test_changes(self):
+        # a chunk size of 2 makes sure the changes are put together across chunks
+        diff_df = diff_exports(self.old_path, self.new_path, chunksize=2)
+
+        self.assertEqual(
+            diff_df[["change", "id", "vernacularName", "previousVernacularName"]]
+            .astype(object)
+            .where(diff_df.notna(), None)
+            .values.tolist(),
+            [
+                [CHANGE_CONTRIBUTOR, 2, "jedľa biela", "jedľa biela"],
+                [CHANGE_RECASED, 3, "borovica lesná", "Borovica lesná"],
+                [CHANGE_ADDED, 5, "buk lesný", None],
+                [CHANGE_REMOVED, 4, None, "tis obyčajný"],
+            ],
+        )
+        self.assertEqual(
+            diff_df.loc[0, ["contributor", "previousContributor"]].tolist(),
+            ["Jana Kováčová", "Fero Bednar"],
+        )
+
+    def test_same_exports(self):
+        self.assertTrue(diff_exports(self.old_path, self.old_path).empty)
+
+    def test_zipped_export_is_closed_when_reading_stops_early(self):
+        export_path = self.tmp_dir / "inaturalist-taxonomy.dwca.zip"
+        with zipfile.ZipFile(export_path, "w") as export:
+            export.writestr("meta.xml", META_XML)
+            export.writestr("VernacularNames-slovak.csv", NEW_EXPORT)
+
+        with mock.patch.object(
+            DwcaArchive, "close", autospec=True, side_effect=DwcaArchive.close
+        ) as close:
+            chunks = read_export_chunks(export_path, chunksize=2)
+            self.assertEqual(next(chunks)["id"].tolist(), [1, 2])
+            chunks.close()
+
+        close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
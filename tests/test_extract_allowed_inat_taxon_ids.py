@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import extract_allowed_inat_taxon_ids
+import inat_taxonomy
+from extract_allowed_inat_taxon_ids import get_filter_mask, main
+
+# Animalia (1) > Insecta (2) > Hymenoptera (3) > Apidae (4) > Apis mellifera (5)
+#                                               > Vespidae (6)
+#              > Aves (7)
+# Plantae (8)
+INAT_TAXA = pd.DataFrame(
+    {
+        "id": [1, 2, 3, 4, 5, 6, 7, 8],
+        "parentNameUsageID": [None]
+        + [f"https://www.inaturalist.org/taxa/{i}" for i in [1, 2, 3, 4, 3, 1]]
+        + [None],
+        "kingdom": ["Animalia"] * 7 + ["Plantae"],
+        "class": [None, "Insecta", "Insecta", "Insecta", "Insecta", "Insecta"]
+        + ["Aves", None],
+        "order": [None, None] + ["Hymenoptera"] * 4 + [None, None],
+        "scientificName": ["Animalia", "Insecta", "Hymenoptera", "Apidae"]
+        + ["Apis mellifera", "Vespidae", "Aves", "Plantae"],
+        "taxonRank": ["kingdom", "class", "order", "family", "species", "family"]
+        + ["class", "kingdom"],
+    }
+)
+TAXON_FILTERS = {
+    "insects": {"class": ["Insecta"]},
+    "bees-and-wasps": {"descendantsOf": [4, 6]},
+    "animal-species": lambda taxon: taxon["taxonRank"] == "species",
+    "animals-but-no-birds": {"kingdom": "Animalia", "class": [None, "Insecta"]},
+    "fungi": {"kingdom": "Fungi"},
+}
+
+
+class FilterMaskTest(unittest.TestCase):
+    def get_ids(self, taxon_filter):
+        return INAT_TAXA["id"][get_filter_mask(INAT_TAXA, taxon_filter)].tolist()
+
+    def test_filters(self):
+        self.assertEqual(self.get_ids(TAXON_FILTERS["insects"]), [2, 3, 4, 5, 6])
+        self.assertEqual(self.get_ids(TAXON_FILTERS["bees-and-wasps"]), [4, 5, 6])
+        self.assertEqual(self.get_ids(TAXON_FILTERS["animal-species"]), [5])
+        self.assertEqual(
+            self.get_ids({"descendantsOf": 2, "order": "Hymenoptera"}), [3, 4, 5, 6]
+        )
+        self.assertEqual(self.get_ids(TAXON_FILTERS["fungi"]), [])
+
+
+class ExtractAllowedIdsTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp_dir.name)
+        # keep the taxonomy cache of the fixture out of the repository's one
+        cache_patch = mock.patch.multiple(
+            inat_taxonomy,
+            CACHE_DIR=Path(".cache").resolve(),
+            FILE_HASHES_PATH=Path(".cache", "file_hashes.json").resolve(),
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+        INAT_TAXA.to_csv("all_inat_taxa.csv", index=False)
+        for data_source_name in TAXON_FILTERS:
+            (Path("data-sources") / data_source_name).mkdir(parents=True)
+
+        taxon_filters_patch = mock.patch.dict(
+            extract_allowed_inat_taxon_ids.taxon_filters, TAXON_FILTERS, clear=True
+        )
+        taxon_filters_patch.start()
+        self.addCleanup(taxon_filters_patch.stop)
+
+    def read_allowed_ids(self, data_source_name):
+        dataset_dir = Path("data-sources") / data_source_name
+        allowed_ids = pd.read_csv(dataset_dir / "allowed_inat_taxon_ids.csv")
+        self.assertEqual(
+            json.loads((dataset_dir / "allowed_inat_taxon_ids.json").read_text()),
+            allowed_ids["id"].tolist(),
+        )
+        return allowed_ids["id"].tolist()
+
+    def test_all_data_sources(self):
+        main([], "all_inat_taxa.csv", all_data_sources=True)
+
+        self.assertEqual(
+            {name: self.read_allowed_ids(name) for name in TAXON_FILTERS},
+            {
+                "insects": [2, 3, 4, 5, 6],
+                "bees-and-wasps": [4, 5, 6],
+                "animal-species": [5],
+                "animals-but-no-birds": [1, 2, 3, 4, 5, 6],
+                "fungi": [],
+            },
+        )
+
+    def test_unknown_data_source(self):
+        with self.assertRaises(SystemExit):
+            main(["insects", "no-such-source", "bees-and-wasps"], "all_inat_taxa.csv")
+
+        # not even the data sources before the unknown one get their IDs
+        self.assertEqual(list(Path("data-sources").glob("*/*.csv")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from benchmark_taxon_extraction import ALL_DATASETS_DIR, load_extractor
+from spreadsheet_cache import read_excel_sheets
+
+BIRDS_DATA_SOURCE_NAME = "slovenske-mena-vtakov-sveta-2020"
+
+
+class BirdExtractionTest(unittest.TestCase):
+    def test_extracted_taxa_match_the_committed_ones(self):
+        dataset_dir = ALL_DATASETS_DIR / BIRDS_DATA_SOURCE_NAME
+        extractor = load_extractor(BIRDS_DATA_SOURCE_NAME)
+        species_raw_data = read_excel_sheets(
+            dataset_dir / "SMVS_13_aug_2020.xlsx", [extractor.SHEET_NAME]
+        )[extractor.SHEET_NAME]
+
+        taxon_df = extractor.extract_species(species_raw_data)
+
+        self.assertEqual(
+            taxon_df.to_csv(index=False),
+            (dataset_dir / "taxa.csv").read_text(encoding="utf-8"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
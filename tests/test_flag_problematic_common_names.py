@@ -0,0 +1,41 @@
+import unittest
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from flag_problematic_common_names import lint_common_names, looks_latin
+
+SLOVAK_EXPORT_PATH = Path(__file__).parents[1] / "VernacularNames-slovak-dec.csv"
+
+
+def to_names(names):
+    return pd.Series(names).astype(pd.ArrowDtype(pa.string()))
+
+
+class LatinRuleTest(unittest.TestCase):
+    def test_latin_names(self):
+        names = [
+            "Ranunculaceae",
+            "ružovité (Rosaceae)",
+            "čeľaď Apidae",
+            "Rosales",
+            "Carabus spp.",
+        ]
+        self.assertTrue(looks_latin(to_names(names), "slovak").all())
+
+    def test_vernacular_names_with_latin_looking_endings(self):
+        names = ["vinič hroznorodý", "viničovité", "pavinič", "alagoptera piesočná"]
+        self.assertFalse(looks_latin(to_names(names), "slovak").any())
+
+    def test_slovak_export(self):
+        common_names_df = pd.read_csv(SLOVAK_EXPORT_PATH)
+        common_names_df = common_names_df[common_names_df["vernacularName"].notna()]
+        problematic_df = lint_common_names(common_names_df, "slovak", ["latin"])
+        self.assertFalse(
+            problematic_df["vernacularName"].str.contains("vinič", case=False).any()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import add_synonyms_to_problematic_taxa_using_gbif as add_synonyms
+from gbif_cache import GbifNameBackboneCache
+from gbif_client import GbifClient
+
+
+class GbifStandIn:
+    """
+    A local stand-in of the GBIF species match API. Answers every name with an accepted exact
+    match, except that each name listed in `failures` first gets that HTTP status (e.g. 429).
+    """
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {
+                    key: values[0]
+                    for key, values in parse_qs(urlparse(self.path).query).items()
+                }
+                stand_in.requests.append((urlparse(self.path).path, query))
+                status = stand_in.failures.pop(query["name"], None)
+                if status is not None:
+                    self.send_response(status)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                body = json.dumps(
+                    {
+                        "matchType": "EXACT",
+                        "status": "ACCEPTED",
+                        "rank": query["rank"].upper(),
+                        "canonicalName": query["name"],
+                    }
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1/"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_data_source(tmp_dir):
+    datasets_dir = Path(tmp_dir) / "data-sources"
+    dataset_dir = datasets_dir / "test-source"
+    dataset_dir.mkdir(parents=True)
+    (dataset_dir / "taxa.csv").write_text(
+        "rank,genus_scientific,species_scientific,species_common\n"
+        "genus,Apis,,\n"
+        "species,Apis,Apis mellifera,včela medonosná\n"
+        "species,Bombus,Bombus terrestris,čmeľ zemný\n"
+    )
+    (dataset_dir / "problematic_taxa.csv").write_text(
+        "scientificName\nBombus terrestris\nApis mellifera\n"
+    )
+    return datasets_dir, dataset_dir
+
+
+class GbifClientTest(unittest.TestCase):
+    def test_name_backbone_retries_throttled_requests(self):
+        with GbifStandIn(failures={"Apis mellifera": 429}) as stand_in:
+            client = GbifClient(stand_in.url, backoff_seconds=0)
+            response = client.name_backbone("Apis mellifera", rank="species")
+
+        self.assertEqual(response["canonicalName"], "Apis mellifera")
+        self.assertEqual(len(stand_in.requests), 2)
+        path, query = stand_in.requests[-1]
+        self.assertEqual(path, "/v1/species/match")
+        self.assertEqual(query["rank"], "species")
+        self.assertEqual(query["strict"], "false")
+
+    def test_script_against_stand_in_keeps_real_cache_entries_apart(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            datasets_dir, dataset_dir = make_data_source(tmp_dir)
+            cache_path = Path(tmp_dir) / "gbif_name_backbone.sqlite"
+
+            with GbifStandIn(failures={"Bombus terrestris": 503}) as stand_in:
+                with mock.patch.object(add_synonyms, "ALL_DATASETS_DIR", datasets_dir):
+                    add_synonyms.main(
+                        "test-source",
+                        gbif_mode="cached",
+                        cache_path=cache_path,
+                        gbif_api_url=stand_in.url,
+                    )
+
+            taxa = json.loads(
+                (dataset_dir / "problematic_taxa_with_synonyms.json").read_text()
+            )
+            self.assertEqual(
+                [(taxon["species_scientific"], taxon["synonyms"]) for taxon in taxa],
+                [
+                    ("Bombus terrestris", ["Bombus terrestris"]),
+                    ("Apis mellifera", ["Apis mellifera"]),
+                ],
+            )
+
+            fetched_from_gbif = []
+            gbif_cache = GbifNameBackboneCache(
+                cache_path,
+                fetch=lambda **query: fetched_from_gbif.append(query) or {},
+            )
+            gbif_cache.name_backbone(
+                "Apis mellifera",
+                rank="species",
+                clazz="Insecta",
+                strict=True,
+                verbose=True,
+            )
+            gbif_cache.close()
+            self.assertEqual(len(fetched_from_gbif), 1)
+
+    def test_checkpoint_is_only_reused_with_the_same_source(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            datasets_dir, dataset_dir = make_data_source(tmp_dir)
+
+            def run(stand_in):
+                with mock.patch.object(add_synonyms, "ALL_DATASETS_DIR", datasets_dir):
+                    add_synonyms.main(
+                        "test-source", gbif_mode="online", gbif_api_url=stand_in.url
+                    )
+                return len(stand_in.requests)
+
+            with GbifStandIn() as stand_in:
+                self.assertEqual(run(stand_in), 2)
+                self.assertEqual(run(stand_in), 2)
+            with GbifStandIn() as other_stand_in:
+                self.assertEqual(run(other_stand_in), 2)
+                with open(dataset_dir / "problematic_taxa.csv", "a") as f:
+                    f.write("Apis\n")
+                self.assertEqual(run(other_stand_in), 3)
+                self.assertEqual(other_stand_in.requests[-1][1]["name"], "Apis")
+
+
+if __name__ == "__main__":
+    unittest.main()
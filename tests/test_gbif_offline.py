@@ -0,0 +1,95 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from add_synonyms_to_problematic_taxa_using_gbif import fetch_synonym_from_gbif
+from gbif_offline import OfflineGbifBackbone, import_backbone
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "gbif-backbone"
+
+
+class OfflineGbifBackboneTest(unittest.TestCase):
+    """Imports a tiny GBIF backbone archive (with its \\N nulls) and checks what the resolver answers."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        archive_path = Path(cls.tmp_dir.name) / "backbone.zip"
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for file_name in ["Taxon.tsv", "VernacularName.tsv"]:
+                archive.write(FIXTURES_DIR / file_name, f"backbone/{file_name}")
+        cls.db_path = Path(cls.tmp_dir.name) / "gbif_backbone.sqlite"
+        import_backbone(archive_path, cls.db_path)
+        cls.backbone = OfflineGbifBackbone(cls.db_path)
+        cls.online_responses = json.loads(
+            (FIXTURES_DIR / "name_backbone_responses.json").read_text()
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backbone.close()
+        cls.tmp_dir.cleanup()
+
+    def test_import_maps_nulls_to_none(self):
+        connection = sqlite3.connect(self.db_path)
+        usages = connection.execute("SELECT * FROM usage").fetchall()
+        connection.close()
+
+        # the name without a canonical name is left out
+        self.assertEqual(len(usages), 11)
+        self.assertNotIn(r"\N", [value for usage in usages for value in usage])
+        self.assertEqual(
+            usages[0],
+            (1, None, "Animalia", "animalia", "KINGDOM", "ACCEPTED")
+            + ("Animalia", None, None, None, None, None),
+        )
+
+    def test_responses_have_the_shape_of_online_ones(self):
+        for example in self.online_responses:
+            with self.subTest(example["query"]["name"]):
+                online_response = example["response"]
+                offline_response = self.backbone.name_backbone(**example["query"])
+
+                self.assertLessEqual(offline_response.keys(), online_response.keys())
+                for key, value in offline_response.items():
+                    self.assertIsInstance(value, type(online_response[key]), key)
+                for key in [
+                    "usageKey",
+                    "acceptedUsageKey",
+                    "canonicalName",
+                    "rank",
+                    "status",
+                    "matchType",
+                    "class",
+                    "genus",
+                    "species",
+                ]:
+                    self.assertEqual(
+                        offline_response.get(key), online_response.get(key), key
+                    )
+
+    def test_synonyms_are_the_same_as_online(self):
+        for example in self.online_responses:
+            query = example["query"]
+            taxon = {
+                "rank": query["rank"],
+                f"{query['rank']}_scientific": query["name"],
+            }
+            with self.subTest(query["name"]):
+                self.assertEqual(
+                    fetch_synonym_from_gbif(taxon, self.backbone.name_backbone),
+                    fetch_synonym_from_gbif(taxon, lambda **query: example["response"]),
+                )
+
+    def test_unranked_names(self):
+        response = self.backbone.name_backbone("Anthophila")
+        self.assertEqual(response["matchType"], "EXACT")
+        self.assertIsNone(response["rank"])
+        self.assertEqual(response["order"], "Hymenoptera")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import inat_taxonomy
+from inat_taxonomy import load_inat_taxa
+
+NUM_TAXA = 50_000
+
+
+def load_taxon_ids(working_dir):
+    os.chdir(working_dir)
+    cache_dir = Path(working_dir) / ".cache"
+    with mock.patch.multiple(
+        inat_taxonomy,
+        CACHE_DIR=cache_dir,
+        FILE_HASHES_PATH=cache_dir / "file_hashes.json",
+    ):
+        return load_inat_taxa(["id"], "all_inat_taxa.csv")["id"].sum()
+
+
+class ConcurrentCacheTest(unittest.TestCase):
+    def test_processes_building_the_cache_at_once(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pd.DataFrame(
+                {
+                    "id": range(1, NUM_TAXA + 1),
+                    "scientificName": [f"Taxon {i}" for i in range(NUM_TAXA)],
+                    "taxonRank": "species",
+                    "kingdom": "Animalia",
+                }
+            ).to_csv(Path(tmp_dir) / "all_inat_taxa.csv", index=False)
+
+            with ProcessPoolExecutor(8) as executor:
+                id_sums = list(executor.map(load_taxon_ids, [tmp_dir] * 16))
+
+            self.assertEqual(set(id_sums), {NUM_TAXA * (NUM_TAXA + 1) // 2})
+            cache_dir = Path(tmp_dir) / ".cache"
+            self.assertEqual(len(list(cache_dir.glob("*.arrow"))), 1)
+            self.assertEqual(list(cache_dir.glob("*.tmp")), [])
+            known_hashes = json.loads((cache_dir / "file_hashes.json").read_text())
+            self.assertEqual(len(known_hashes), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
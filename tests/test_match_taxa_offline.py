@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import inat_taxonomy
+from match_taxa_offline import main
+
+META_XML = """<archive xmlns="http://rs.tdwg.org/dwc/text/">
+  <core encoding="UTF-8" fieldsTerminatedBy="," fieldsEnclosedBy="&quot;" ignoreHeaderLines="1" rowType="http://rs.tdwg.org/dwc/terms/Taxon">
+    <files><location>taxa.csv</location></files>
+  </core>
+  <extension encoding="UTF-8" fieldsTerminatedBy="," fieldsEnclosedBy="&quot;" ignoreHeaderLines="1" rowType="http://rs.gbif.org/terms/1.0/VernacularName">
+    <files><location>VernacularNames-slovak.csv</location></files>
+  </extension>
+</archive>
+"""
+INAT_TAXA = """id,scientificName,taxonRank,kingdom
+10,Apis mellifera,species,Animalia
+20,Bombus terrestris,species,Animalia
+30,Osmia,genus,Animalia
+31,Osmia,genus,Plantae
+40,Xylocopa violacea,species,Animalia
+41,Xylocopa valga,species,Animalia
+50,Bombus rupestris,species,Animalia
+60,Andrena fulva,species,Animalia
+"""
+INAT_VERNACULAR_NAMES = """id,vernacularName
+20,čmeľ zemný
+41,drevár fialový
+"""
+TAXA = """rank,genus_scientific,genus_common,species_scientific,species_common
+species,,,Apis mellifera,včela medonosná
+species,,,Bombus terrestris,čmeľ hájny
+species,,,Vespa crabro,sršeň obyčajný
+genus,Osmia,murárka,,
+species,,,Xylocopa violacea,Drevár fialový
+species,,,Andrena fulva,pieskárka ryšavá
+species,,,Psithyrus rupestris,pačmeľ skalný
+species,,,Bombus pascuorum,
+"""
+
+
+class MatchTaxaOfflineTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp_dir.name)
+        # keep the taxonomy cache of the fixture out of the repository's one
+        cache_patch = mock.patch.multiple(
+            inat_taxonomy,
+            CACHE_DIR=Path(".cache").resolve(),
+            FILE_HASHES_PATH=Path(".cache", "file_hashes.json").resolve(),
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+        self.inat_export_dir = Path("inaturalist-taxonomy")
+        self.inat_export_dir.mkdir()
+        (self.inat_export_dir / "meta.xml").write_text(META_XML)
+        (self.inat_export_dir / "taxa.csv").write_text(INAT_TAXA)
+        (self.inat_export_dir / "VernacularNames-slovak.csv").write_text(
+            INAT_VERNACULAR_NAMES
+        )
+
+        self.dataset_dir = Path("data-sources") / "test-source"
+        self.dataset_dir.mkdir(parents=True)
+        (self.dataset_dir / "taxa.csv").write_text(TAXA)
+        (self.dataset_dir / "taxa_not_in_inat.csv").write_text(
+            "scientificName\nAndrena fulva\n"
+        )
+        (self.dataset_dir / "problematic_taxa_with_synonyms.json").write_text(
+            json.dumps(
+                [
+                    {
+                        "rank": "species",
+                        "species_scientific": "Psithyrus rupestris",
+                        "synonyms": ["Bombus rupestris"],
+                    }
+                ]
+            )
+        )
+
+    def test_outcomes(self):
+        main("test-source", self.inat_export_dir)
+
+        report_df = pd.read_csv(
+            self.dataset_dir / "offline_matches.csv", dtype={"iNatTaxonId": "Int64"}
+        )
+        self.assertEqual(
+            report_df[["scientificName", "status", "iNatTaxonId", "reason"]]
+            .astype(object)
+            .where(report_df.notna(), None)
+            .values.tolist(),
+            [
+                ["Apis mellifera", "resolved", 10, None],
+                ["Bombus terrestris", "already named", 20, "iNat name: čmeľ zemný"],
+                ["Vespa crabro", "not found", None, None],
+                ["Osmia", "ambiguous", None, "candidate iNat taxa: 30, 31"],
+                [
+                    "Xylocopa violacea",
+                    "already named",
+                    40,
+                    "the common name is used in iNat",
+                ],
+                ["Andrena fulva", "not found", None, "taxa_not_in_inat.csv"],
+                ["Psithyrus rupestris", "resolved", 50, None],
+            ],
+        )
+
+        taxa_to_process = json.loads(
+            (self.dataset_dir / "taxa_matched_offline.json").read_text()
+        )
+        self.assertEqual(
+            [
+                (
+                    taxon["species_scientific"] or taxon["genus_scientific"],
+                    taxon["inatTaxonId"],
+                )
+                for taxon in taxa_to_process
+            ],
+            [
+                ("Apis mellifera", 10),
+                ("Vespa crabro", None),
+                ("Osmia", None),
+                ("Psithyrus rupestris", 50),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pipeline
+from gbif_offline import DEFAULT_BACKBONE_DB_PATH
+from pipeline import (
+    ALLOWED_IDS_STEP_NAME,
+    STATUS_BLOCKED,
+    STATUS_FAILED,
+    STATUS_RAN,
+    STATUS_SKIPPED,
+    Pipeline,
+    Step,
+    get_data_source_steps,
+)
+
+# appends the step's name to the log and writes its inputs, concatenated, as its output
+COPY_SCRIPT = """
+import sys
+name, log_path, output_path, *input_paths = sys.argv[1:]
+with open(log_path, "a") as log_file:
+    log_file.write(name + "\\n")
+with open(output_path, "w") as output_file:
+    output_file.write(name + "".join(open(path).read() for path in input_paths))
+"""
+FAILING_SCRIPT = "import sys; sys.exit('something went wrong')"
+
+DATA_SOURCE_NAME = "slovenske-mena-hmyzu-1975"
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.log_path = self.tmp_dir / "log.txt"
+        self.state_path = self.tmp_dir / "state" / "state.json"
+        file_hashes_patch = mock.patch.object(
+            pipeline, "FILE_HASHES_PATH", self.tmp_dir / "state" / "file_hashes.json"
+        )
+        file_hashes_patch.start()
+        self.addCleanup(file_hashes_patch.stop)
+
+        (self.tmp_dir / "source.txt").write_text("source")
+        # c depends on b, which depends on a, the steps being listed in the reverse order
+        self.steps = [
+            self.make_step("c", ["b.txt"], depends_on=["b"]),
+            self.make_step("b", ["a.txt"], depends_on=["a"]),
+            self.make_step("a", ["source.txt"]),
+        ]
+
+    def make_step(self, name, input_names, depends_on=(), script=COPY_SCRIPT):
+        inputs = [self.tmp_dir / input_name for input_name in input_names]
+        output = self.tmp_dir / f"{name}.txt"
+        return Step(
+            name,
+            [sys.executable, "-c", script, name, self.log_path, output, *inputs],
+            inputs,
+            [output],
+            depends_on=depends_on,
+        )
+
+    def run_pipeline(self, steps=None, force=False):
+        self.log_path.unlink(missing_ok=True)
+        results = Pipeline(steps or self.steps, self.state_path, force=force).run(4)
+        ran = self.log_path.read_text().split() if self.log_path.exists() else []
+        return {name: status for name, (status, _) in results.items()}, ran
+
+    def test_steps_run_in_the_order_of_their_dependencies(self):
+        statuses, ran = self.run_pipeline()
+
+        self.assertEqual(ran, ["a", "b", "c"])
+        self.assertEqual(set(statuses.values()), {STATUS_RAN})
+        self.assertEqual((self.tmp_dir / "c.txt").read_text(), "cbasource")
+
+    def test_steps_are_skipped_until_their_inputs_change(self):
+        self.run_pipeline()
+
+        statuses, ran = self.run_pipeline()
+        self.assertEqual(ran, [])
+        self.assertEqual(set(statuses.values()), {STATUS_SKIPPED})
+
+        (self.tmp_dir / "source.txt").write_text("changed source")
+        statuses, ran = self.run_pipeline()
+        self.assertEqual(ran, ["a", "b", "c"])
+
+    def test_step_with_a_missing_output_runs_again(self):
+        self.run_pipeline()
+        (self.tmp_dir / "b.txt").unlink()
+
+        statuses, ran = self.run_pipeline()
+
+        # b writes the same output again, so c has nothing to do
+        self.assertEqual(ran, ["b"])
+        self.assertEqual(statuses["a"], STATUS_SKIPPED)
+        self.assertEqual(statuses["c"], STATUS_SKIPPED)
+
+    def test_force_runs_all_the_steps(self):
+        self.run_pipeline()
+
+        statuses, ran = self.run_pipeline(force=True)
+
+        self.assertEqual(ran, ["a", "b", "c"])
+        self.assertEqual(set(statuses.values()), {STATUS_RAN})
+
+    def test_steps_after_a_failed_step_are_not_run(self):
+        steps = self.steps[:2] + [
+            self.make_step("a", ["source.txt"], script=FAILING_SCRIPT),
+            self.make_step("d", ["source.txt"]),
+        ]
+
+        statuses, ran = self.run_pipeline(steps)
+
+        self.assertEqual(ran, ["d"])
+        self.assertEqual(
+            statuses,
+            {
+                "a": STATUS_FAILED,
+                "b": STATUS_BLOCKED,
+                "c": STATUS_BLOCKED,
+                "d": STATUS_RAN,
+            },
+        )
+        # the failed step runs again next time, even though its inputs haven't changed
+        statuses, ran = self.run_pipeline(self.steps)
+        self.assertEqual(ran, ["a", "b", "c"])
+
+
+class DataSourceStepsTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        datasets_dir = Path(tmp_dir.name) / "data-sources"
+        self.dataset_dir = datasets_dir / DATA_SOURCE_NAME
+        self.dataset_dir.mkdir(parents=True)
+        for file_name in ["extract_taxa.py", "raw_text.txt", "problematic_taxa.csv"]:
+            (self.dataset_dir / file_name).touch()
+        datasets_dir_patch = mock.patch.object(
+            pipeline, "ALL_DATASETS_DIR", datasets_dir
+        )
+        datasets_dir_patch.start()
+        self.addCleanup(datasets_dir_patch.stop)
+
+    def test_steps_depend_on_those_producing_their_inputs(self):
+        steps = {
+            step.name: step
+            for step in get_data_source_steps(
+                DATA_SOURCE_NAME, "cached", DATA_SOURCE_NAME
+            )
+        }
+
+        extract_step_name = f"{DATA_SOURCE_NAME}/extract_taxa"
+        self.assertEqual(
+            steps[extract_step_name].inputs[:2],
+            [self.dataset_dir / "extract_taxa.py", self.dataset_dir / "raw_text.txt"],
+        )
+        self.assertEqual(
+            steps[
+                f"{DATA_SOURCE_NAME}/add_synonyms_to_problematic_taxa_using_gbif"
+            ].depends_on,
+            [extract_step_name],
+        )
+        self.assertEqual(
+            steps[
+                f"{DATA_SOURCE_NAME}/prepare_dataset_for_chrome_extension"
+            ].depends_on,
+            [extract_step_name, ALLOWED_IDS_STEP_NAME],
+        )
+
+    def test_only_the_offline_gbif_step_reads_the_backbone(self):
+        for gbif_mode in ["online", "cached", "offline"]:
+            with self.subTest(gbif_mode):
+                (gbif_step,) = [
+                    step
+                    for step in get_data_source_steps(DATA_SOURCE_NAME, gbif_mode)
+                    if step.name.endswith("add_synonyms_to_problematic_taxa_using_gbif")
+                ]
+                self.assertEqual(
+                    DEFAULT_BACKBONE_DB_PATH in gbif_step.inputs,
+                    gbif_mode == "offline",
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from prepare_dataset_for_chrome_extension import main
+
+TAXA = [
+    {
+        "rank": "species",
+        "species_scientific": "Apis mellifera",
+        "species_common": "včela medonosná",
+    }
+]
+
+
+class PrepareDatasetTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp_dir.name)
+        self.dataset_dir = Path("data-sources") / "test-source"
+        self.dataset_dir.mkdir(parents=True)
+        (self.dataset_dir / "taxa.json").write_text(json.dumps(TAXA))
+        self.target_dir = Path("inat-common-name-adder")
+        self.target_dir.mkdir()
+
+    def test_empty_exclusion_lists(self):
+        (self.dataset_dir / "taxa_not_in_inat.csv").touch()
+
+        main("test-source")
+
+        bundle = json.loads((self.target_dir / "taxa.bundle").read_text())
+        self.assertEqual(
+            [taxon["scientificName"] for taxon in bundle], ["Apis mellifera"]
+        )
+
+    def test_without_allowed_ids(self):
+        main("test-source")
+
+        self.assertEqual(
+            (self.target_dir / "allowed_inat_taxon_ids.bin").read_bytes(), b""
+        )
+
+    def test_empty_allowed_ids(self):
+        (self.dataset_dir / "allowed_inat_taxon_ids.json").write_text("[]")
+
+        with self.assertRaises(ValueError):
+            main("test-source")
+        self.assertEqual(list(self.target_dir.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+import re
+import unittest
+
+import pandas as pd
+
+from taxon_extraction import (
+    LineParser,
+    LineRule,
+    TaxonHierarchyBuilder,
+    fill_hierarchy,
+    rank_columns,
+    validate_taxa,
+)
+
+RANKS = ["family", "genus", "species"]
+TAXON_SCHEMA = {"rank": str} | {column: str for column in rank_columns(RANKS)}
+
+
+def extract_species(groups, taxa):
+    genus = taxa.current.get("genus_scientific")
+    if genus is None:
+        return None
+    return {
+        "species_scientific": f"{genus} {groups[0]}",
+        "species_common": groups[1],
+    }
+
+
+RULES = [
+    LineRule("page number", r"\d+$"),
+    LineRule(
+        "family",
+        r"čeľaď:\s*(\w+)\s*-\s*(\w+)",
+        "family",
+        lambda groups, taxa: {
+            "family_scientific": groups[0].capitalize(),
+            "family_common": groups[1].lower(),
+        },
+        re.IGNORECASE,
+    ),
+    LineRule(
+        "genus",
+        r"rod:\s*(\w+)\s*-\s*(\w+)",
+        "genus",
+        lambda groups, taxa: {
+            "genus_scientific": groups[0],
+            "genus_common": groups[1],
+        },
+    ),
+    LineRule("species", r"-\s*([a-z]+)\s*-\s*(.+)", "species", extract_species),
+    LineRule("anything else in lower case", r"[a-z ]+$"),
+]
+
+
+def parse(text, rules=RULES):
+    parser = LineParser(rules)
+    taxa = TaxonHierarchyBuilder(TAXON_SCHEMA, RANKS)
+    return parser, parser.parse(text, taxa).build()
+
+
+class LineParserTest(unittest.TestCase):
+    def test_extracted_taxa(self):
+        parser, taxa = parse(
+            "ČEĽAĎ: APIDAE - VČELOVITÉ\n"
+            "rod: Apis - včela\n"
+            "- mellifera - včela medonosná\n"
+            "\n"
+            "12\n"
+            "rod: Bombus - čmeľ\n"
+            "- terrestris - čmeľ zemný\n"
+            "Čeľaď: Vespidae - osovité\n"
+            "- crabro - sršeň obyčajný\n"
+        )
+
+        self.assertEqual(
+            taxa.fillna("").values.tolist(),
+            [
+                ["family", "Apidae", "včelovité", "", "", "", ""],
+                ["genus", "Apidae", "včelovité", "Apis", "včela", "", ""],
+                ["species", "Apidae", "včelovité", "Apis", "včela"]
+                + ["Apis mellifera", "včela medonosná"],
+                ["genus", "Apidae", "včelovité", "Bombus", "čmeľ", "", ""],
+                ["species", "Apidae", "včelovité", "Bombus", "čmeľ"]
+                + ["Bombus terrestris", "čmeľ zemný"],
+                ["family", "Vespidae", "osovité", "", "", "", ""],
+            ],
+        )
+        # the species after a new family has no genus, so extract_species leaves it unmatched
+        self.assertEqual(parser.unmatched_line_numbers, [9])
+        self.assertEqual(
+            parser.hits,
+            {
+                "page number": 1,
+                "family": 2,
+                "genus": 2,
+                "species": 2,
+                "anything else in lower case": 0,
+            },
+        )
+
+    def test_first_matching_rule_wins(self):
+        rules = [
+            LineRule("page number", r"\d+$"),
+            LineRule("number", r"\d+"),
+            LineRule("anything else", r".+"),
+        ]
+
+        parser, _ = parse("12\n12a\nAPIDAE\n", rules)
+
+        self.assertEqual(
+            parser.hits, {"page number": 1, "number": 1, "anything else": 1}
+        )
+
+    def test_report(self):
+        parser = LineParser(RULES)
+        parser.parse(
+            "čeľaď: Apidae - včelovité\nrod apis\n- apis - včela\n17\n",
+            TaxonHierarchyBuilder(TAXON_SCHEMA, RANKS),
+        )
+
+        self.assertEqual(
+            parser.get_report().splitlines(),
+            [
+                "rule\thits\tmisses",
+                "page number\t1\t3",
+                "family\t1\t2",
+                "genus\t0\t2",
+                "species\t0\t2",
+                "anything else in lower case\t1\t1",
+                "1 lines no rule matched: 3",
+            ],
+        )
+
+    def test_flags_only_apply_to_their_rule(self):
+        rules = [
+            LineRule("ascii word", r"\w+$", flags=re.ASCII),
+            LineRule("page range", r"(\d+) - (\d+)  # e.g. 12 - 14", flags=re.VERBOSE),
+            LineRule("multiline", r"^end\.$", flags=re.MULTILINE),
+            LineRule("case-insensitive", r"the (end)", flags=re.IGNORECASE),
+            LineRule("anything else", r"\w+ \w+$"),
+        ]
+
+        parser, _ = parse("apis\nvčela\n12-14\nend.\nThe End\ncase matters\n", rules)
+
+        self.assertEqual(
+            parser.hits,
+            {
+                "ascii word": 1,
+                "page range": 1,
+                "multiline": 1,
+                "case-insensitive": 1,
+                "anything else": 1,
+            },
+        )
+        # neither the ASCII nor the verbose flag leaks into the other rules
+        self.assertEqual(parser.unmatched_line_numbers, [2])
+
+    def test_unsupported_flags(self):
+        with self.assertRaises(ValueError):
+            LineParser([LineRule("locale", rb"\w+", flags=re.LOCALE)])
+
+
+class FillHierarchyTest(unittest.TestCase):
+    def test_taxa_inherit_the_last_taxa_of_higher_ranks(self):
+        taxa = pd.DataFrame(
+            {
+                "rank": ["family", "genus", "species", "species", "family"]
+                + ["species", "genus", "species"],
+                "family_scientific": ["Apidae", None, None, None, "Vespidae"]
+                + [None, None, None],
+                "genus_scientific": [None, "Apis", None, None, None]
+                + [None, "Vespa", None],
+                "species_scientific": [None, None, "Apis mellifera", "Apis cerana"]
+                + [None, "Polistes gallicus", None, "Vespa crabro"],
+            },
+            index=range(10, 18),
+        )
+
+        taxa = fill_hierarchy(taxa, RANKS)
+
+        self.assertEqual(taxa.index.tolist(), list(range(8)))
+        self.assertEqual(
+            taxa.drop(columns="rank").values.tolist(),
+            [
+                ["Apidae", None, None],
+                ["Apidae", "Apis", None],
+                ["Apidae", "Apis", "Apis mellifera"],
+                ["Apidae", "Apis", "Apis cerana"],
+                ["Vespidae", None, None],
+                # a new family ends the genus before it
+                ["Vespidae", None, "Polistes gallicus"],
+                ["Vespidae", "Vespa", None],
+                ["Vespidae", "Vespa", "Vespa crabro"],
+            ],
+        )
+
+
+class ValidateTaxaTest(unittest.TestCase):
+    schema = {"rank": str, "is_native": bool, "synonyms": list}
+
+    def test_valid_taxa(self):
+        validate_taxa(
+            pd.DataFrame(
+                {
+                    "rank": ["species", "genus"],
+                    "is_native": [True, None],
+                    "synonyms": [["Apis mellifica"], []],
+                }
+            ),
+            self.schema,
+        )
+
+    def test_invalid_taxa(self):
+        for name, taxa in [
+            (
+                "missing rank",
+                {"rank": [None], "is_native": [True], "synonyms": [[]]},
+            ),
+            (
+                "a string for a bool",
+                {"rank": ["species"], "is_native": ["yes"], "synonyms": [[]]},
+            ),
+            (
+                "a string for a list",
+                {"rank": ["species"], "is_native": [True], "synonyms": ["Apis"]},
+            ),
+            (
+                "a missing list",
+                {"rank": ["species"], "is_native": [True], "synonyms": [None]},
+            ),
+        ]:
+            with self.subTest(name), self.assertRaises(ValueError):
+                validate_taxa(pd.DataFrame(taxa), self.schema)
+
+
+if __name__ == "__main__":
+    unittest.main()
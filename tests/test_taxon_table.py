@@ -0,0 +1,173 @@
+import importlib.util
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from taxon_table import TaxonTable, resolve_rank_column
+from vernacular_names import normalize_names
+
+SBM_DIR = (
+    Path(__file__).parents[1] / "data-sources" / "slovenske-botanicke-menoslovie-2024"
+)
+
+
+def load_analysis():
+    """Imports SBM's `analyse_auto_added_names.py` (the data sources aren't packages)."""
+    spec = importlib.util.spec_from_file_location(
+        "analyse_auto_added_names", SBM_DIR / "analyse_auto_added_names.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ResolveRankColumnTest(unittest.TestCase):
+    def test_values_of_the_taxon_rank(self):
+        df = pd.DataFrame(
+            {
+                "rank": ["genus", "species", "variety", None, "Species"],
+                "genus_scientific": ["Abies", "Abies", "Abies", "Picea", "Picea"],
+                "species_scientific": [None, "Abies alba", None, None, "Picea abies"],
+                "genus_common": ["jedľa", "jedľa", "jedľa", "smrek", "smrek"],
+            },
+            index=[5, 6, 7, 8, 9],
+        )
+
+        scientific_names = resolve_rank_column(df, "scientific")
+        self.assertEqual(scientific_names.index.tolist(), [5, 6, 7, 8, 9])
+        # ranks without a column of their own, missing ranks and ranks in another case (the rank
+        # has to match the column name exactly) get None
+        self.assertEqual(
+            scientific_names.tolist(), ["Abies", "Abies alba", None, None, None]
+        )
+        self.assertEqual(
+            resolve_rank_column(df, "common").tolist(),
+            ["jedľa", None, None, None, None],
+        )
+
+
+class TaxonTableTest(unittest.TestCase):
+    def setUp(self):
+        self.taxa = TaxonTable(
+            pd.DataFrame(
+                {
+                    "rank": ["genus", "species", "species"],
+                    "genus_scientific": ["Abies", "Abies", "Abies"],
+                    "genus_common": ["jedľa", "jedľa", "jedľa"],
+                    "species_scientific": [None, "Abies alba", "Abies cephalonica"],
+                    "species_common": [None, "jedľa biela", "jedľa gréčka"],
+                }
+            )
+        )
+
+    def test_lookups(self):
+        self.assertEqual(
+            self.taxa.find_by_scientific_name("abies ALBA")["commonName"].tolist(),
+            ["jedľa biela"],
+        )
+        self.assertEqual(
+            self.taxa.find_by_common_name("Jedľa")["scientificName"].tolist(),
+            ["Abies"],
+        )
+        self.assertEqual(len(self.taxa.find_by_rank("species")), 2)
+        self.assertTrue(self.taxa.find_by_scientific_name("Picea").empty)
+        self.assertEqual(
+            self.taxa.to_records(self.taxa.find_by_common_name("jedľa gréčka")),
+            [
+                {
+                    "rank": "species",
+                    "genus_scientific": "Abies",
+                    "genus_common": "jedľa",
+                    "species_scientific": "Abies cephalonica",
+                    "species_common": "jedľa gréčka",
+                }
+            ],
+        )
+
+
+class ReconcileAddedNamesTest(unittest.TestCase):
+    def test_statuses(self):
+        analysis = load_analysis()
+        names_added = pd.DataFrame(
+            {
+                "id": [10, 20, 30, 40, 50, 60, 70],
+                "vernacularName": ["jedľa biela", "Smrek", "borovica lesná"]
+                + ["tis obyčajný", "buk lesný", "dub zimný", "jarabina vtáčia"],
+            }
+        )
+        names_added["nameKey"] = normalize_names(names_added["vernacularName"])
+        sbm_taxa = TaxonTable(
+            pd.DataFrame(
+                {
+                    "rank": ["species", "genus", "species", "species", "subspecies"]
+                    + ["species", "species", "subspecies"],
+                    "genus_scientific": [None, "Picea", None, None, None]
+                    + [None, None, None],
+                    "genus_common": [None, "smrek", None, None, None]
+                    + [None, None, None],
+                    "species_scientific": ["Abies alba", None, "Picea abies"]
+                    + ["Pinus sylvestris", None, "Fagus sylvatica"]
+                    + ["Quercus petraea", None],
+                    "species_common": ["jedľa biela", None, "smrek"]
+                    + ["borovica lesná", None, "buk lesný", "dub zimný", None],
+                    "subspecies_scientific": [None] * 4
+                    + ["Pinus sylvestris subsp. hamata"]
+                    + [None, None, "Sorbus aucuparia subsp. aucuparia"],
+                    "subspecies_common": [None] * 4
+                    + ["Borovica lesná", None, None, "jarabina vtáčia"],
+                }
+            )
+        ).df
+        inat_taxa = pd.DataFrame(
+            {
+                "id": [10, 20, 30, 40, 60, 70, 80],
+                "scientificName": ["Abies alba", "Picea", "Pinus sylvestris"]
+                + ["Taxus baccata", "Quercus robur", "Sorbus aucuparia aucuparia"]
+                + ["Fagus sylvatica"],
+            }
+        )
+
+        reconciled = analysis.reconcile_added_names(names_added, sbm_taxa, inat_taxa)
+
+        self.assertEqual(
+            reconciled[["status", "sciNameSBM", "sciNameInat", "sbmCandidates"]]
+            .astype(object)
+            .where(reconciled.notna(), None)
+            .values.tolist(),
+            [
+                [analysis.STATUS_MATCHED, "Abies alba", "Abies alba", "Abies alba"],
+                # a one-word name shared by a genus and its species isn't ambiguous
+                [analysis.STATUS_MATCHED, "Picea", "Picea", "Picea | Picea abies"],
+                [
+                    analysis.STATUS_AMBIGUOUS,
+                    None,
+                    "Pinus sylvestris",
+                    "Pinus sylvestris | Pinus sylvestris subsp. hamata",
+                ],
+                [analysis.STATUS_SBM_MISSING, None, "Taxus baccata", None],
+                [
+                    analysis.STATUS_INAT_MISSING,
+                    "Fagus sylvatica",
+                    None,
+                    "Fagus sylvatica",
+                ],
+                [
+                    analysis.STATUS_SCI_NAME_MISMATCH,
+                    "Quercus petraea",
+                    "Quercus robur",
+                    "Quercus petraea",
+                ],
+                [
+                    analysis.STATUS_MATCHED,
+                    "Sorbus aucuparia subsp. aucuparia",
+                    "Sorbus aucuparia aucuparia",
+                    "Sorbus aucuparia subsp. aucuparia",
+                ],
+            ],
+        )
+        self.assertEqual(reconciled["numSbmMatches"].tolist(), [1, 2, 2, 0, 1, 1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
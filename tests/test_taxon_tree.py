@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from taxon_tree import TaxonTree
+
+# 1
+# ├── 2
+# │   ├── 5
+# │   ├── 6
+# │   └── 7
+# └── 3
+#     └── 4
+# 9 (its parent, 99, isn't in the taxonomy)
+TAXA = pd.DataFrame(
+    {
+        "id": [7, 1, 3, 5, 2, 9, 4, 6],
+        "parentNameUsageID": [
+            "https://www.inaturalist.org/taxa/2",
+            None,
+            "https://www.inaturalist.org/taxa/1",
+            "https://www.inaturalist.org/taxa/2",
+            "https://www.inaturalist.org/taxa/1",
+            "https://www.inaturalist.org/taxa/99",
+            "https://www.inaturalist.org/taxa/3",
+            "https://www.inaturalist.org/taxa/2",
+        ],
+    }
+)
+
+
+class TaxonTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = TaxonTree.from_taxa(TAXA)
+
+    def get_interval(self, taxon_id):
+        row = self.tree._row(taxon_id)
+        return self.tree.left[row], self.tree.right[row]
+
+    def test_nested_set_numbering(self):
+        self.assertEqual(self.tree.preorder_ids.tolist(), [1, 2, 5, 6, 7, 3, 4, 9])
+        self.assertEqual(
+            {taxon_id: self.get_interval(taxon_id) for taxon_id in TAXA["id"]},
+            {
+                1: (0, 6),
+                2: (1, 4),
+                5: (2, 2),
+                6: (3, 3),
+                7: (4, 4),
+                3: (5, 6),
+                4: (6, 6),
+                9: (7, 7),
+            },
+        )
+
+    def test_descendants(self):
+        self.assertEqual(self.tree.descendants(1).tolist(), [2, 5, 6, 7, 3, 4])
+        self.assertEqual(self.tree.descendants(2).tolist(), [5, 6, 7])
+        self.assertEqual(
+            self.tree.descendants(2, include_self=True).tolist(), [2, 5, 6, 7]
+        )
+        self.assertEqual(self.tree.descendants(5).tolist(), [])
+        self.assertEqual(self.tree.descendants(9, include_self=True).tolist(), [9])
+
+    def test_ancestors(self):
+        self.assertEqual(self.tree.ancestors(4), [3, 1])
+        self.assertEqual(self.tree.ancestors(1), [])
+        self.assertEqual(self.tree.ancestors(9), [])
+
+    def test_is_descendant(self):
+        self.assertTrue(self.tree.is_descendant(6, 1))
+        self.assertFalse(self.tree.is_descendant(4, 2))
+        self.assertFalse(self.tree.is_descendant(2, 2))
+        self.assertTrue(self.tree.is_descendant(2, 2, include_self=True))
+        self.assertFalse(self.tree.is_descendant(9, 1))
+
+    def test_descendant_mask(self):
+        taxon_ids = np.array([1, 2, 3, 4, 5, 6, 7, 9, 42])
+        self.assertEqual(
+            taxon_ids[self.tree.descendant_mask(taxon_ids, [2, 4])].tolist(),
+            [2, 4, 5, 6, 7],
+        )
+        self.assertEqual(
+            taxon_ids[
+                self.tree.descendant_mask(taxon_ids, [1], include_self=False)
+            ].tolist(),
+            [2, 3, 4, 5, 6, 7],
+        )
+
+    def test_missing_taxon(self):
+        self.assertIn(9, self.tree)
+        self.assertNotIn(42, self.tree)
+        self.assertNotIn(99, self.tree)
+        with self.assertRaises(KeyError):
+            self.tree.descendants(42)
+        with self.assertRaises(KeyError):
+            self.tree.descendant_mask(TAXA["id"], [99])
+
+    def test_cycle(self):
+        with self.assertRaises(ValueError):
+            TaxonTree([1, 2], [2, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
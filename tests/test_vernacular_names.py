@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from vernacular_names import ANY, VernacularNameStore
+
+
+class VernacularNameStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = VernacularNameStore(
+            pd.DataFrame(
+                {
+                    "id": [1, 2, 3, 4],
+                    "vernacularName": ["jedľa biela", "smrek", "borovica", "tis"],
+                    "contributor": ["Fero Bednar", np.nan, "Fero Bednar", np.nan],
+                    "created": [
+                        "2017-06-29T19:44:38Z",
+                        "2018-01-01T00:00:00Z",
+                        "2019-01-01T00:00:00Z",
+                        "2020-01-01T00:00:00Z",
+                    ],
+                }
+            )
+        )
+
+    def test_names_without_a_contributor(self):
+        self.assertEqual(self.store.find_by_contributor(None)["id"].tolist(), [2, 4])
+        self.assertEqual(self.store.find_by_contributor(np.nan)["id"].tolist(), [2, 4])
+        for contributor in [None, np.nan]:
+            self.assertEqual(
+                self.store.find_created_between("2019-01-01", contributor=contributor)[
+                    "id"
+                ].tolist(),
+                [4],
+            )
+
+    def test_names_of_any_contributor(self):
+        self.assertEqual(
+            self.store.find_created_between("2018-01-01")["id"].tolist(), [2, 3, 4]
+        )
+        self.assertEqual(
+            self.store.find_created_between(end="2019-01-01", contributor=ANY)[
+                "id"
+            ].tolist(),
+            [1, 2],
+        )
+
+    def test_names_of_a_contributor(self):
+        self.assertEqual(
+            self.store.find_by_contributor("Fero Bednar")["id"].tolist(), [1, 3]
+        )
+        self.assertTrue(self.store.find_by_contributor("nobody").empty)
+        self.assertEqual(
+            self.store.find_created_between("2018-01-01", contributor="Fero Bednar")[
+                "id"
+            ].tolist(),
+            [3],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
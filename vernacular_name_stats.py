@@ -0,0 +1,196 @@
+import argparse
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from inat_taxonomy import DwcaArchive, INAT_DWCA_PATH, hash_file, load_inat_taxa
+
+STATS_CACHE_DIR = Path(".cache") / "vernacular-name-stats"
+VERNACULAR_NAMES_FILE_TEMPLATE = "VernacularNames-{}.csv"
+NEWLINE = ord("\n")
+
+
+def count_records(blocks, quotechar='"'):
+    """
+    Counts the CSV records in the raw bytes, i.e. the newlines that aren't inside a quoted field
+    (a name can span several lines). A newline is inside quotes when an odd number of quote
+    characters precedes it, doubled (escaped) quotes not changing that.
+    """
+    num_newlines = 0
+    inside_quotes = False
+    last_byte = NEWLINE
+    for block in blocks:
+        data = np.frombuffer(block, dtype=np.uint8)
+        if len(data) == 0:
+            continue
+        last_byte = data[-1]
+        if quotechar is None or block.find(quotechar.encode()) == -1:
+            if not inside_quotes:
+                num_newlines += block.count(b"\n")
+            continue
+        # the parity of the quotes seen so far (uint8 overflows keep it)
+        quote_parity = np.cumsum(data == ord(quotechar), dtype=np.uint8) & 1
+        quote_parity ^= inside_quotes
+        num_newlines += np.count_nonzero((data == NEWLINE) & (quote_parity == 0))
+        inside_quotes = bool(quote_parity[-1])
+    # the last record doesn't have to end with a newline
+    return num_newlines + (last_byte != NEWLINE)
+
+
+def count_names(inat_taxonomy_path, language):
+    """The number of common names in the language, without parsing the CSV."""
+    inat_taxonomy_export = DwcaArchive(inat_taxonomy_path)
+    member = VERNACULAR_NAMES_FILE_TEMPLATE.format(language)
+    options = inat_taxonomy_export.files[member]
+    num_records = count_records(
+        inat_taxonomy_export.iter_blocks(member), options["quotechar"]
+    )
+    inat_taxonomy_export.close()
+    return num_records - (options["header"] is not None)
+
+
+def count_names_by_taxon(inat_taxonomy_path, language):
+    """The number of common names in the language per taxon ID."""
+    inat_taxonomy_export = DwcaArchive(inat_taxonomy_path)
+    taxon_ids = pd.concat(
+        chunk["id"]
+        for chunk in inat_taxonomy_export.read_csv_chunks(
+            VERNACULAR_NAMES_FILE_TEMPLATE.format(language), usecols=["id"]
+        )
+    )
+    inat_taxonomy_export.close()
+    return taxon_ids.value_counts(sort=False)
+
+
+def get_languages(inat_taxonomy_export):
+    prefix, suffix = VERNACULAR_NAMES_FILE_TEMPLATE.split("{}")
+    return [
+        member[len(prefix) : -len(suffix)]
+        for member in inat_taxonomy_export.members
+        if member.startswith(prefix) and member.endswith(suffix)
+    ]
+
+
+def get_export_key(inat_taxonomy_export):
+    """`<export month>-<hash>`, the hash telling apart exports from the same month (or edited by hand)."""
+    path = inat_taxonomy_export.path
+    if path.is_dir():
+        member_hashes = "".join(
+            hash_file(path / member)
+            for member in ["meta.xml"] + inat_taxonomy_export.members
+        )
+        source_hash = hashlib.sha256(member_hashes.encode()).hexdigest()
+    else:
+        source_hash = hash_file(path)
+    return f"{inat_taxonomy_export.created:%Y-%m}-{source_hash[:16]}"
+
+
+def compute_stats(inat_taxonomy_path, languages, by_kingdom_and_rank, max_workers):
+    """
+    Counts the common names of each language, each in its own process. The breakdown by kingdom
+    and rank needs the taxon IDs of the names (so the CSVs get parsed after all) and the taxonomy.
+    """
+    count = count_names_by_taxon if by_kingdom_and_rank else count_names
+    with ProcessPoolExecutor(max_workers) as executor:
+        counts = dict(
+            zip(
+                languages,
+                executor.map(count, [inat_taxonomy_path] * len(languages), languages),
+            )
+        )
+    if not by_kingdom_and_rank:
+        return pd.DataFrame(
+            {"language": list(counts), "numberOfNames": list(counts.values())}
+        )
+
+    names_by_taxon = pd.concat(
+        [
+            counts_by_taxon.rename_axis("id").reset_index(name="numberOfNames")
+            for counts_by_taxon in counts.values()
+        ],
+        keys=list(counts),
+        names=["language", None],
+    ).reset_index("language")
+    inat_taxa = load_inat_taxa(["id", "kingdom", "taxonRank"], inat_taxonomy_path)
+    names_by_taxon = names_by_taxon.merge(inat_taxa, on="id", how="left")
+    return (
+        names_by_taxon.groupby(
+            ["language", "kingdom", "taxonRank"], observed=True, dropna=False
+        )["numberOfNames"]
+        .sum()
+        .reset_index()
+        .astype({"kingdom": object, "taxonRank": object})
+    )
+
+
+def load_stats(
+    inat_taxonomy_path=INAT_DWCA_PATH,
+    languages=None,
+    by_kingdom_and_rank=False,
+    max_workers=None,
+):
+    """
+    The number of common names per language (and optionally per kingdom and rank) in the export.
+    The stats are cached per export, counting the names of the same export again is instant.
+    """
+    inat_taxonomy_export = DwcaArchive(inat_taxonomy_path)
+    all_languages = get_languages(inat_taxonomy_export)
+    export_key = get_export_key(inat_taxonomy_export)
+    inat_taxonomy_export.close()
+
+    breakdown = "-by-kingdom-and-rank" if by_kingdom_and_rank else ""
+    cache_path = STATS_CACHE_DIR / f"{export_key}{breakdown}.csv"
+    if cache_path.exists():
+        stats = pd.read_csv(cache_path, keep_default_na=False, na_values=[""])
+    else:
+        stats = compute_stats(
+            inat_taxonomy_path, all_languages, by_kingdom_and_rank, max_workers
+        )
+        STATS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        stats.to_csv(cache_path, index=False)
+    if languages is not None:
+        stats = stats[stats["language"].isin(languages)]
+    return stats.reset_index(drop=True)
+
+
+def main(inat_taxonomy_path, languages, by_kingdom_and_rank, max_workers=None):
+    start_time = time.time()
+    stats = load_stats(inat_taxonomy_path, languages, by_kingdom_and_rank, max_workers)
+    if by_kingdom_and_rank:
+        stats = stats.pivot_table(
+            index=["kingdom", "taxonRank"],
+            columns="language",
+            values="numberOfNames",
+            aggfunc="sum",
+            fill_value=0,
+        )
+    print(stats.to_string())
+    print(f"Done in {time.time() - start_time:.1f}s.")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "inat_taxonomy",
+        nargs="?",
+        default=INAT_DWCA_PATH,
+        help="the iNat taxonomy export (inaturalist-taxonomy.dwca.zip), zipped or extracted",
+    )
+    arg_parser.add_argument(
+        "--languages", nargs="+", help="defaults to all languages of the export"
+    )
+    arg_parser.add_argument(
+        "--by-kingdom-and-rank",
+        action="store_true",
+        help="break the counts down by the kingdom and rank of the named taxa",
+    )
+    arg_parser.add_argument(
+        "--workers", type=int, help="the number of processes, defaults to all CPUs"
+    )
+    args = arg_parser.parse_args()
+
+    main(args.inat_taxonomy, args.languages, args.by_kingdom_and_rank, args.workers)
@@ -0,0 +1,163 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from inat_taxonomy import DwcaArchive, INAT_DWCA_PATH
+
+COMBINING_DIACRITICS_PATTERN = "[\u0300-\u036f]"
+# don't filter by the column, as opposed to None (or NaN) which means a missing value
+ANY = object()
+
+
+def normalize_names(names, ignore_diacritics=False):
+    """Lower-cases the names, optionally also stripping their diacritics (`Jedla Balzamová` -> `jedla balzamova`)."""
+    names = names.str.lower().str.strip()
+    if ignore_diacritics:
+        names = names.str.normalize("NFD").str.replace(
+            COMBINING_DIACRITICS_PATTERN, "", regex=True
+        )
+    return names
+
+
+def to_utc_datetime64(date):
+    """Dates without a time zone are taken as UTC."""
+    timestamp = pd.Timestamp(date)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC").tz_localize(None).to_datetime64()
+
+
+class KeyIndex:
+    """
+    The row positions of each key, stored as contiguous slices of a single array (keys being hashed once).
+    Missing keys (NaN/None) are a key of their own, e.g. the names without a contributor.
+    """
+
+    def __init__(self, keys):
+        codes, self.keys = pd.factorize(keys, use_na_sentinel=False)
+        self.order = np.argsort(codes, kind="stable")
+        self.bounds = np.searchsorted(codes[self.order], np.arange(len(self.keys) + 1))
+
+    def get(self, key, default=()):
+        if pd.isna(key):
+            key = np.nan
+        try:
+            code = self.keys.get_loc(key)
+        except KeyError:
+            return default
+        return self.order[self.bounds[code] : self.bounds[code + 1]]
+
+
+class VernacularNameStore:
+    """
+    The common names of one language from the iNat taxonomy export (`VernacularNames-<language>.csv`),
+    loaded once and indexed for constant-time lookups by name, taxon ID and contributor, and for
+    date range queries (`created`). Each index is built on its first use.
+
+    Name lookups are case-insensitive and can ignore diacritics as well.
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.df["created"] = pd.to_datetime(self.df["created"], utc=True)
+        self.df["nameKey"] = normalize_names(self.df["vernacularName"])
+
+    @classmethod
+    def from_csv(cls, path):
+        """Loads a `VernacularNames-<language>.csv` copied out of the export."""
+        return cls(pd.read_csv(path))
+
+    @classmethod
+    def from_dwca(cls, language="slovak", inat_taxonomy_path=INAT_DWCA_PATH):
+        inat_taxonomy_export = DwcaArchive(inat_taxonomy_path)
+        df = inat_taxonomy_export.read_csv(f"VernacularNames-{language}.csv")
+        inat_taxonomy_export.close()
+        return cls(df)
+
+    @cached_property
+    def _by_name(self):
+        return KeyIndex(self.df["nameKey"])
+
+    @cached_property
+    def _name_keys_without_diacritics(self):
+        return normalize_names(self.df["vernacularName"], ignore_diacritics=True)
+
+    @cached_property
+    def _by_name_without_diacritics(self):
+        return KeyIndex(self._name_keys_without_diacritics)
+
+    @cached_property
+    def _by_taxon_id(self):
+        return KeyIndex(self.df["id"])
+
+    @cached_property
+    def _by_contributor(self):
+        return KeyIndex(self.df["contributor"])
+
+    @cached_property
+    def _created_order(self):
+        # NaT sorts last, i.e. names without a date are never within a date range
+        return np.argsort(
+            self.df["created"].to_numpy(dtype="datetime64[ns]"), kind="stable"
+        )
+
+    @cached_property
+    def _sorted_created(self):
+        return self.df["created"].to_numpy(dtype="datetime64[ns]")[self._created_order]
+
+    def _rows(self, index, key):
+        return self.df.iloc[index.get(key, [])]
+
+    def find_by_name(self, name, ignore_diacritics=False):
+        if ignore_diacritics:
+            return self._rows(
+                self._by_name_without_diacritics,
+                normalize_names(pd.Series([name]), ignore_diacritics=True)[0],
+            )
+        return self._rows(self._by_name, normalize_names(pd.Series([name]))[0])
+
+    def find_by_taxon_id(self, taxon_id):
+        return self._rows(self._by_taxon_id, taxon_id)
+
+    def find_by_contributor(self, contributor):
+        """None (or NaN) finds the names without a contributor."""
+        return self._rows(self._by_contributor, contributor)
+
+    def find_created_between(self, start=None, end=None, contributor=ANY):
+        """
+        Returns the names created in `[start, end)` (either bound being optional), oldest first,
+        optionally just those added by the given contributor. Just like in `find_by_contributor`,
+        None (or NaN) means the names without a contributor, `ANY` (the default) doesn't filter them.
+        """
+        first = 0
+        last = len(self._sorted_created) - np.isnat(self._sorted_created).sum()
+        if start is not None:
+            first = self._sorted_created.searchsorted(to_utc_datetime64(start))
+        if end is not None:
+            last = min(last, self._sorted_created.searchsorted(to_utc_datetime64(end)))
+        rows = self._created_order[first:last]
+        if contributor is not ANY:
+            rows = rows[np.isin(rows, self._by_contributor.get(contributor, []))]
+        return self.df.iloc[rows]
+
+    def match_names(self, names, ignore_diacritics=False):
+        """
+        Joins the given names (a Series) to the stored common names matching them, returning one row per
+        match with the index of the given name in the `queryIndex` column. Names without a match are left out.
+        """
+        queries = pd.DataFrame(
+            {
+                "key": normalize_names(names, ignore_diacritics),
+                "queryIndex": names.index,
+            }
+        )
+        keys = (
+            self._name_keys_without_diacritics
+            if ignore_diacritics
+            else self.df["nameKey"]
+        )
+        return queries.merge(self.df.assign(key=keys), on="key").drop(columns="key")
+
+    def __len__(self):
+        return len(self.df)